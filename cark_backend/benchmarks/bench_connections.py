@@ -0,0 +1,72 @@
+"""
+Benchmark لتكلفة فتح الاتصال بقاعدة البيانات لكل طلب (connection churn).
+كل "طلب" = request_started + SELECT 1 + request_finished، بنفس اللي Django بيعمله
+في إدارة الاتصالات، على تلات إعدادات لنفس قاعدة البيانات:
+    churn       CONN_MAX_AGE=0 (اتصال جديد لكل طلب - الوضع القديم)
+    persistent  CONN_MAX_AGE=600 + CONN_HEALTH_CHECKS
+    pooled      DB_POOL_SIZE (الاتصال بيرجع للـ pool آخر الطلب)
+
+قاعدة البيانات من نفس متغيرات البيئة بتاعة settings (DB_ENGINE, DB_NAME, DB_HOST, ...).
+التشغيل من فولدر cark_backend:
+    DB_ENGINE=sqlite3 DB_NAME=/tmp/bench.sqlite3 python -m benchmarks.bench_connections --requests 2000
+    DB_ENGINE=mysql DB_NAME=cark DB_USER=root python -m benchmarks.bench_connections --requests 2000
+"""
+import argparse
+import os
+import time
+
+import django
+from django.conf import settings
+
+
+def configure():
+    from cark_backend.database import database_config
+
+    env = dict(os.environ)
+    env.pop('DB_POOL_SIZE', None)
+    churn = database_config({**env, 'DB_CONN_MAX_AGE': '0'})
+    persistent = database_config({**env, 'DB_CONN_MAX_AGE': '600', 'DB_CONN_HEALTH_CHECKS': 'true'})
+    pooled = database_config({**env, 'DB_POOL_SIZE': '4'})
+    settings.configure(
+        DATABASES={'default': churn, 'churn': churn, 'persistent': persistent, 'pooled': pooled},
+        USE_TZ=True,
+    )
+    django.setup()
+
+
+def run(alias, requests):
+    from django.core.signals import request_started, request_finished
+    from django.db import connections
+
+    connection = connections[alias]
+    # الاتصالات بتتقفل في request_started/request_finished حسب CONN_MAX_AGE لكل alias
+    raw_connections = set()
+    started = time.perf_counter()
+    for _ in range(requests):
+        request_started.send(sender=None)
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+            cursor.fetchone()
+        raw_connections.add(connection.connection)
+        request_finished.send(sender=None)
+    elapsed = time.perf_counter() - started
+    connections.close_all()
+    return elapsed, len(raw_connections)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--requests', type=int, default=2000)
+    args = parser.parse_args()
+    configure()
+
+    from django.db import connections
+    print(f"engine: {connections['default'].vendor}, {args.requests} requests per mode")
+    for alias in ('churn', 'persistent', 'pooled'):
+        elapsed, opened = run(alias, args.requests)
+        print(f'{alias:<11} {elapsed / args.requests * 1e6:9.1f} us/request   '
+              f'{args.requests / elapsed:9.0f} req/s   {opened:5d} distinct connections')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+"""
+Micro-benchmark لفك الـ polyline وحساب طول المسار.
+
+التشغيل من فولدر cark_backend:
+    python -m benchmarks.bench_polyline --points 10000
+"""
+import argparse
+import math
+import random
+import timeit
+
+from rentals.polyline import decode_polyline, encode_polyline, path_length_m
+
+
+def make_route(points, seed=42):
+    # مسار عشوائي حوالين القاهرة بخطوات صغيرة زي مسار GPS حقيقي
+    rnd = random.Random(seed)
+    lat, lng = 30.0444, 31.2357
+    route = []
+    for _ in range(points):
+        lat += rnd.uniform(-0.0005, 0.0005)
+        lng += rnd.uniform(-0.0005, 0.0005)
+        route.append((lat, lng))
+    return route
+
+
+def bench(label, func, number):
+    best = min(timeit.repeat(func, number=number, repeat=5)) / number
+    print(f'{label:<28} {best * 1000:9.3f} ms')
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--points', type=int, default=10000)
+    parser.add_argument('--number', type=int, default=20)
+    args = parser.parse_args()
+
+    route = make_route(args.points)
+    encoded = encode_polyline(route)
+    lats, lngs = decode_polyline(encoded)
+    assert len(lats) == args.points
+    assert math.isclose(lats[-1], round(route[-1][0], 5), abs_tol=1e-9)
+
+    print(f'route: {args.points} points, {len(encoded)} chars, {path_length_m(lats, lngs) / 1000:.2f} km')
+    decode = bench('decode_polyline', lambda: decode_polyline(encoded), args.number)
+    length = bench('path_length_m', lambda: path_length_m(lats, lngs), args.number)
+    bench('decode + length', lambda: path_length_m(*decode_polyline(encoded)), args.number)
+    print(f'per point: decode {decode / args.points * 1e9:.0f} ns, length {length / args.points * 1e9:.0f} ns')
+
+
+if __name__ == '__main__':
+    main()
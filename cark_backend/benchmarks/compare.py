@@ -0,0 +1,63 @@
+"""
+مقارنة تقريرين benchmark بين إصدارين (تقرير benchmarks.scenario أو JSON بتاع pytest-benchmark):
+    python -m benchmarks.compare reports/v1.json reports/v2.json --threshold 10
+
+المقارنة بالـ median لكل خطوة/benchmark. الـ exit code بيبقى 1 لو أي حاجة بقت أبطأ من
+--threshold في المية، فينفع تتحط في الـ CI.
+"""
+import argparse
+import json
+import sys
+
+
+def load(path):
+    """
+    return: {name: median بالثواني}
+    """
+    with open(path) as f:
+        report = json.load(f)
+    if report.get('kind') == 'scenario':
+        return {step: stats['median'] for step, stats in report['steps'].items() if stats.get('count')}
+    if 'benchmarks' in report:
+        return {bench['fullname']: bench['stats']['median'] for bench in report['benchmarks']}
+    raise ValueError(f'{path} is not a scenario or pytest-benchmark report.')
+
+
+def compare(old, new, threshold):
+    """
+    return: list of (name, old, new, change %, flag)
+    """
+    rows = []
+    for name in sorted(set(old) | set(new)):
+        before, after = old.get(name), new.get(name)
+        if before is None or after is None:
+            rows.append((name, before, after, None, 'added' if before is None else 'removed'))
+            continue
+        change = (after - before) / before * 100 if before else 0.0
+        flag = 'slower' if change > threshold else 'faster' if change < -threshold else ''
+        rows.append((name, before, after, change, flag))
+    return rows
+
+
+def _ms(value):
+    return '-' if value is None else f'{value * 1000:.3f}'
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('old')
+    parser.add_argument('new')
+    parser.add_argument('--threshold', type=float, default=10, help='percent change that counts as a regression')
+    args = parser.parse_args()
+
+    rows = compare(load(args.old), load(args.new), args.threshold)
+    width = max([len(row[0]) for row in rows] + [4])
+    print(f'{"name":<{width}}  {"old ms":>10}  {"new ms":>10}  {"change":>8}')
+    for name, before, after, change, flag in rows:
+        percent = '' if change is None else f'{change:+.1f}%'
+        print(f'{name:<{width}}  {_ms(before):>10}  {_ms(after):>10}  {percent:>8}  {flag}')
+    sys.exit(1 if any(row[4] == 'slower' for row in rows) else 0)
+
+
+if __name__ == '__main__':
+    main()
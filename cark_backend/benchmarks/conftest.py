@@ -0,0 +1,35 @@
+"""
+Micro-benchmarks بـ pytest-benchmark على قاعدة بيانات test منفصلة فيها بيانات من benchmarks.seed.
+
+التشغيل من فولدر cark_backend:
+    pip install pytest pytest-benchmark
+    DB_ENGINE=sqlite3 pytest benchmarks --benchmark-json=reports/micro.json
+
+وبعدين المقارنة بين إصدارين بـ python -m benchmarks.compare
+"""
+import os
+
+import django
+import pytest
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'cark_backend.settings')
+django.setup()
+
+
+@pytest.fixture(scope='session')
+def django_test_db():
+    from django.db import connection
+    from django.test.utils import setup_test_environment, teardown_test_environment
+
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0)
+    yield
+    connection.creation.destroy_test_db(old_name, verbosity=0)
+    teardown_test_environment()
+
+
+@pytest.fixture(scope='session')
+def seeded(django_test_db):
+    from .seed import seed
+
+    return seed(users=200, cars=100, rentals=1000, documents=200)
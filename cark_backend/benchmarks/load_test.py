@@ -0,0 +1,142 @@
+"""
+Load test بسيط (stdlib بس) لمقارنة الـ sync views تحت gunicorn بالـ async views تحت uvicorn
+مع عملاء بطيئين (موبايل): كل عميل بيبعت الطلب على مرتين وبينهم --client-delay-ms.
+
+تشغيل السيرفر بنفس عدد الـ workers في الحالتين:
+    gunicorn cark_backend.wsgi:application --workers 4
+    gunicorn cark_backend.asgi:application -k uvicorn.workers.UvicornWorker --workers 4
+
+وبعدين من فولدر cark_backend:
+    python -m benchmarks.load_test --path /api/cars/ --concurrency 200 --requests 2000 --pid <gunicorn master pid>
+    python -m benchmarks.load_test --path /api/async/cars/search/ --concurrency 200 --requests 2000 --pid <pid>
+
+--pid بيقيس أقصى RSS للسيرفر (الـ master + الـ workers) أثناء الاختبار.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+from urllib.parse import urlsplit
+
+
+def _children(pid):
+    children = []
+    try:
+        for task in os.listdir(f'/proc/{pid}/task'):
+            with open(f'/proc/{pid}/task/{task}/children') as f:
+                children.extend(int(child) for child in f.read().split())
+    except OSError:
+        pass
+    return children
+
+
+def _rss_kb(pid):
+    try:
+        with open(f'/proc/{pid}/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return 0
+
+
+def tree_rss_kb(pid):
+    total = 0
+    stack = [pid]
+    while stack:
+        current = stack.pop()
+        total += _rss_kb(current)
+        stack.extend(_children(current))
+    return total
+
+
+async def sample_memory(pid, stop, interval=0.2):
+    peak = 0
+    while not stop.is_set():
+        peak = max(peak, tree_rss_kb(pid))
+        await asyncio.sleep(interval)
+    return peak
+
+
+async def one_request(host, port, path, token, client_delay):
+    headers = [f'GET {path} HTTP/1.1', f'Host: {host}:{port}', 'Connection: close']
+    if token:
+        headers.append(f'Authorization: Bearer {token}')
+    request = ('\r\n'.join(headers) + '\r\n\r\n').encode()
+    started = time.perf_counter()
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        # العميل البطيء: نص الطلب، استنى، وبعدين الباقي
+        half = len(request) // 2
+        writer.write(request[:half])
+        await writer.drain()
+        if client_delay:
+            await asyncio.sleep(client_delay)
+        writer.write(request[half:])
+        await writer.drain()
+        status_line = await reader.readline()
+        await reader.read()
+    finally:
+        writer.close()
+    status = int(status_line.split()[1]) if status_line else 0
+    return status, time.perf_counter() - started
+
+
+async def run(args):
+    url = urlsplit(args.url)
+    host, port = url.hostname, url.port or 80
+    queue = asyncio.Queue()
+    for _ in range(args.requests):
+        queue.put_nowait(None)
+    latencies = []
+    errors = 0
+
+    async def client():
+        nonlocal errors
+        while not queue.empty():
+            queue.get_nowait()
+            try:
+                status, latency = await one_request(host, port, args.path, args.token, args.client_delay_ms / 1000)
+            except OSError:
+                errors += 1
+                continue
+            if status == 200:
+                latencies.append(latency)
+            else:
+                errors += 1
+
+    stop = asyncio.Event()
+    sampler = asyncio.create_task(sample_memory(args.pid, stop)) if args.pid else None
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(args.concurrency)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    peak_kb = await sampler if sampler else None
+
+    print(f'{args.path}: {args.requests} requests, concurrency {args.concurrency}, client delay {args.client_delay_ms} ms')
+    print(f'ok {len(latencies)}  errors {errors}  in {elapsed:.2f} s  ->  {len(latencies) / elapsed:.1f} req/s')
+    if latencies:
+        latencies.sort()
+        pick = lambda q: latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000
+        print(f'latency ms: mean {statistics.mean(latencies) * 1000:.1f}  p50 {pick(0.5):.1f}  '
+              f'p95 {pick(0.95):.1f}  p99 {pick(0.99):.1f}')
+    if peak_kb is not None:
+        print(f'server peak RSS: {peak_kb / 1024:.1f} MB')
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--url', default='http://127.0.0.1:8000')
+    parser.add_argument('--path', default='/api/async/cars/search/')
+    parser.add_argument('--token', default=None, help='JWT access token for authenticated endpoints.')
+    parser.add_argument('--concurrency', type=int, default=100)
+    parser.add_argument('--requests', type=int, default=1000)
+    parser.add_argument('--client-delay-ms', type=int, default=200)
+    parser.add_argument('--pid', type=int, default=None, help='Server master pid to sample RSS.')
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,200 @@
+"""
+سيناريو الاستخدام الكامل (stdlib بس) على سيرفر شغال، وكل خطوة بتتقاس لوحدها:
+    register -> login -> browse cars -> book -> quote -> confirm -> sign -> start trip
+    -> stop arrival/end waiting لكل محطة -> telemetry -> end trip -> payout
+
+كل virtual user بيعمل السيناريو كله --iterations مرة بحساب جديد.
+محتاج عربيات متوافق عليها في القاعدة (python -m benchmarks.seed).
+مع أكتر من user بالتوازي استخدم MySQL، لأن SQLite بيرجع "database is locked" مع الكتابة المتوازية.
+
+التشغيل من فولدر cark_backend:
+    python -m benchmarks.scenario --base-url http://127.0.0.1:8000 --users 20 --iterations 5 --output reports/scenario.json
+
+التقرير JSON بنفس الشكل لكل إصدار، والمقارنة بـ python -m benchmarks.compare old.json new.json
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import threading
+import time
+import uuid
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+from .seed import SEED_PASSWORD
+
+
+class ScenarioError(Exception):
+    pass
+
+
+class Recorder:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.timings = defaultdict(list)
+        self.errors = defaultdict(int)
+
+    def add(self, step, seconds, ok):
+        with self._lock:
+            if ok:
+                self.timings[step].append(seconds)
+            else:
+                self.errors[step] += 1
+
+    def summary(self):
+        steps = {}
+        for step in sorted(set(self.timings) | set(self.errors)):
+            values = sorted(self.timings.get(step, ()))
+            stats = {'count': len(values), 'errors': self.errors.get(step, 0)}
+            if values:
+                stats.update({
+                    'mean': statistics.fmean(values),
+                    'median': statistics.median(values),
+                    'p95': values[min(len(values) - 1, int(len(values) * 0.95))],
+                    'max': values[-1],
+                })
+            steps[step] = stats
+        return steps
+
+
+class Client:
+    def __init__(self, base_url, recorder, timeout):
+        self.base_url = base_url.rstrip('/')
+        self.recorder = recorder
+        self.timeout = timeout
+        self.token = None
+
+    def call(self, step, method, path, data=None, expect=(200, 201)):
+        headers = {'Content-Type': 'application/json'}
+        if self.token:
+            headers['Authorization'] = f'Bearer {self.token}'
+        body = json.dumps(data).encode() if data is not None else None
+        request = Request(self.base_url + path, data=body, method=method, headers=headers)
+        started = time.perf_counter()
+        try:
+            with urlopen(request, timeout=self.timeout) as response:
+                status, payload = response.status, response.read()
+        except HTTPError as e:
+            status, payload = e.code, e.read()
+        elapsed = time.perf_counter() - started
+        ok = status in expect
+        self.recorder.add(step, elapsed, ok)
+        if not ok:
+            raise ScenarioError(f'{step}: {method} {path} -> {status} {payload[:200]!r}')
+        return json.loads(payload) if payload else None
+
+
+def run_flow(client, rnd):
+    tag = uuid.uuid4().int % 10 ** 9
+    email = f'load{tag}@bench.cark'
+    client.call('register', 'POST', '/api/register/', {
+        'email': email, 'phone_number': f'015{tag:09d}', 'first_name': 'Load', 'last_name': 'Test',
+        'national_id': f'{28000000000000 + tag:014d}', 'password': SEED_PASSWORD,
+    })
+    client.token = client.call('login', 'POST', '/api/login/', {'email': email, 'password': SEED_PASSWORD})['access']
+
+    client.call('browse_cars', 'GET', '/api/cars/')
+    found = client.call('search_cars', 'GET', '/api/async/cars/search/?with_driver=true')
+    if not found['results']:
+        raise ScenarioError('search_cars: no approved cars, seed the database first.')
+    car = rnd.choice(found['results'])
+
+    start = date.today() + timedelta(days=rnd.randint(1, 30))
+    pickup = (30.0444, 31.2357)
+    dropoff = (30.0500, 31.2400)
+    stops = [
+        {'stop_order': order, 'latitude': f'{30.046 + order / 1000:.6f}', 'longitude': '31.237000',
+         'approx_waiting_time_minutes': 10}
+        for order in range(1, rnd.randint(1, 3) + 1)
+    ]
+    rental = client.call('book', 'POST', '/api/rentals/', {
+        'car': car['id'], 'start_date': start.isoformat(), 'end_date': (start + timedelta(days=2)).isoformat(),
+        'rental_type': 'WithDriver', 'payment_method': 'cash',
+        'pickup_lat': f'{pickup[0]:.6f}', 'pickup_lng': f'{pickup[1]:.6f}',
+        'dropoff_lat': f'{dropoff[0]:.6f}', 'dropoff_lng': f'{dropoff[1]:.6f}',
+        'stops': stops,
+    })
+    base = f'/api/rentals/{rental["id"]}'
+    client.call('quote', 'POST', f'{base}/calculate_costs/', {'total_waiting_minutes': 20})
+    client.call('confirm', 'POST', f'{base}/confirm_booking/', {'contract_type': 'electronic'})
+    client.call('sign_contract', 'POST', f'{base}/sign_contract/', {})
+    client.call('start_trip', 'POST', f'{base}/start_trip/', {'latitude': pickup[0], 'longitude': pickup[1]})
+
+    detail = client.call('rental_detail', 'GET', f'{base}/')
+    for stop in (detail.get('planned_trip') or {}).get('stops', []):
+        location = {'stop_id': stop['id'], 'latitude': float(stop['latitude']), 'longitude': float(stop['longitude'])}
+        client.call('stop_arrival', 'POST', f'{base}/stop_arrival/', location)
+        client.call('end_waiting', 'POST', f'{base}/end_waiting/', {'stop_id': stop['id'], 'actual_waiting_minutes': 12})
+
+    now = int(time.time())
+    points = [[pickup[0] + i * 0.0005, pickup[1] + i * 0.0004, now + i * 30] for i in range(20)]
+    client.call('telemetry', 'POST', f'{base}/telemetry/', {'points': points})
+    client.call('end_trip', 'POST', f'{base}/end_trip/', {'latitude': dropoff[0], 'longitude': dropoff[1]})
+    client.call('payout', 'POST', f'{base}/payout/', {})
+
+
+def virtual_user(base_url, recorder, iterations, timeout, seed):
+    rnd = random.Random(seed)
+    failures = []
+    for _ in range(iterations):
+        try:
+            run_flow(Client(base_url, recorder, timeout), rnd)
+        except (ScenarioError, OSError) as e:
+            failures.append(str(e))
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--base-url', default='http://127.0.0.1:8000')
+    parser.add_argument('--users', type=int, default=10, help='virtual users in parallel')
+    parser.add_argument('--iterations', type=int, default=3, help='flows per virtual user')
+    parser.add_argument('--timeout', type=float, default=30)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help='write the JSON report here')
+    args = parser.parse_args()
+
+    recorder = Recorder()
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.users) as pool:
+        futures = [
+            pool.submit(virtual_user, args.base_url, recorder, args.iterations, args.timeout, args.seed + n)
+            for n in range(args.users)
+        ]
+        failures = [failure for future in futures for failure in future.result()]
+    elapsed = time.perf_counter() - started
+
+    steps = recorder.summary()
+    flows = args.users * args.iterations
+    print(f'{flows - len(failures)}/{flows} flows completed in {elapsed:.1f}s')
+    print(f'{"step":<16}{"count":>7}{"errors":>8}{"median ms":>11}{"p95 ms":>9}{"max ms":>9}')
+    for step, stats in steps.items():
+        if stats['count']:
+            print(f'{step:<16}{stats["count"]:>7}{stats["errors"]:>8}'
+                  f'{stats["median"] * 1000:>11.1f}{stats["p95"] * 1000:>9.1f}{stats["max"] * 1000:>9.1f}')
+        else:
+            print(f'{step:<16}{0:>7}{stats["errors"]:>8}')
+    for failure in failures[:5]:
+        print('  failed:', failure)
+
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or '.', exist_ok=True)
+        with open(args.output, 'w') as f:
+            json.dump({
+                'kind': 'scenario',
+                'base_url': args.base_url,
+                'users': args.users,
+                'iterations': args.iterations,
+                'elapsed': elapsed,
+                'failed_flows': len(failures),
+                'steps': steps,
+            }, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,46 @@
+"""
+بيانات تجريبية صغيرة للـ benchmarks والـ load test بنفس توزيعات manage.py seed_cark (core.seeding).
+كل المستخدمين الباسورد بتاعهم SEED_PASSWORD.
+
+التشغيل من فولدر cark_backend (على قاعدة بيانات فاضية أو فيها بيانات):
+    DB_ENGINE=sqlite3 DB_NAME=/tmp/bench.sqlite3 python -m benchmarks.seed --users 2000 --cars 1000 --rentals 5000
+
+للأحجام الكبيرة: python manage.py seed_cark --users 1e5 --cars 2e5 --rentals 1e6
+"""
+import argparse
+import os
+import time
+
+from core.seeding import SEED_PASSWORD, Seeder
+
+
+def seed(users, cars, rentals, documents=0, random_seed=42):
+    """
+    إضافة البيانات للـ database الحالية. الـ ids بتبدأ بعد أكبر id موجود
+    فممكن تتنادى أكتر من مرة على نفس القاعدة.
+    return: dict بعدد الصفوف لكل model
+    """
+    return Seeder(random_seed=random_seed).run(users, cars, rentals, documents)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--cars', type=int, default=500)
+    parser.add_argument('--rentals', type=int, default=2000)
+    parser.add_argument('--documents', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'cark_backend.settings')
+    import django
+    django.setup()
+
+    started = time.perf_counter()
+    counts = seed(args.users, args.cars, args.rentals, args.documents, random_seed=args.seed)
+    elapsed = time.perf_counter() - started
+    print(', '.join(f'{name}={count}' for name, count in counts.items()), f'in {elapsed:.1f}s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,46 @@
+import pytest
+
+pytest.importorskip('pytest_benchmark')
+
+from rest_framework.renderers import JSONRenderer
+
+from core import compression
+from core.renderers import ORJSONRenderer
+from rentals.models import Rental
+from rentals.serializers import RentalListSerializer, RentalSerializer
+
+PAGE = 1000
+
+
+@pytest.fixture(scope='module')
+def rental_pages(seeded):
+    # الـ serialization برا الـ benchmark، المقاس هنا الـ render والضغط بس
+    rentals = list(Rental.objects.order_by('id').select_related(
+        'renter', 'car__rental_options', 'car__usage_policy', 'planned_trip',
+        'usage_info', 'payment_info', 'breakdown',
+    ).prefetch_related('planned_trip__stops')[:PAGE])
+    assert len(rentals) == PAGE
+    return {
+        'detail': RentalSerializer(rentals, many=True).data,
+        'list': RentalListSerializer(rentals, many=True).data,
+    }
+
+
+@pytest.mark.parametrize('page', ['detail', 'list'])
+@pytest.mark.parametrize('renderer_class', [JSONRenderer, ORJSONRenderer], ids=['drf', 'orjson'])
+def test_render_rentals(benchmark, rental_pages, renderer_class, page):
+    if renderer_class is ORJSONRenderer:
+        pytest.importorskip('orjson')
+    content = benchmark(renderer_class().render, rental_pages[page])
+    benchmark.extra_info['bytes'] = len(content)
+
+
+@pytest.mark.parametrize('page', ['detail', 'list'])
+@pytest.mark.parametrize('encoding', ['gzip', 'br'])
+def test_compress_rentals(benchmark, rental_pages, encoding, page):
+    if encoding == 'br':
+        pytest.importorskip('brotli')
+    content = JSONRenderer().render(rental_pages[page])
+    compressed = benchmark(compression.compress, content, encoding)
+    benchmark.extra_info['bytes'] = len(content)
+    benchmark.extra_info['compressed_bytes'] = len(compressed)
@@ -0,0 +1,32 @@
+import pytest
+
+pytest.importorskip('pytest_benchmark')
+
+from cars.models import Car
+from cars.serializers import CarSerializer
+from documents.models import Document
+from documents.serializers import DocumentSerializer
+from rentals.models import Rental
+from rentals.serializers import RentalSerializer
+
+PAGE = 50
+
+
+def _serialize(serializer_class, queryset):
+    # الـ queryset بيتنفذ جوه الـ benchmark عشان الاستعلامات (N+1) تتحسب
+    return serializer_class(queryset.all()[:PAGE], many=True).data
+
+
+def test_rental_list(benchmark, seeded):
+    data = benchmark(_serialize, RentalSerializer, Rental.objects.order_by('-id'))
+    assert len(data) == PAGE
+
+
+def test_car_list(benchmark, seeded):
+    data = benchmark(_serialize, CarSerializer, Car.objects.order_by('-id'))
+    assert len(data) == PAGE
+
+
+def test_document_list(benchmark, seeded):
+    data = benchmark(_serialize, DocumentSerializer, Document.objects.order_by('-id'))
+    assert len(data) == PAGE
@@ -0,0 +1,68 @@
+from datetime import date, timedelta
+from decimal import Decimal
+
+import pytest
+
+pytest.importorskip('pytest_benchmark')
+
+from cars import pricing
+from core.conditional import touch
+from cars.models import Car, CarPriceRule
+from rentals.billing import create_rental_breakdown
+from rentals.models import Rental
+from rentals.services import calculate_rental_financials
+
+
+def test_calculate_rental_financials(benchmark):
+    result = benchmark(
+        calculate_rental_financials,
+        rental_days=3, planned_km=420, daily_km_limit=100, extra_km_rate=2.5,
+        total_waiting_minutes=45, waiting_hour_rate=60, daily_price=500, payment_method='visa',
+    )
+    assert result['extra_km'] == 120
+
+
+def test_create_rental_breakdown(benchmark, seeded):
+    rental = Rental.objects.select_related('car__rental_options', 'car__usage_policy').order_by('id').first()
+    benchmark(create_rental_breakdown, rental, 250, 30)
+    assert rental.breakdown.planned_km == 250
+
+
+@pytest.fixture(scope='module')
+def priced_car(seeded):
+    car = Car.objects.select_related('rental_options').order_by('id').first()
+    today = date.today()
+    CarPriceRule.objects.bulk_create([
+        CarPriceRule(car=car, weekdays='4,5', multiplier=Decimal('1.2')),
+        CarPriceRule(car=car, start_date=today + timedelta(days=20), end_date=today + timedelta(days=35),
+                     multiplier=Decimal('1.5'), priority=1),
+        CarPriceRule(car=car, start_date=today + timedelta(days=50), end_date=today + timedelta(days=52),
+                     price=Decimal('900'), priority=2),
+    ])
+    touch(Car, pk=car.pk)  # bulk_create مابيبعتش signals، والتقويم ممكن يكون متخزن من benchmark تاني
+    car.refresh_from_db()
+    return car
+
+
+def test_quote_90_days(benchmark, priced_car):
+    start = date.today() + timedelta(days=7)
+    pricing.quote(priced_car, 'WithDriver', start, start)  # تجهيز التقويم برا القياس
+    result = benchmark(pricing.quote, priced_car, 'WithDriver', start, start + timedelta(days=89))
+    assert result['rental_days'] == 90
+
+
+def test_quote_90_days_per_day_rules(benchmark, priced_car):
+    # نفس التمن بتقييم القواعد يوم بيوم (الطريقة من غير التقويم المتجهز) للمقارنة
+    start = date.today() + timedelta(days=7)
+    rules = pricing._compile_rules(priced_car.price_rules.all())
+    base, _ = pricing.base_daily_price(priced_car.rental_options, 'WithDriver', 90)
+
+    def per_day():
+        total = 0.0
+        for n in range(90):
+            factor, fixed = pricing._day(rules, start + timedelta(days=n))
+            total += base * factor + fixed
+        return total
+
+    total = benchmark(per_day)
+    assert total == pytest.approx(pricing.quote(priced_car, 'WithDriver', start, start + timedelta(days=89))['total'])
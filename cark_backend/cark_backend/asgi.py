@@ -11,6 +11,11 @@ import os
 
 from django.core.asgi import get_asgi_application
 
+from .database import use_asgi_defaults
+
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'cark_backend.settings')
+# الاتصالات الدائمة (CONN_MAX_AGE) مش آمنة تحت ASGI: كل اتصال بيفضل مع thread
+# من الـ executor ومحدش بيقفله. إعادة الاستخدام هنا بتبقى عن طريق الـ pool (DB_POOL_SIZE)
+use_asgi_defaults()
 
 application = get_asgi_application()
@@ -0,0 +1,109 @@
+"""
+إعدادات قاعدة البيانات من متغيرات البيئة (بتتقري في settings.py).
+
+    DB_ENGINE              mysql (default) أو sqlite3 أو أي ENGINE كامل
+    DB_NAME, DB_USER, DB_PASSWORD, DB_HOST, DB_PORT
+    DB_CONN_MAX_AGE        عمر الاتصال الدائم بالثواني (default 60، و 0 = اتصال جديد لكل طلب).
+                           تحت ASGI (cark_backend.asgi) الـ default بيبقى 0، لأن الاتصال الدائم
+                           مربوط بالـ thread وكل request sync بيتنفذ في thread مختلف
+    DB_CONN_HEALTH_CHECKS  فحص الاتصال الدائم قبل استخدامه في أول طلب (default true)
+    DB_POOL_SIZE           لو أكبر من 0: pool جوه الـ process بدل الاتصالات الدائمة.
+                           تحت ASGI الـ default بيبقى ASGI_POOL_SIZE للـ engines اللي ليها pool
+                           (MySQL و SQLite)، فكل طلب مابيفتحش اتصال جديد. DB_POOL_SIZE=0 بيقفله
+    DB_POOL_TIMEOUT        أقصى مدة (ثواني) يفضل فيها اتصال فاضي في الـ pool (default 300)
+    DB_REPLICAS            replicas للقراءة مفصولة بفاصلة: host أو host:port لـ MySQL،
+                           أو مسارات ملفات لـ SQLite. بتبقى aliases باسم replica1, replica2, ...
+
+من غير أي متغيرات الإعدادات هي نفس إعدادات MySQL المحلية القديمة + اتصالات دائمة.
+"""
+import os
+
+ENGINES = {
+    'mysql': 'django.db.backends.mysql',
+    'sqlite3': 'django.db.backends.sqlite3',
+    'postgresql': 'django.db.backends.postgresql',
+}
+
+# نسخ الـ backends اللي بتاخد الاتصال من pool بدل ما تفتح واحد جديد
+POOLED_ENGINES = {
+    'django.db.backends.mysql': 'core.db_backends.mysql',
+    'django.db.backends.sqlite3': 'core.db_backends.sqlite3',
+}
+
+
+# عدد الاتصالات الفاضية اللي كل ASGI worker بيحتفظ بيها لو DB_POOL_SIZE مش متحدد
+ASGI_POOL_SIZE = 10
+
+
+def _bool(value):
+    return str(value).strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+def database_config(env=None, base_dir=None):
+    env = os.environ if env is None else env
+    engine = env.get('DB_ENGINE', 'mysql')
+    engine = ENGINES.get(engine, engine)
+
+    if engine == ENGINES['sqlite3']:
+        default_name = str(base_dir / 'db.sqlite3') if base_dir else 'db.sqlite3'
+        config = {'ENGINE': engine, 'NAME': env.get('DB_NAME', default_name)}
+    else:
+        config = {
+            'ENGINE': engine,
+            'NAME': env.get('DB_NAME', 'cark'),
+            'USER': env.get('DB_USER', 'root'),
+            'PASSWORD': env.get('DB_PASSWORD', ''),
+            'HOST': env.get('DB_HOST', 'localhost'),
+            'PORT': env.get('DB_PORT', '3306'),
+        }
+
+    config['CONN_MAX_AGE'] = int(env.get('DB_CONN_MAX_AGE', 60))
+    config['CONN_HEALTH_CHECKS'] = _bool(env.get('DB_CONN_HEALTH_CHECKS', 'true'))
+
+    pool_size = int(env.get('DB_POOL_SIZE', 0))
+    if pool_size > 0:
+        if engine not in POOLED_ENGINES:
+            raise ValueError(f'DB_POOL_SIZE is not supported for {engine}.')
+        config['ENGINE'] = POOLED_ENGINES[engine]
+        # الاتصال بيرجع للـ pool آخر كل طلب بدل ما يفضل مع الـ thread
+        config['CONN_MAX_AGE'] = 0
+        config['OPTIONS'] = {
+            'pool_size': pool_size,
+            'pool_timeout': int(env.get('DB_POOL_TIMEOUT', 300)),
+        }
+    return config
+
+
+def use_asgi_defaults(env=None):
+    """
+    الـ defaults بتاعة التشغيل تحت ASGI (بتتنادى من cark_backend.asgi قبل قراية الـ settings):
+    من غير اتصالات دائمة، وإعادة الاستخدام عن طريق الـ pool لو الـ engine بيدعمه.
+    أي قيمة متحددة في البيئة بتفضل زي ما هي.
+    """
+    env = os.environ if env is None else env
+    env.setdefault('DB_CONN_MAX_AGE', '0')
+    engine = env.get('DB_ENGINE', 'mysql')
+    if ENGINES.get(engine, engine) in POOLED_ENGINES:
+        env.setdefault('DB_POOL_SIZE', str(ASGI_POOL_SIZE))
+
+
+def replica_configs(primary, env=None):
+    """
+    إعدادات الـ replicas: نسخة من إعدادات الـ primary بـ host (أو ملف) مختلف.
+    في التستات كل replica بتبقى mirror للـ default.
+    """
+    env = os.environ if env is None else env
+    targets = [target.strip() for target in env.get('DB_REPLICAS', '').split(',') if target.strip()]
+    replicas = {}
+    for index, target in enumerate(targets, start=1):
+        config = dict(primary, OPTIONS=dict(primary.get('OPTIONS', {})))
+        if primary['ENGINE'].endswith('sqlite3'):
+            config['NAME'] = target
+        else:
+            host, _, port = target.partition(':')
+            config['HOST'] = host
+            if port:
+                config['PORT'] = port
+        config['TEST'] = {'MIRROR': 'default'}
+        replicas[f'replica{index}'] = config
+    return replicas
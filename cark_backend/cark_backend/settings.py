@@ -14,6 +14,8 @@ from pathlib import Path
 from datetime import timedelta
 import os
 
+from .database import database_config, replica_configs
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 STATIC_ROOT = BASE_DIR / 'staticfiles'
@@ -70,10 +72,18 @@ INSTALLED_APPS = [
     'cars',
     'documents.apps.DocumentsConfig',
     'rentals',
+    'wallets',
+    'core',
 ]
 
 
 MIDDLEWARE = [
+    # زمن الطلبات لكل route على /metrics
+    'core.middleware.MetricsMiddleware',
+    # عدد الاستعلامات ووقتها في Server-Timing وتسجيل الطلبات البطيئة و N+1
+    'core.middleware.QueryInstrumentationMiddleware',
+    # ضغط الـ responses الكبيرة بـ brotli/gzip
+    'core.middleware.CompressionMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -81,6 +91,10 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    # قراءة طلبات GET من الـ replicas مع الرجوع للـ primary بعد أي كتابة
+    'core.middleware.ReplicaRoutingMiddleware',
+    # إعادة الـ response المحفوظ للطلبات المكررة بنفس الـ Idempotency-Key
+    'core.middleware.IdempotencyKeyMiddleware',
 ]
 
 ROOT_URLCONF = 'cark_backend.urls'
@@ -106,16 +120,32 @@ WSGI_APPLICATION = 'cark_backend.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# الإعدادات بتتقري من متغيرات البيئة (DB_ENGINE, DB_NAME, DB_CONN_MAX_AGE, DB_POOL_SIZE, ...)
+# شوف cark_backend/database.py
 DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.mysql',
-        'NAME': 'cark',
-        'USER': 'root',
-        'PASSWORD': '',
-        'HOST': 'localhost',
-        'PORT': '3306',
-    }
+    'default': database_config(base_dir=BASE_DIR),
 }
+# replicas للقراءة (DB_REPLICAS) وطلبات GET بتروحلها عن طريق الـ router
+DATABASES.update(replica_configs(DATABASES['default']))
+DATABASE_ROUTERS = ['core.routers.ReplicaRouter']
+
+
+# الـ background tasks (core.taskqueue) بتتنفذ في نفس الـ process بعد الـ commit من غير runworker.
+# الـ default هو DEBUG عشان runserver لوحده يحسب الـ breakdowns ومراجعة المستندات؛
+# الـ Procfile بيقفله للـ web لأن الـ worker هو اللي بينفذ هناك
+TASKS_EAGER = os.environ.get('TASKS_EAGER', str(DEBUG)).strip().lower() in ('1', 'true', 'yes', 'on')
+
+# قياس الاستعلامات لكل طلب (core.instrumentation): header "Server-Timing" وتسجيل الطلبات البطيئة و N+1.
+# الـ default هو DEBUG عشان الـ production مايدفعش التكلفة ولا يكشف التوقيتات
+QUERY_INSTRUMENTATION = os.environ.get('QUERY_INSTRUMENTATION', str(DEBUG)).strip().lower() in ('1', 'true', 'yes', 'on')
+
+# /metrics: مجلد الـ snapshots المشترك بين الـ workers (لازم مع أكتر من worker، شوف core/metrics.py)
+# والتوكن بتاع الـ scraper. METRICS_ALLOWED_NETWORKS شبكات داخلية مفصولة بـ "," تقرا من غير توكن
+METRICS_DIR = os.environ.get('METRICS_DIR') or None
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN') or None
+METRICS_ALLOWED_NETWORKS = [
+    network.strip() for network in os.environ.get('METRICS_ALLOWED_NETWORKS', '').split(',') if network.strip()
+]
 
 
 # Password validation
@@ -165,6 +195,16 @@ REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
         'rest_framework_simplejwt.authentication.JWTAuthentication',
     ),
+    # orjson لو متسطب، وإلا نفس JSONRenderer/JSONParser بتوع DRF
+    'DEFAULT_RENDERER_CLASSES': (
+        'core.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        'core.parsers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ),
 }
 
 #STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
@@ -10,6 +10,8 @@ urlpatterns = [
     path('api/', include('cars.urls')),  # إضافة رابط الـ API للسيارات
     path('api/', include('documents.urls')),  # إضافة رابط الـ API للمستندات
     path('api/', include('rentals.urls')),  # إضافة رابط الـ API للايجارات
+    path('api/', include('wallets.urls')),  # إضافة رابط الـ API للمحفظة
+    path('', include('core.urls')),  # /metrics
     
 ]
 
@@ -0,0 +1,55 @@
+"""
+نسخ async من endpoints القراءة التقيلة. محتاجة السيرفر يشتغل ASGI (uvicorn) عشان
+العميل البطيء مايحجزش worker كامل طول الطلب.
+"""
+from django.http import JsonResponse
+
+from core.renderers import json_response
+from .models import Car
+from .serializers import CarSearchSerializer
+
+SEARCH_MAX_LIMIT = 100
+SEARCH_FILTERS = ('brand', 'model', 'car_type', 'car_category', 'transmission_type', 'fuel_type')
+
+
+async def car_search(request):
+    """
+    GET /api/async/cars/search/?brand=&car_type=&car_category=&transmission_type=&fuel_type=
+        &min_seats=&with_driver=true|false&max_daily_price=&limit=20&after=<id>
+    العربيات المتاحة والموافق عليها بس، مترتبة بالـ id (keyset pagination بـ after).
+    """
+    if request.method != 'GET':
+        return JsonResponse({'error': 'Method not allowed.'}, status=405)
+    params = request.GET
+    try:
+        limit = max(1, min(int(params.get('limit', 20)), SEARCH_MAX_LIMIT))
+        after = int(params.get('after', 0))
+        min_seats = int(params['min_seats']) if params.get('min_seats') else None
+        max_daily_price = float(params['max_daily_price']) if params.get('max_daily_price') else None
+    except ValueError:
+        return JsonResponse({'error': 'Invalid numeric filter.'}, status=400)
+
+    cars = Car.objects.filter(approval_status=True, availability=True, id__gt=after).select_related(
+        'rental_options', 'usage_policy',
+    )
+    for field in SEARCH_FILTERS:
+        if params.get(field):
+            cars = cars.filter(**{f'{field}__iexact': params[field]})
+    if min_seats is not None:
+        cars = cars.filter(seating_capacity__gte=min_seats)
+
+    with_driver = params.get('with_driver')
+    if with_driver in ('true', 'false'):
+        with_driver = with_driver == 'true'
+        price_field = 'daily_rental_price_with_driver' if with_driver else 'daily_rental_price'
+        cars = cars.filter(**{f'rental_options__available_{"with" if with_driver else "without"}_driver': True})
+        if max_daily_price is not None:
+            cars = cars.filter(**{f'rental_options__{price_field}__lte': max_daily_price})
+    elif max_daily_price is not None:
+        return JsonResponse({'error': 'max_daily_price requires with_driver=true or false.'}, status=400)
+
+    results = [car async for car in cars.order_by('id')[:limit]]
+    return json_response({
+        'results': CarSearchSerializer(results, many=True).data,
+        'next_after': results[-1].id if len(results) == limit else None,
+    })
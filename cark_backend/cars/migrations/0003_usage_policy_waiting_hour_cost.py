@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 06:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cars', '0002_car_price_rules'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='carusagepolicy',
+            name='waiting_hour_cost',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=5, null=True),
+        ),
+    ]
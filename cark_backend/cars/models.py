@@ -103,12 +103,55 @@ class CarRentalOptions(models.Model):
     monthly_price_with_driver = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
     yearly_price_with_driver = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
 
+class CarPriceRule(models.Model):
+    """
+    قاعدة في تقويم أسعار العربية (cars.pricing):
+    - بفترة بس (start_date/end_date): موسم أو أعياد
+    - بـ weekdays (0=الاتنين ... 6=الحد، مثلاً "4,5" للجمعة والسبت)، وممكن تتحدد بفترة كمان
+    price سعر يوم ثابت بدل السعر الأساسي، و multiplier بيضرب في السعر (1.25 = +25%).
+    لو أكتر من قاعدة على نفس اليوم بتتطبق بالترتيب (priority ثم id) فالأعلى priority بتكسب.
+    """
+    BOTH = 'Both'
+    WITH_DRIVER = 'WithDriver'
+    WITHOUT_DRIVER = 'WithoutDriver'
+    RENTAL_TYPE_CHOICES = [
+        (BOTH, 'Both'),
+        (WITH_DRIVER, 'With Driver'),
+        (WITHOUT_DRIVER, 'Without Driver'),
+    ]
+
+    car = models.ForeignKey(Car, on_delete=models.CASCADE, related_name='price_rules')
+    name = models.CharField(max_length=100, blank=True)
+    rental_type = models.CharField(max_length=20, choices=RENTAL_TYPE_CHOICES, default=BOTH)
+    start_date = models.DateField(null=True, blank=True)
+    end_date = models.DateField(null=True, blank=True)
+    weekdays = models.CharField(max_length=13, blank=True)
+    price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    multiplier = models.DecimalField(max_digits=5, decimal_places=3, null=True, blank=True)
+    priority = models.IntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['priority', 'id']
+
+    def weekday_set(self):
+        return {int(day) for day in self.weekdays.split(',') if day.strip()}
+
+    def __str__(self):
+        return f"{self.name or 'Price rule'} for {self.car}"
+
 class CarUsagePolicy(models.Model):
     car = models.OneToOneField(Car, on_delete=models.CASCADE, related_name='usage_policy')
     daily_km_limit = models.DecimalField(max_digits=5, decimal_places=2)
     extra_km_cost = models.DecimalField(max_digits=5, decimal_places=2)
     daily_hour_limit = models.IntegerField(null=True, blank=True)
     extra_hour_cost = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True)
+    # سعر ساعة الانتظار في المحطات (لو فاضي بيتحسب بسعر الساعة الإضافية)
+    waiting_hour_cost = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True)
+
+    def waiting_rate(self):
+        return self.waiting_hour_cost if self.waiting_hour_cost is not None else (self.extra_hour_cost or 0)
 
 class CarStats(models.Model):
     car = models.OneToOneField(Car, on_delete=models.CASCADE, related_name='stats')
@@ -0,0 +1,163 @@
+"""
+تقويم أسعار العربية: السعر الأساسي من CarRentalOptions حسب مدة الإيجار
+(يومي، أو الشهري / 30 من 30 يوم، أو السنوي / 365 من 365 يوم) والقواعد (CarPriceRule) فوقه.
+
+قواعد كل عربية بتتحول مرة واحدة لـ arrays من prefix sums لكل يوم في الفترة
+[النهارده - PRICING_PAST_DAYS, النهارده + PRICING_HORIZON_DAYS]:
+- factors: مجموع المضاعف في الأيام اللي سعرها = السعر الأساسي × مضاعف
+- fixed: مجموع الأسعار الثابتة في الأيام اللي عليها قاعدة price
+فتمن أي فترة = base × (F[j] - F[i]) + (A[j] - A[i]) بغض النظر عن طولها أو الـ tier.
+الأيام برا الفترة (نادرة) بتتحسب يوم بيوم بنفس القواعد.
+
+الـ arrays متخزنة في ذاكرة الـ process بمفتاح car.updated_at، وأي تعديل في القواعد أو
+الأسعار بيعمل touch للعربية (cars.signals) فالنسخة القديمة مابتستخدمش تاني.
+"""
+import threading
+from array import array
+from collections import OrderedDict
+from datetime import timedelta
+from itertools import accumulate
+
+from django.conf import settings
+from django.utils import timezone
+
+from core.metrics import CACHE_LOOKUPS
+from .models import CarPriceRule
+
+PAST_DAYS = getattr(settings, 'PRICING_PAST_DAYS', 60)
+HORIZON_DAYS = getattr(settings, 'PRICING_HORIZON_DAYS', 400)
+# عدد التقويمات في ذاكرة كل process (العربيات اللي مالهاش قواعد مابتاخدش مساحة)
+CACHE_SIZE = getattr(settings, 'PRICING_CACHE_SIZE', 2000)
+
+MONTHLY_DAYS = 30
+YEARLY_DAYS = 365
+
+# أسماء أعمدة الأسعار في CarRentalOptions لكل نوع إيجار: (يومي، شهري، سنوي)
+PRICE_FIELDS = {
+    'WithDriver': ('daily_rental_price_with_driver', 'monthly_price_with_driver', 'yearly_price_with_driver'),
+    'WithoutDriver': ('daily_rental_price', 'monthly_rental_price', 'yearly_rental_price'),
+}
+
+_cache = OrderedDict()
+_lock = threading.Lock()
+
+
+def base_daily_price(options, rental_type, rental_days):
+    """
+    return: (السعر الأساسي لليوم، اسم الـ tier)
+    """
+    daily_field, monthly_field, yearly_field = PRICE_FIELDS[rental_type]
+    yearly = getattr(options, yearly_field)
+    if rental_days >= YEARLY_DAYS and yearly:
+        return float(yearly) / YEARLY_DAYS, 'yearly'
+    monthly = getattr(options, monthly_field)
+    if rental_days >= MONTHLY_DAYS and monthly:
+        return float(monthly) / MONTHLY_DAYS, 'monthly'
+    return float(getattr(options, daily_field) or 0), 'daily'
+
+
+def _compile_rules(rules):
+    """
+    القواعد بشكل سهل التقييم: (start, end, weekdays, price, multiplier) بالترتيب.
+    """
+    return [
+        (
+            rule.start_date,
+            rule.end_date,
+            frozenset(rule.weekday_set()),
+            float(rule.price) if rule.price is not None else None,
+            float(rule.multiplier) if rule.multiplier is not None else None,
+        )
+        for rule in rules
+    ]
+
+
+def _day(rules, day):
+    """
+    return: (factor, fixed) لليوم ده. سعره = base × factor + fixed (واحد منهم بس مش صفر).
+    """
+    factor, fixed = 1.0, None
+    weekday = day.weekday()
+    for start, end, weekdays, price, multiplier in rules:
+        if (start and day < start) or (end and day > end) or (weekdays and weekday not in weekdays):
+            continue
+        if price is not None:
+            factor, fixed = 0.0, price
+        if multiplier is not None:
+            if fixed is None:
+                factor *= multiplier
+            else:
+                fixed *= multiplier
+    return factor, fixed or 0.0
+
+
+class PriceCalendar:
+    __slots__ = ('origin', 'rules', 'factors', 'fixed')
+
+    def __init__(self, rules, origin, days):
+        self.origin = origin
+        self.rules = rules
+        values = [_day(rules, origin + timedelta(days=n)) for n in range(days)]
+        self.factors = array('d', accumulate((factor for factor, _ in values), initial=0.0))
+        self.fixed = array('d', accumulate((fixed for _, fixed in values), initial=0.0))
+
+    def total(self, start_date, end_date, base):
+        """
+        تمن الأيام من start_date لـ end_date (شاملة الاتنين) بسعر أساسي base.
+        """
+        last = len(self.factors) - 1
+        i = (start_date - self.origin).days
+        j = (end_date - self.origin).days + 1
+        lo, hi = min(max(i, 0), last), min(max(j, 0), last)
+        total = base * (self.factors[hi] - self.factors[lo]) + (self.fixed[hi] - self.fixed[lo])
+        # الأيام اللي قبل أو بعد الفترة المتجهزة
+        for n in list(range(i, min(j, 0))) + list(range(max(i, last), j)):
+            factor, fixed = _day(self.rules, self.origin + timedelta(days=n))
+            total += base * factor + fixed
+        return total
+
+
+def get_calendar(car, rental_type):
+    """
+    التقويم المتجهز للعربية ونوع الإيجار، أو None لو مفيش قواعد (السعر = base × الأيام).
+    """
+    origin = timezone.localdate() - timedelta(days=PAST_DAYS)
+    key = (car.pk, rental_type)
+    version = (car.updated_at, origin)
+    with _lock:
+        entry = _cache.get(key)
+        if entry is not None and entry[0] == version:
+            _cache.move_to_end(key)
+    hit = entry is not None and entry[0] == version
+    CACHE_LOOKUPS.inc(cache='price_calendar', result='hit' if hit else 'miss')
+    if hit:
+        return entry[1]
+
+    rules = _compile_rules(
+        CarPriceRule.objects.filter(car_id=car.pk, rental_type__in=(CarPriceRule.BOTH, rental_type))
+        .order_by('priority', 'id')
+    )
+    calendar = PriceCalendar(rules, origin, PAST_DAYS + HORIZON_DAYS) if rules else None
+    with _lock:
+        _cache[key] = (version, calendar)
+        _cache.move_to_end(key)
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    return calendar
+
+
+def quote(car, rental_type, start_date, end_date):
+    """
+    تمن الإيجار الأساسي (من غير الكيلومترات والانتظار) من start_date لـ end_date شاملة.
+    """
+    rental_days = (end_date - start_date).days + 1
+    base, tier = base_daily_price(car.rental_options, rental_type, rental_days)
+    calendar = get_calendar(car, rental_type)
+    total = calendar.total(start_date, end_date, base) if calendar is not None else base * rental_days
+    return {
+        'rental_days': rental_days,
+        'tier': tier,
+        'base_daily_price': base,
+        'total': total,
+        'average_daily_price': total / rental_days if rental_days > 0 else 0.0,
+    }
@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models import Car, CarRentalOptions, CarUsagePolicy, CarStats
+from .models import Car, CarRentalOptions, CarUsagePolicy, CarStats, CarPriceRule
 
 class CarSerializer(serializers.ModelSerializer):
     class Meta:
@@ -38,6 +38,16 @@ class CarSerializer(serializers.ModelSerializer):
 
 
 
+# Serializer مختصر لقايمة العربيات (list)، التفاصيل كاملة في retrieve أو بـ ?fields=
+class CarListSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Car
+        fields = [
+            'id', 'owner', 'brand', 'model', 'year', 'car_type', 'car_category', 'plate_number',
+            'transmission_type', 'fuel_type', 'seating_capacity', 'availability', 'approval_status'
+        ]
+
+
 class CarRentalOptionsSerializer(serializers.ModelSerializer):
     class Meta:
         model = CarRentalOptions
@@ -79,6 +89,11 @@ class CarUsagePolicySerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("Extra hour cost cannot be negative.")
         return value
 
+    def validate_waiting_hour_cost(self, value):
+        if value is not None and value < 0:
+            raise serializers.ValidationError("Waiting hour cost cannot be negative.")
+        return value
+
     def validate_daily_hour_limit(self, value):
         if value is not None and value <= 0:
             raise serializers.ValidationError("Daily hour limit must be greater than 0 if provided.")
@@ -99,3 +114,51 @@ class CarStatsSerializer(serializers.ModelSerializer):
         if value < 0:
             raise serializers.ValidationError("Total earned cannot be negative.")
         return value
+
+
+# Serializer لنتايج البحث عن العربيات (async car search)
+class CarSearchSerializer(serializers.ModelSerializer):
+    rental_options = CarRentalOptionsSerializer(read_only=True)
+    usage_policy = CarUsagePolicySerializer(read_only=True)
+
+    class Meta:
+        model = Car
+        fields = [
+            'id', 'owner', 'brand', 'model', 'car_type', 'car_category', 'year', 'color',
+            'seating_capacity', 'transmission_type', 'fuel_type', 'current_status',
+            'rental_options', 'usage_policy',
+        ]
+
+
+class CarPriceRuleSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = CarPriceRule
+        fields = [
+            'id', 'car', 'name', 'rental_type', 'start_date', 'end_date', 'weekdays',
+            'price', 'multiplier', 'priority', 'created_at', 'updated_at'
+        ]
+        read_only_fields = ['created_at', 'updated_at']
+
+    def validate_weekdays(self, value):
+        days = [day.strip() for day in value.split(',') if day.strip()]
+        if any(not day.isdigit() or int(day) > 6 for day in days):
+            raise serializers.ValidationError("Weekdays must be comma separated numbers from 0 (Monday) to 6 (Sunday).")
+        return ','.join(sorted(set(days), key=int))
+
+    def validate(self, data):
+        def value(name):
+            return data[name] if name in data else getattr(self.instance, name, None)
+
+        price, multiplier = value('price'), value('multiplier')
+        if (price is None) == (multiplier is None):
+            raise serializers.ValidationError("Set exactly one of price or multiplier.")
+        if price is not None and price < 0:
+            raise serializers.ValidationError({'price': "Price cannot be negative."})
+        if multiplier is not None and multiplier <= 0:
+            raise serializers.ValidationError({'multiplier': "Multiplier must be greater than 0."})
+        start_date, end_date = value('start_date'), value('end_date')
+        if start_date and end_date and start_date > end_date:
+            raise serializers.ValidationError({'end_date': "End date must be on or after start date."})
+        if not (start_date or end_date or value('weekdays')):
+            raise serializers.ValidationError("A rule needs a date range, weekdays, or both.")
+        return data
@@ -0,0 +1,39 @@
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+from core.conditional import touch
+from core.outbox import emit
+from .models import Car, CarRentalOptions, CarUsagePolicy, CarPriceRule
+
+
+@receiver(post_save, sender=CarRentalOptions)
+@receiver(post_save, sender=CarUsagePolicy)
+@receiver(post_save, sender=CarPriceRule)
+@receiver(post_delete, sender=CarRentalOptions)
+@receiver(post_delete, sender=CarUsagePolicy)
+@receiver(post_delete, sender=CarPriceRule)
+def touch_car(sender, instance, **kwargs):
+    # الأسعار وسياسة الاستخدام بتظهر مع العربية في الحجوزات، فالـ ETag لازم يتغير،
+    # و updated_at هو نسخة تقويم الأسعار المتخزن في الذاكرة (cars.pricing)
+    touch(Car, pk=instance.car_id)
+
+
+@receiver(pre_save, sender=Car)
+def remember_approval_status(sender, instance, update_fields=None, raw=False, **kwargs):
+    # القيمة اللي في الداتابيز قبل الحفظ عشان نعرف في post_save لو الموافقة اتغيرت
+    instance._previous_approval_status = None
+    if raw or instance.pk is None or (update_fields is not None and 'approval_status' not in update_fields):
+        return
+    instance._previous_approval_status = (
+        Car.objects.filter(pk=instance.pk).values_list('approval_status', flat=True).first()
+    )
+
+
+@receiver(post_save, sender=Car)
+def emit_approval_change(sender, instance, **kwargs):
+    # الحدث بيتحفظ مع التغيير لو الحفظ جوه transaction (الأدمن و CarViewSet.perform_update)
+    previous = getattr(instance, '_previous_approval_status', None)
+    if previous is not None and previous != instance.approval_status:
+        emit('car', instance.pk, 'car.approved' if instance.approval_status else 'car.approval_revoked', {
+            'owner_id': instance.owner_id, 'approval_status': instance.approval_status,
+        })
+    instance._previous_approval_status = None
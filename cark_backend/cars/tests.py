@@ -1,3 +1,178 @@
+import itertools
+import random
+from datetime import timedelta
+from decimal import Decimal
+
 from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from core.models import OutboxEvent
+from core.outbox import relay_batch
+from users.tests import create_user
+from . import pricing
+from .models import Car, CarRentalOptions, CarUsagePolicy, CarPriceRule
+
+_plates = itertools.count(1)
+
+
+def create_car(owner, daily_price=300, daily_price_with_driver=500):
+    """
+    عربية بخيارات إيجار وسياسة استخدام: 100 كم و 8 ساعات في اليوم.
+    """
+    car = Car.objects.create(
+        owner=owner, model='Corolla', brand='Toyota', car_type='Sedan', car_category='Economy',
+        plate_number=f'TST{next(_plates):04d}', year=2020, color='white', seating_capacity=4,
+        transmission_type='Manual', fuel_type='Petrol', current_odometer_reading=100,
+    )
+    CarRentalOptions.objects.create(
+        car=car, available_with_driver=True, available_without_driver=True,
+        daily_rental_price=Decimal(daily_price), daily_rental_price_with_driver=Decimal(daily_price_with_driver),
+        monthly_rental_price=Decimal('6000'), monthly_price_with_driver=Decimal('12000'),
+    )
+    CarUsagePolicy.objects.create(
+        car=car, daily_km_limit=Decimal('100'), extra_km_cost=Decimal('2'),
+        daily_hour_limit=8, extra_hour_cost=Decimal('60'),
+    )
+    return Car.objects.select_related('rental_options', 'usage_policy').get(pk=car.pk)
+
+
+class RecordingSink:
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.events = []
+
+    def publish(self, events):
+        if self.fail:
+            raise IOError('Sink is down.')
+        self.events.extend(events)
+
+
+class PriceCalendarTests(TestCase):
+    def setUp(self):
+        self.owner = create_user()
+        self.car = create_car(self.owner)
+        self.today = timezone.localdate()
+
+    def _reload(self):
+        self.car = Car.objects.select_related('rental_options').get(pk=self.car.pk)
+
+    def _per_day_total(self, rental_type, start_date, end_date, base):
+        # التقييم يوم بيوم من غير التقويم المتجهز
+        rules = pricing._compile_rules(
+            CarPriceRule.objects.filter(car=self.car, rental_type__in=(CarPriceRule.BOTH, rental_type))
+        )
+        total = 0.0
+        for n in range((end_date - start_date).days + 1):
+            factor, fixed = pricing._day(rules, start_date + timedelta(days=n))
+            total += base * factor + fixed
+        return total
+
+    def test_without_rules_price_is_base_times_days(self):
+        end_date = self.today + timedelta(days=2)
+        self.assertEqual(pricing.quote(self.car, 'WithDriver', self.today, end_date)['total'], 1500)
+        self.assertEqual(pricing.quote(self.car, 'WithoutDriver', self.today, end_date)['total'], 900)
+        monthly = pricing.quote(self.car, 'WithDriver', self.today, self.today + timedelta(days=59))
+        self.assertEqual(monthly['tier'], 'monthly')
+        self.assertAlmostEqual(monthly['total'], 24000)
+
+    def test_calendar_matches_per_day_evaluation(self):
+        CarPriceRule.objects.create(car=self.car, weekdays='4,5', multiplier=Decimal('1.2'))
+        CarPriceRule.objects.create(
+            car=self.car, start_date=self.today + timedelta(days=10), end_date=self.today + timedelta(days=20),
+            price=Decimal('800'), priority=1,
+        )
+        CarPriceRule.objects.create(
+            car=self.car, rental_type=CarPriceRule.WITHOUT_DRIVER, start_date=self.today, multiplier=Decimal('0.5'),
+        )
+        self._reload()
+        rnd = random.Random(1)
+        # فترات بتعدي حدود التقويم من الناحيتين
+        for _ in range(100):
+            start_date = self.today + timedelta(days=rnd.randint(-200, 600))
+            end_date = start_date + timedelta(days=rnd.randint(0, 400))
+            for rental_type in ('WithDriver', 'WithoutDriver'):
+                result = pricing.quote(self.car, rental_type, start_date, end_date)
+                expected = self._per_day_total(rental_type, start_date, end_date, result['base_daily_price'])
+                self.assertAlmostEqual(result['total'], expected, places=6)
+
+    def test_calendar_is_cached_until_rules_change(self):
+        rule = CarPriceRule.objects.create(car=self.car, weekdays='4,5', multiplier=Decimal('1.2'))
+        self._reload()
+        end_date = self.today + timedelta(days=89)
+        pricing.quote(self.car, 'WithDriver', self.today, end_date)
+        with self.assertNumQueries(0):
+            before = pricing.quote(self.car, 'WithDriver', self.today, end_date)['total']
+
+        rule.multiplier = Decimal('2')
+        rule.save()
+        self._reload()
+        after = pricing.quote(self.car, 'WithDriver', self.today, end_date)['total']
+        self.assertGreater(after, before)
+
+    def test_price_endpoint(self):
+        CarPriceRule.objects.create(
+            car=self.car, start_date=self.today + timedelta(days=10), end_date=self.today + timedelta(days=20),
+            price=Decimal('800'),
+        )
+        client = APIClient()
+        client.force_authenticate(self.owner)
+        response = client.get(f'/api/cars/{self.car.pk}/price/', {
+            'start_date': str(self.today + timedelta(days=10)), 'end_date': str(self.today + timedelta(days=11)),
+        })
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(response.data['total'], 1600)
+        response = client.get(f'/api/cars/{self.car.pk}/price/', {'start_date': '2026-02-02', 'end_date': '2026-02-01'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_price_rule_validation_and_ownership(self):
+        client = APIClient()
+        client.force_authenticate(self.owner)
+        response = client.post('/api/price-rules/', {'car': self.car.pk, 'weekdays': '6,5', 'multiplier': '1.1'}, format='json')
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(response.data['weekdays'], '5,6')
+        response = client.post('/api/price-rules/', {'car': self.car.pk, 'price': '1'}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+        client.force_authenticate(create_user())
+        response = client.post('/api/price-rules/', {'car': self.car.pk, 'price': '1', 'weekdays': '1'}, format='json')
+        self.assertEqual(response.status_code, 403)
+
+
+class CarOutboxTests(TestCase):
+    def test_approval_change_is_emitted_once_and_delivered(self):
+        car = create_car(create_user())
+        car = Car.objects.get(pk=car.pk)
+        car.approval_status = True
+        car.save()
+        car.save()
+        events = OutboxEvent.objects.filter(aggregate_type='car', aggregate_id=str(car.pk))
+        self.assertEqual(list(events.values_list('event_type', flat=True)), ['car.approved'])
+
+        with self.assertRaises(IOError):
+            relay_batch(RecordingSink(fail=True))
+        event = events.get()
+        self.assertIsNone(event.published_at)
+        self.assertEqual(event.attempts, 1)
+        self.assertEqual(event.last_error, 'Sink is down.')
+
+        sink = RecordingSink()
+        self.assertEqual(relay_batch(sink), 1)
+        self.assertEqual(sink.events[0]['event_type'], 'car.approved')
+        self.assertEqual(sink.events[0]['payload']['owner_id'], car.owner_id)
+        self.assertIsNotNone(events.get().published_at)
+        self.assertEqual(relay_batch(RecordingSink()), 0)
 
-# Create your tests here.
+    def test_approval_from_the_api_and_partial_saves(self):
+        owner = create_user()
+        car = create_car(owner)
+        client = APIClient()
+        client.force_authenticate(owner)
+        response = client.patch(f'/api/cars/{car.pk}/', {'approval_status': True}, format='json')
+        self.assertEqual(response.status_code, 200, response.data)
+        # حفظ حقول تانية بس مابيعملش حدث
+        car = Car.objects.get(pk=car.pk)
+        car.approval_status = False
+        car.save(update_fields=['color'])
+        events = OutboxEvent.objects.filter(aggregate_type='car', aggregate_id=str(car.pk))
+        self.assertEqual(list(events.values_list('event_type', flat=True)), ['car.approved'])
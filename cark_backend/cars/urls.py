@@ -1,13 +1,16 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import CarViewSet, CarRentalOptionsViewSet, CarUsagePolicyViewSet, CarStatsViewSet
+from .views import CarViewSet, CarRentalOptionsViewSet, CarUsagePolicyViewSet, CarStatsViewSet, CarPriceRuleViewSet
+from .async_views import car_search
 
 router = DefaultRouter()
 router.register(r'cars', CarViewSet)
 router.register(r'rental-options', CarRentalOptionsViewSet)
 router.register(r'usage-policies', CarUsagePolicyViewSet)
 router.register(r'stats', CarStatsViewSet)
+router.register(r'price-rules', CarPriceRuleViewSet)
 
 urlpatterns = [
     path('', include(router.urls)),
+    path('async/cars/search/', car_search, name='car-search-async'),
 ]
@@ -1,18 +1,30 @@
 from rest_framework import viewsets , status, filters
 from rest_framework.permissions import IsAuthenticated
-from .models import Car, CarRentalOptions, CarUsagePolicy, CarStats, CarUsagePolicy
-from .serializers import CarSerializer, CarRentalOptionsSerializer, CarUsagePolicySerializer, CarStatsSerializer , CarUsagePolicySerializer
+from rest_framework.exceptions import PermissionDenied
+from .models import Car, CarRentalOptions, CarUsagePolicy, CarStats, CarUsagePolicy, CarPriceRule
+from .serializers import CarSerializer, CarListSerializer, CarPriceRuleSerializer, CarRentalOptionsSerializer, CarUsagePolicySerializer, CarStatsSerializer , CarUsagePolicySerializer
 from rest_framework.response import Response
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework import status
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
-from django.db import models
-
-class CarViewSet(viewsets.ModelViewSet):
+from django.db import models, transaction
+from datetime import date
+from core.conditional import ConditionalGetMixin
+from core.instrumentation import SerializerTimingMixin
+from core.fieldsets import SparseFieldsetMixin
+from .pricing import PRICE_FIELDS, quote
+
+class CarViewSet(SerializerTimingMixin, ConditionalGetMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     queryset = Car.objects.all()
     serializer_class = CarSerializer
+
+    def get_serializer_class(self):
+        # القايمة مختصرة، إلا لو اتطلبت حقول بعينها بـ ?fields=
+        if self.action == 'list' and self.requested_fields() is None:
+            return CarListSerializer
+        return CarSerializer
     #permission_classes = [IsAuthenticated]
 
     def perform_create(self, serializer):
@@ -21,6 +33,40 @@ class CarViewSet(viewsets.ModelViewSet):
         # إضافة المستخدم كـ owner عند إنشاء السيارة
         serializer.save(owner=user)
 
+    def perform_update(self, serializer):
+        # حدث الموافقة (cars.signals) بيتحفظ في نفس الـ transaction مع التعديل
+        with transaction.atomic():
+            serializer.save()
+
+    # GET /api/cars/<id>/price/?start_date=2026-07-01&end_date=2026-07-10&rental_type=WithDriver
+    @action(detail=True, methods=['get'])
+    def price(self, request, pk=None):
+        car = get_object_or_404(Car.objects.select_related('rental_options'), pk=pk)
+        rental_type = request.query_params.get('rental_type', 'WithDriver')
+        if rental_type not in PRICE_FIELDS:
+            return Response({'error': 'rental_type must be WithDriver or WithoutDriver.'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            start_date = date.fromisoformat(request.query_params.get('start_date', ''))
+            end_date = date.fromisoformat(request.query_params.get('end_date', ''))
+        except ValueError:
+            return Response({'error': 'start_date and end_date must be YYYY-MM-DD.'}, status=status.HTTP_400_BAD_REQUEST)
+        if end_date < start_date:
+            return Response({'error': 'end_date must be on or after start_date.'}, status=status.HTTP_400_BAD_REQUEST)
+        if not hasattr(car, 'rental_options'):
+            return Response({'error': 'This car has no rental options.'}, status=status.HTTP_400_BAD_REQUEST)
+        result = quote(car, rental_type, start_date, end_date)
+        return Response({
+            'car': car.pk,
+            'rental_type': rental_type,
+            'start_date': start_date,
+            'end_date': end_date,
+            'rental_days': result['rental_days'],
+            'tier': result['tier'],
+            'base_daily_price': round(result['base_daily_price'], 2),
+            'average_daily_price': round(result['average_daily_price'], 2),
+            'total': round(result['total'], 2),
+        })
+
 
 class CarRentalOptionsViewSet(viewsets.ModelViewSet):
     queryset = CarRentalOptions.objects.all()
@@ -246,4 +292,34 @@ class CarStatsViewSet(viewsets.ModelViewSet):
         return Response({
             'total_rentals': total_rentals['total'] or 0,
             'total_earned': total_earned['total'] or 0
-        })
\ No newline at end of file
+        })
+
+
+class CarPriceRuleViewSet(viewsets.ModelViewSet):
+    """
+    قواعد تقويم الأسعار (المواسم والويك إند) لعربيات المالك. ?car=<id> للفلترة بعربية.
+    """
+    queryset = CarPriceRule.objects.all()
+    serializer_class = CarPriceRuleSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        queryset = CarPriceRule.objects.all()
+        if not self.request.user.is_staff:
+            queryset = queryset.filter(car__owner=self.request.user)
+        car_id = self.request.query_params.get('car')
+        if car_id:
+            queryset = queryset.filter(car_id=car_id)
+        return queryset
+
+    def _check_owner(self, car):
+        if car.owner_id != self.request.user.id:
+            raise PermissionDenied('You are not the owner of this car.')
+
+    def perform_create(self, serializer):
+        self._check_owner(serializer.validated_data['car'])
+        serializer.save()
+
+    def perform_update(self, serializer):
+        self._check_owner(serializer.validated_data.get('car', serializer.instance.car))
+        serializer.save()
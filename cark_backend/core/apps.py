@@ -0,0 +1,15 @@
+from django.apps import AppConfig
+
+
+class CoreConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'core'
+
+    def ready(self):
+        from django.utils.module_loading import autodiscover_modules
+        # تسجيل الـ background tasks الموجودة في tasks.py في كل app
+        autodiscover_modules('tasks')
+        from . import checks  # تسجيل الـ system checks بتاعة قاعدة البيانات
+        from . import instrumentation
+        if instrumentation.ENABLED:
+            instrumentation.install()
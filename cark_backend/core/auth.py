@@ -0,0 +1,47 @@
+from asgiref.sync import sync_to_async
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, AuthenticationFailed, TokenError
+from rest_framework_simplejwt.settings import api_settings
+
+
+def _raw_token(request, allow_query_token=False):
+    header = request.META.get('HTTP_AUTHORIZATION', '')
+    raw_token = header.split(' ', 1)[1] if header.startswith('Bearer ') else None
+    if raw_token is None and allow_query_token:
+        raw_token = request.GET.get('token')
+    return raw_token
+
+
+def jwt_user_id(request):
+    """
+    الـ user id من الـ JWT بعد التحقق من التوقيع والصلاحية، من غير query للمستخدم.
+    return: الـ id أو None
+    """
+    raw_token = _raw_token(request)
+    if not raw_token:
+        return None
+    try:
+        token = JWTAuthentication().get_validated_token(raw_token)
+    except (InvalidToken, AuthenticationFailed, TokenError):
+        return None
+    return token.get(api_settings.USER_ID_CLAIM)
+
+
+def authenticate_jwt(request, allow_query_token=False):
+    """
+    التحقق من الـ JWT للـ views اللي بره DRF (async views والـ streams).
+    allow_query_token: قبول التوكن من ?token= (EventSource في المتصفح مبيبعتش headers)
+    return: المستخدم أو None
+    """
+    raw_token = _raw_token(request, allow_query_token)
+    if not raw_token:
+        return None
+    authentication = JWTAuthentication()
+    try:
+        return authentication.get_user(authentication.get_validated_token(raw_token))
+    except (InvalidToken, AuthenticationFailed, TokenError):
+        return None
+
+
+async def aauthenticate_jwt(request, allow_query_token=False):
+    return await sync_to_async(authenticate_jwt)(request, allow_query_token=allow_query_token)
@@ -0,0 +1,71 @@
+import time
+
+from django.core.checks import Tags, Warning, Error, register
+from django.db import connections
+
+from .db_backends.pool import PooledDatabaseWrapperMixin
+
+# أبطأ من كده لـ SELECT 1 معناه إن السيرفر بعيد أو مضغوط
+SLOW_ROUNDTRIP_MS = 50
+
+
+@register(Tags.database)
+def check_database_connections(app_configs, databases=None, **kwargs):
+    """
+    بيشتغل مع: python manage.py check --database default
+    (في الـ Procfile كـ release عشان الإعدادات الغلط تبان قبل ما السيرفر يقوم)
+    """
+    messages = []
+    for alias in databases or ():
+        connection = connections[alias]
+        max_age = connection.settings_dict.get('CONN_MAX_AGE')
+        try:
+            started = time.perf_counter()
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+                cursor.fetchone()
+            roundtrip_ms = (time.perf_counter() - started) * 1000
+            wait_timeout = None
+            if connection.vendor == 'mysql':
+                with connection.cursor() as cursor:
+                    cursor.execute('SELECT @@wait_timeout')
+                    wait_timeout = cursor.fetchone()[0]
+        except Exception as exc:
+            messages.append(Error(
+                f'Cannot connect to database "{alias}": {exc}', id='core.E001',
+            ))
+            continue
+
+        if roundtrip_ms > SLOW_ROUNDTRIP_MS:
+            messages.append(Warning(
+                f'Database "{alias}" round trip took {roundtrip_ms:.0f} ms.', id='core.W002',
+            ))
+        if wait_timeout is not None and (max_age is None or max_age >= wait_timeout):
+            messages.append(Warning(
+                f'CONN_MAX_AGE for "{alias}" ({max_age}) is not below MySQL wait_timeout ({wait_timeout}); '
+                'the server will drop persistent connections.',
+                hint='Lower DB_CONN_MAX_AGE or keep DB_CONN_HEALTH_CHECKS enabled.',
+                id='core.W003',
+            ))
+    return messages
+
+
+@register()
+def check_database_settings(app_configs, **kwargs):
+    messages = []
+    for alias in connections:
+        connection = connections[alias]
+        settings_dict = connection.settings_dict
+        if settings_dict.get('CONN_MAX_AGE') is None and not settings_dict.get('CONN_HEALTH_CHECKS'):
+            messages.append(Warning(
+                f'Database "{alias}" keeps connections forever without health checks.',
+                hint='Set DB_CONN_HEALTH_CHECKS=true or a finite DB_CONN_MAX_AGE.',
+                id='core.W001',
+            ))
+        if isinstance(connection, PooledDatabaseWrapperMixin) and settings_dict.get('CONN_MAX_AGE'):
+            messages.append(Warning(
+                f'Database "{alias}" uses a connection pool together with CONN_MAX_AGE; '
+                'connections will stay with their thread instead of returning to the pool.',
+                id='core.W004',
+            ))
+    return messages
@@ -0,0 +1,63 @@
+"""
+ضغط الـ responses (brotli لو متسطب، وإلا gzip) حسب Accept-Encoding بتاع العميل.
+الـ responses الصغيرة (أقل من COMPRESSION_MIN_BYTES) مابتتضغطش لأن التوفير فيها
+أقل من وقت الضغط، والـ streaming (زي SSE) مابيتضغطش عشان الأحداث ماتستناش في buffer.
+"""
+import gzip
+
+from django.conf import settings
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+MIN_BYTES = getattr(settings, 'COMPRESSION_MIN_BYTES', 1024)
+GZIP_LEVEL = getattr(settings, 'COMPRESSION_GZIP_LEVEL', 6)
+# quality 4 قريبة من gzip 6 في السرعة وأصغر منه في الحجم، والأعلى منها بطيء على responses ديناميكية
+BROTLI_QUALITY = getattr(settings, 'COMPRESSION_BROTLI_QUALITY', 4)
+CONTENT_TYPES = getattr(settings, 'COMPRESSION_CONTENT_TYPES', (
+    'application/json', 'text/', 'application/javascript', 'application/xml', 'image/svg+xml',
+))
+
+
+def accepted_encodings(header):
+    """
+    'gzip, br;q=0.8, deflate;q=0' -> {'gzip', 'br'}
+    """
+    accepted = set()
+    for item in header.split(','):
+        coding, _, params = item.partition(';')
+        coding = coding.strip().lower()
+        q = 1.0
+        for param in params.split(';'):
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if coding and q > 0:
+            accepted.add(coding)
+    return accepted
+
+
+def choose_encoding(header):
+    accepted = accepted_encodings(header)
+    if brotli is not None and 'br' in accepted:
+        return 'br'
+    if 'gzip' in accepted:
+        return 'gzip'
+    return None
+
+
+def compress(content, encoding):
+    if encoding == 'br':
+        return brotli.compress(content, quality=BROTLI_QUALITY)
+    # mtime=0 عشان نفس المحتوى يطلع نفس البايتات (ETag ثابت)
+    return gzip.compress(content, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def is_compressible(response):
+    content_type = response.get('Content-Type', '').split(';', 1)[0].strip().lower()
+    return any(content_type.startswith(prefix) for prefix in CONTENT_TYPES)
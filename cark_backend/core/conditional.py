@@ -0,0 +1,87 @@
+"""
+Conditional GET (ETag / Last-Modified) للـ ViewSets من غير serialization:
+- retrieve: query واحدة بتجيب updated_at بتاع العنصر (والعلاقات اللي بتظهر في الـ response)
+- list: query واحدة بـ MAX(updated_at) و COUNT (الـ count عشان الحذف يغير الـ ETag)
+لو العميل باعت If-None-Match أو If-Modified-Since ومفيش تغيير بيرجع 304 على طول.
+
+الـ ETag محسوب من الـ validators دول مع الـ URL والـ format والمستخدم، فلازم أي تغيير
+في البيانات المعروضة يغير updated_at. العلاقات اللي مالهاش updated_at بتنادي touch()
+لما تتغير (الـ signals في rentals و cars و documents).
+"""
+import hashlib
+
+from django.db.models import Count, Max
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+
+def touch(model, **filters):
+    """
+    تحديث updated_at للصفوف دي من غير ما الـ save() يتنادى (UPDATE واحد).
+    """
+    return model._default_manager.filter(**filters).update(updated_at=timezone.now())
+
+
+def _latest(values):
+    values = [value for value in values if value is not None]
+    return max(values) if values else None
+
+
+class ConditionalGetMixin:
+    """
+    لازم يبقى قبل SparseFieldsetMixin و ModelViewSet في الـ bases.
+    last_modified_fields: أعمدة updated_at (بتاعة الـ model والعلاقات المعروضة) اللي الـ ETag بيتحسب منها.
+    """
+    last_modified_fields = ('updated_at',)
+
+    def list_validators(self, queryset):
+        aggregates = {f'max_{n}': Max(field) for n, field in enumerate(self.last_modified_fields)}
+        result = queryset.order_by().aggregate(count=Count('pk'), **aggregates)
+        return _latest(result[key] for key in aggregates), result['count']
+
+    def retrieve_validators(self, queryset):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        row = queryset.filter(**{self.lookup_field: self.kwargs[lookup_url_kwarg]}).order_by().values_list(
+            *self.last_modified_fields
+        ).first()
+        if row is None:
+            return None
+        return _latest(row), 1
+
+    def _etag(self, request, last_modified, count):
+        user = request.user
+        parts = [
+            request.get_full_path(),
+            getattr(request, 'accepted_media_type', None) or '',
+            str(user.pk if user and user.is_authenticated else ''),
+            last_modified.isoformat() if last_modified else '',
+            str(count),
+        ]
+        return quote_etag(hashlib.sha256('\n'.join(parts).encode()).hexdigest()[:32])
+
+    def _conditional(self, request, validators, build_response):
+        if validators is None:
+            return build_response()
+        last_modified, count = validators
+        etag = self._etag(request, last_modified, count)
+        last_modified_ts = int(last_modified.timestamp()) if last_modified else None
+        not_modified = get_conditional_response(request._request, etag=etag, last_modified=last_modified_ts)
+        if not_modified is not None:
+            if not_modified.status_code == 304:
+                not_modified['ETag'] = etag
+            return not_modified
+        response = build_response()
+        if response.status_code == 200:
+            response['ETag'] = etag
+            if last_modified_ts is not None:
+                response['Last-Modified'] = http_date(last_modified_ts)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        validators = self.list_validators(self.filter_queryset(self.get_queryset()))
+        return self._conditional(request, validators, lambda: super(ConditionalGetMixin, self).list(request, *args, **kwargs))
+
+    def retrieve(self, request, *args, **kwargs):
+        validators = self.retrieve_validators(self.filter_queryset(self.get_queryset()))
+        return self._conditional(request, validators, lambda: super(ConditionalGetMixin, self).retrieve(request, *args, **kwargs))
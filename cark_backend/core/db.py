@@ -0,0 +1,16 @@
+from django.db import connection
+
+
+def skip_locked_options():
+    """
+    خيارات select_for_update للـ workers اللي شغالين بالتوازي: skip_locked عشان كل worker
+    ياخد صفوف غير اللي مقفولة عند غيره، و of=('self',) عشان القفل مايوصلش للجداول المربوطة.
+    بتترجع بس اللي الـ database بتدعمه.
+    """
+    features = connection.features
+    options = {}
+    if features.has_select_for_update_skip_locked:
+        options['skip_locked'] = True
+    if features.has_select_for_update_of:
+        options['of'] = ('self',)
+    return options
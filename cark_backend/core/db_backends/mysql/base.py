@@ -0,0 +1,14 @@
+from django.db.backends.mysql import base
+
+from ..pool import PooledDatabaseWrapperMixin
+
+
+class DatabaseWrapper(PooledDatabaseWrapperMixin, base.DatabaseWrapper):
+
+    def pooled_connection_usable(self, connection):
+        # MySQL بيقفل الاتصالات الفاضية بعد wait_timeout
+        try:
+            connection.ping()
+        except base.Database.Error:
+            return False
+        return True
@@ -0,0 +1,110 @@
+import threading
+import time
+from collections import deque
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+class ConnectionPool:
+    """
+    اتصالات فاضية جاهزة لإعادة الاستخدام لـ alias واحد. مش بيحدد عدد الاتصالات المفتوحة في نفس الوقت،
+    هو بس بيحتفظ لحد size اتصال فاضي بدل ما يتقفلوا، وأي اتصال فاضي أقدم من timeout بيتقفل.
+    """
+
+    def __init__(self, size, timeout):
+        self.size = size
+        self.timeout = timeout
+        self._idle = deque()
+        self._lock = threading.Lock()
+
+    def get(self):
+        now = time.monotonic()
+        while True:
+            with self._lock:
+                if not self._idle:
+                    return None
+                connection, returned_at = self._idle.pop()
+            if now - returned_at <= self.timeout:
+                return connection
+            _close_quietly(connection)
+
+    def put(self, connection):
+        with self._lock:
+            if len(self._idle) >= self.size:
+                return False
+            self._idle.append((connection, time.monotonic()))
+            return True
+
+    def clear(self):
+        with self._lock:
+            idle, self._idle = self._idle, deque()
+        for connection, _ in idle:
+            _close_quietly(connection)
+
+
+def _close_quietly(connection):
+    try:
+        connection.close()
+    except Exception:
+        pass
+
+
+def get_pool(alias, size, timeout):
+    pool = _pools.get(alias)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.setdefault(alias, ConnectionPool(size, timeout))
+    return pool
+
+
+POOL_OPTIONS = ('pool_size', 'pool_timeout')
+
+
+class PooledDatabaseWrapperMixin:
+    """
+    بيتحط قبل الـ DatabaseWrapper بتاع أي backend: فتح الاتصال بياخد من الـ pool لو فيه،
+    وقفل الاتصال (آخر الطلب) بيرجعه للـ pool بدل ما يقفله فعلاً.
+    """
+
+    def __init__(self, settings_dict, *args, **kwargs):
+        super().__init__(settings_dict, *args, **kwargs)
+        options = settings_dict.get('OPTIONS', {})
+        self.pool = get_pool(self.alias, int(options.get('pool_size', 10)), int(options.get('pool_timeout', 300)))
+
+    def get_connection_params(self):
+        # خيارات الـ pool مش للـ driver. الـ settings_dict نفسه مشترك بين اتصالات كل الـ threads
+        # فمابنعدلش فيه؛ الـ wrapper (خاص بالـ thread) بيشوف نسخة من غيرها وقت بناء الـ params بس
+        settings_dict = self.settings_dict
+        options = settings_dict.get('OPTIONS', {})
+        self.settings_dict = {
+            **settings_dict,
+            'OPTIONS': {key: value for key, value in options.items() if key not in POOL_OPTIONS},
+        }
+        try:
+            return super().get_connection_params()
+        finally:
+            self.settings_dict = settings_dict
+
+    def pooled_connection_usable(self, connection):
+        return True
+
+    def get_new_connection(self, conn_params):
+        while True:
+            connection = self.pool.get()
+            if connection is None:
+                return super().get_new_connection(conn_params)
+            if self.pooled_connection_usable(connection):
+                return connection
+            _close_quietly(connection)
+
+    def _close(self):
+        # اتصال اتقفل في نص transaction مايرجعش للـ pool
+        if self.connection is not None and not self.in_atomic_block:
+            try:
+                self.connection.rollback()
+            except Exception:
+                return super()._close()
+            if self.pool.put(self.connection):
+                return None
+        return super()._close()
@@ -0,0 +1,8 @@
+from django.db.backends.sqlite3 import base
+
+from ..pool import PooledDatabaseWrapperMixin
+
+
+class DatabaseWrapper(PooledDatabaseWrapperMixin, base.DatabaseWrapper):
+    # قواعد in-memory مش بتتقفل أصلاً (base.DatabaseWrapper.close) فمش بتدخل الـ pool
+    pass
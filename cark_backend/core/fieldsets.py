@@ -0,0 +1,169 @@
+"""
+Sparse fieldsets: ?fields=id,status,car.brand بيرجع الحقول دي بس،
+والـ queryset بيتبني من نفس الحقول (select_related / prefetch_related / only)
+فالحقول اللي مش مطلوبة مابتتقريش من القاعدة أصلاً.
+"""
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from rest_framework.exceptions import ValidationError
+from rest_framework.serializers import BaseSerializer, ListSerializer, ManyRelatedField
+
+FIELDS_PARAM = 'fields'
+MAX_DEPTH = 4
+
+
+def parse_fields(value):
+    """
+    'id,status,car.brand,car.model' -> {'id': None, 'status': None, 'car': {'brand': None, 'model': None}}
+    None معناها الحقل كله (بكل الحقول اللي جواه لو nested).
+    """
+    tree = {}
+    for item in value.split(','):
+        parts = [part.strip() for part in item.split('.')]
+        if not all(parts):
+            if item.strip():
+                raise ValidationError({FIELDS_PARAM: f'Invalid field "{item.strip()}".'})
+            continue
+        if len(parts) > MAX_DEPTH:
+            raise ValidationError({FIELDS_PARAM: f'"{item.strip()}" is nested too deeply.'})
+        node = tree
+        for part in parts[:-1]:
+            if part in node and node[part] is None:
+                # الحقل كله مطلوب أصلاً
+                break
+            node = node.setdefault(part, {})
+        else:
+            node[parts[-1]] = None
+    if not tree:
+        raise ValidationError({FIELDS_PARAM: 'At least one field is required.'})
+    return tree
+
+
+def _nested(field):
+    if isinstance(field, ListSerializer):
+        return field.child
+    if isinstance(field, BaseSerializer):
+        return field
+    return None
+
+
+def prune_fields(serializer, tree, path=''):
+    """
+    شيل كل الحقول اللي مش في الـ tree من الـ serializer (والـ nested serializers جواه).
+    """
+    if tree is None:
+        return
+    fields = serializer.fields
+    unknown = sorted(set(tree) - set(fields))
+    if unknown:
+        raise ValidationError({FIELDS_PARAM: f'Unknown field(s): {", ".join(path + name for name in unknown)}.'})
+    for name in list(fields):
+        if name not in tree:
+            fields.pop(name)
+        elif tree[name] is not None:
+            nested = _nested(fields[name])
+            if nested is None:
+                raise ValidationError({FIELDS_PARAM: f'{path}{name} has no nested fields.'})
+            prune_fields(nested, tree[name], f'{path}{name}.')
+
+
+def _model_field(model, name):
+    try:
+        return model._meta.get_field(name)
+    except FieldDoesNotExist:
+        return None
+
+
+def _plan(serializer, model, prefix, only, select, prefetch):
+    """
+    بيجمع الأعمدة والعلاقات اللي الـ serializer (بعد الـ pruning) محتاجها من model.
+    """
+    # الـ pk دايماً، عشان الـ select_related مايبقاش على مستوى كله deferred
+    columns = {model._meta.pk.name}
+    # لو في حقل مش عمود مباشر (property أو method أو source='*') كل أعمدة المستوى ده بتتقري
+    restrict = True
+    for field in serializer.fields.values():
+        if field.write_only:
+            continue
+        source = field.source
+        model_field = _model_field(model, source) if source != '*' and '.' not in source else None
+        if model_field is None:
+            restrict = False
+            continue
+        path = prefix + model_field.name
+        nested = _nested(field)
+        if not model_field.is_relation:
+            columns.add(model_field.name)
+        elif model_field.many_to_many or model_field.one_to_many:
+            related = model_field.related_model
+            if nested is not None:
+                prefetch.append(Prefetch(path, queryset=optimize_queryset(
+                    related._default_manager.all(), nested,
+                    # الـ FK اللي راجع للأب لازم يتقري عشان الـ prefetch يربط الصفوف
+                    extra_columns=[model_field.field.name] if model_field.one_to_many else (),
+                )))
+            else:
+                prefetch.append(Prefetch(path, queryset=related._default_manager.only('pk')))
+        elif nested is not None:
+            # FK أو one-to-one (في أي اتجاه): نفس الـ query بـ JOIN
+            if model_field.concrete:
+                columns.add(model_field.name)
+            select.append(path)
+            _plan(nested, model_field.related_model, path + '__', only, select, prefetch)
+        elif isinstance(field, ManyRelatedField):
+            prefetch.append(Prefetch(path, queryset=model_field.related_model._default_manager.only('pk')))
+        elif model_field.concrete:
+            # PrimaryKeyRelatedField بيقرا الـ <name>_id بس
+            columns.add(model_field.name)
+        else:
+            restrict = False
+
+    if restrict:
+        only.extend(prefix + column for column in columns)
+    else:
+        only.extend(prefix + field.name for field in model._meta.concrete_fields)
+
+
+def optimize_queryset(queryset, serializer, extra_columns=()):
+    """
+    select_related / prefetch_related / only حسب حقول الـ serializer.
+    """
+    only, select, prefetch = list(extra_columns), [], []
+    _plan(serializer, queryset.model, '', only, select, prefetch)
+    if select:
+        queryset = queryset.select_related(*select)
+    if prefetch:
+        queryset = queryset.prefetch_related(*prefetch)
+    return queryset.only(*only)
+
+
+class SparseFieldsetMixin:
+    """
+    للـ ViewSets: في list و retrieve الـ queryset بيتبني من حقول الـ serializer
+    (فمفيش N+1 في الـ nested serializers)، و ?fields= بيختار جزء منها.
+    """
+    sparse_fieldset_actions = ('list', 'retrieve')
+
+    def requested_fields(self):
+        if getattr(self, 'action', None) not in self.sparse_fieldset_actions:
+            return None
+        value = self.request.query_params.get(FIELDS_PARAM)
+        return parse_fields(value) if value else None
+
+    def _sparse_serializer(self):
+        serializer = self.get_serializer_class()(context=self.get_serializer_context())
+        prune_fields(serializer, self.requested_fields())
+        return serializer
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if getattr(self, 'action', None) in self.sparse_fieldset_actions:
+            queryset = optimize_queryset(queryset, self._sparse_serializer())
+        return queryset
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        tree = self.requested_fields()
+        if tree is not None:
+            prune_fields(_nested(serializer), tree)
+        return serializer
@@ -0,0 +1,116 @@
+import hashlib
+import zlib
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.http import HttpResponse
+from django.utils import timezone
+
+from .auth import jwt_user_id
+from .models import IdempotencyKey
+
+# المدة اللي الـ response المحفوظ بيفضل يترد فيها على الـ retries
+TTL_SECONDS = getattr(settings, 'IDEMPOTENCY_TTL_SECONDS', 24 * 3600)
+# طلب لسه "شغال" أقدم من كده يعتبر مات (السيرفر وقع مثلاً) وأي retry ياخد مكانه
+LOCK_TIMEOUT_SECONDS = getattr(settings, 'IDEMPOTENCY_LOCK_TIMEOUT_SECONDS', 60)
+# الـ retry بيستنى الطلب الأصلي المدة دي قبل ما يرجع 409
+WAIT_SECONDS = getattr(settings, 'IDEMPOTENCY_WAIT_SECONDS', 5)
+POLL_INTERVAL_SECONDS = 0.1
+PATH_PREFIXES = tuple(getattr(settings, 'IDEMPOTENCY_PATH_PREFIXES', ('/api/rentals/', '/api/wallet/')))
+MAX_KEY_LENGTH = 255
+
+
+def _sha256(*parts):
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part if isinstance(part, bytes) else part.encode())
+        digest.update(b'\n')
+    return digest.hexdigest()
+
+
+def request_scope(request):
+    """
+    المفتاح بيتربط بالمستخدم (الـ user id من الـ JWT) مش بالتوكن نفسه، عشان الـ retry بعد
+    تجديد التوكن يلاقي نفس المفتاح. الطلبات من غير مستخدم بتتربط بالـ IP بتاع العميل.
+    """
+    user_id = jwt_user_id(request)
+    client = f'user:{user_id}' if user_id is not None else f'anon:{request.META.get("REMOTE_ADDR", "")}'
+    return _sha256(client, request.method, request.path)
+
+
+def request_fingerprint(request):
+    return _sha256(request.method, request.get_full_path(), request.body)
+
+
+def acquire(scope, key, fingerprint):
+    """
+    حجز المفتاح لتنفيذ الطلب. الـ unique constraint على (scope, key) هو القفل،
+    فطلبين بنفس المفتاح في نفس اللحظة واحد بس فيهم اللي بينفذ.
+    return: (record, owner) و owner=True معناه الطلب ده هو اللي ينفذ الـ view
+    """
+    while True:
+        now = timezone.now()
+        try:
+            with transaction.atomic():
+                record = IdempotencyKey.objects.create(
+                    scope=scope, key=key, fingerprint=fingerprint,
+                    locked_at=now, expires_at=now + timedelta(seconds=TTL_SECONDS),
+                )
+            return record, True
+        except IntegrityError:
+            pass
+
+        try:
+            record = IdempotencyKey.objects.get(scope=scope, key=key)
+        except IdempotencyKey.DoesNotExist:
+            continue
+
+        if record.expires_at <= now:
+            IdempotencyKey.objects.filter(pk=record.pk, expires_at__lte=now).delete()
+            continue
+
+        stale_before = now - timedelta(seconds=LOCK_TIMEOUT_SECONDS)
+        if record.status_code is None and record.locked_at < stale_before and record.fingerprint == fingerprint:
+            # compare-and-swap على locked_at عشان retry واحد بس ياخد الطلب الميت
+            taken = IdempotencyKey.objects.filter(
+                pk=record.pk, status_code__isnull=True, locked_at=record.locked_at,
+            ).update(locked_at=now)
+            if taken:
+                record.locked_at = now
+                return record, True
+        return record, False
+
+
+def store(record, response):
+    IdempotencyKey.objects.filter(pk=record.pk).update(
+        status_code=response.status_code,
+        content_type=response.get('Content-Type', ''),
+        body=zlib.compress(response.content),
+    )
+
+
+def release(record):
+    # الطلب فشل، فالمفتاح يتشال والـ retry الجاي ينفذ من الأول
+    IdempotencyKey.objects.filter(pk=record.pk, status_code__isnull=True).delete()
+
+
+def replay(record):
+    response = HttpResponse(
+        zlib.decompress(bytes(record.body)), status=record.status_code, content_type=record.content_type or None,
+    )
+    response['Idempotent-Replayed'] = 'true'
+    return response
+
+
+def purge_expired(batch_size=5000):
+    """
+    مسح المفاتيح المنتهية على دفعات. return: عدد الصفوف اللي اتمسحت
+    """
+    now = timezone.now()
+    purged = 0
+    while True:
+        ids = list(IdempotencyKey.objects.filter(expires_at__lte=now).values_list('id', flat=True)[:batch_size])
+        if not ids:
+            return purged
+        purged += IdempotencyKey.objects.filter(id__in=ids).delete()[0]
@@ -0,0 +1,191 @@
+"""
+قياس استعلامات قاعدة البيانات لكل طلب: عدد الاستعلامات، وقت الـ DB، وقت الـ serializers،
+والاستعلامات المتكررة بنفس الشكل (N+1).
+"""
+import logging
+import re
+import time
+from contextlib import contextmanager
+from functools import lru_cache
+from contextvars import ContextVar
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+ENABLED = getattr(settings, 'QUERY_INSTRUMENTATION', settings.DEBUG)
+# الـ header بيكشف التوقيتات، فبيتبعت في الـ development بس إلا لو اتفعل صراحة
+SERVER_TIMING = getattr(settings, 'QUERY_SERVER_TIMING', settings.DEBUG)
+# الطلب بيتسجل في الـ log لو عدى أي حد من دول
+SLOW_REQUEST_QUERIES = getattr(settings, 'SLOW_REQUEST_QUERIES', 50)
+SLOW_REQUEST_DB_MS = getattr(settings, 'SLOW_REQUEST_DB_MS', 300)
+SLOW_QUERY_MS = getattr(settings, 'SLOW_QUERY_MS', 100)
+# نفس الاستعلام (بنفس الشكل) بيتكرر المرات دي أو أكتر في طلب واحد = N+1 غالباً
+N_PLUS_ONE_THRESHOLD = getattr(settings, 'N_PLUS_ONE_THRESHOLD', 5)
+
+_IN_LIST = re.compile(r'IN \((?:%s, )*%s\)')
+_WHITESPACE = re.compile(r'\s+')
+
+_current = ContextVar('query_stats', default=None)
+
+
+def fingerprint(sql):
+    """
+    شكل الاستعلام من غير القيم. Django بيبعت الـ SQL بـ %s مكان القيم،
+    فالفرق الوحيد بين استعلامين من نفس الشكل هو طول قوائم IN.
+    """
+    return _IN_LIST.sub('IN (...)', _WHITESPACE.sub(' ', sql.strip()))
+
+
+class RequestStats:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+        self.serializer_time = 0.0
+        # fingerprint -> [عدد المرات، الوقت الكلي، أبطأ مرة]
+        self.statements = {}
+
+    def record(self, sql, duration):
+        self.queries += 1
+        self.db_time += duration
+        entry = self.statements.get(sql)
+        if entry is None:
+            # الـ fingerprint بيتحسب مرة واحدة لكل SQL مختلف
+            self.statements[sql] = entry = [0, 0.0, 0.0, fingerprint(sql)]
+        entry[0] += 1
+        entry[1] += duration
+        entry[2] = max(entry[2], duration)
+
+    def grouped(self):
+        """
+        return: {fingerprint: (count, total, slowest)}
+        """
+        groups = {}
+        for count, total, slowest, key in self.statements.values():
+            previous = groups.get(key, (0, 0.0, 0.0))
+            groups[key] = (previous[0] + count, previous[1] + total, max(previous[2], slowest))
+        return groups
+
+    def repeated(self):
+        return {key: group for key, group in self.grouped().items() if group[0] >= N_PLUS_ONE_THRESHOLD}
+
+    def slow_queries(self):
+        return {key: group for key, group in self.grouped().items() if group[2] * 1000 >= SLOW_QUERY_MS}
+
+    def total_time(self):
+        return time.perf_counter() - self.started
+
+    def server_timing(self):
+        return ', '.join([
+            f'db;dur={self.db_time * 1000:.1f};desc="{self.queries} queries"',
+            f'serializer;dur={self.serializer_time * 1000:.1f}',
+            f'total;dur={self.total_time() * 1000:.1f}',
+        ])
+
+
+def current_stats():
+    return _current.get()
+
+
+@contextmanager
+def collect():
+    """
+    بتجمع الاستعلامات اللي بتتنفذ جوه الـ block (ولو في thread تاني عن طريق sync_to_async).
+    """
+    stats = RequestStats()
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+
+
+def record_query(execute, sql, params, many, context):
+    # execute wrapper متركب على كل اتصال؛ من غير collect() شغال
+    stats = _current.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.record(sql, time.perf_counter() - start)
+
+
+def _install_wrapper(sender, connection, **kwargs):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+@lru_cache(maxsize=None)
+def _timed_class(cls):
+    class Timed(cls):
+        @property
+        def data(self):
+            stats = _current.get()
+            if stats is None:
+                return super().data
+            start = time.perf_counter()
+            try:
+                return super().data
+            finally:
+                stats.serializer_time += time.perf_counter() - start
+
+    Timed.__name__ = cls.__name__
+    Timed.__qualname__ = cls.__qualname__
+    return Timed
+
+
+class SerializerTimingMixin:
+    """
+    للـ ViewSets: وقت serializer.data للـ serializer اللي الـ view بيرجعه بيتحسب في Server-Timing.
+    الـ nested serializers بتتحسب جوه اللي برا.
+    """
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        if ENABLED:
+            serializer.__class__ = _timed_class(type(serializer))
+        return serializer
+
+
+def install():
+    """
+    بتتنادى من CoreConfig.ready: execute wrapper على كل اتصال بيتفتح
+    (بدل connection.execute_wrapper لكل طلب، عشان الـ views الـ async بتستعلم من thread تاني).
+    """
+    from django.db import connections
+    from django.db.backends.signals import connection_created
+
+    connection_created.connect(_install_wrapper, dispatch_uid='core.instrumentation')
+    for connection in connections.all(initialized_only=True):
+        _install_wrapper(None, connection)
+
+
+def report(request, response, stats):
+    """
+    تسجيل الطلب في الـ log لو كان بطيء أو فيه استعلامات كتير أو متكررة.
+    """
+    repeated = stats.repeated()
+    slow = stats.slow_queries()
+    too_many = stats.queries >= SLOW_REQUEST_QUERIES
+    too_slow = stats.db_time * 1000 >= SLOW_REQUEST_DB_MS
+    if not (repeated or slow or too_many or too_slow):
+        return
+    offenders = dict(repeated)
+    offenders.update(slow)
+    if too_many or too_slow:
+        # أكتر 3 أشكال استهلاكاً للوقت
+        heaviest = sorted(stats.grouped().items(), key=lambda item: item[1][1], reverse=True)[:3]
+        offenders.update(heaviest)
+    lines = [
+        f'  {count}x {total * 1000:.1f}ms (max {slowest * 1000:.1f}ms) {key[:500]}'
+        for key, (count, total, slowest) in sorted(offenders.items(), key=lambda item: item[1][1], reverse=True)
+    ]
+    logger.warning(
+        '%s %s -> %s: %s queries, db %.1fms, serializer %.1fms, total %.1fms%s\n%s',
+        request.method, request.path, response.status_code, stats.queries,
+        stats.db_time * 1000, stats.serializer_time * 1000, stats.total_time() * 1000,
+        ' [N+1]' if repeated else '', '\n'.join(lines),
+    )
@@ -0,0 +1,60 @@
+import signal
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+
+from core.outbox import PARTITIONS, get_sink, relay_batch
+
+
+class Command(BaseCommand):
+    help = (
+        'Publish outbox events to the configured sink in batches. '
+        'Run several relays with --worker/--workers to split aggregates between them.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sink', default=None, help='Sink class path, e.g. core.outbox.HttpSink.')
+        parser.add_argument('--path', default=None, help='Output file for FileSink.')
+        parser.add_argument('--url', default=None, help='Endpoint for HttpSink.')
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--sleep', type=float, default=1.0, help='Seconds to wait when the outbox is empty.')
+        parser.add_argument('--worker', type=int, default=0)
+        parser.add_argument('--workers', type=int, default=1)
+        parser.add_argument('--once', action='store_true', help='Drain the outbox once and exit.')
+
+    def handle(self, *args, **options):
+        if not 0 <= options['worker'] < options['workers'] <= PARTITIONS:
+            raise CommandError(f'--worker must be between 0 and --workers - 1, and --workers at most {PARTITIONS}.')
+        sink_options = {key: options[key] for key in ('path', 'url') if options[key]}
+        sink = get_sink(options['sink'], **sink_options)
+        # كل relay مسؤول عن partitions ثابتة، فأحداث نفس الـ aggregate بتروح لنفس الـ relay بالترتيب
+        partitions = None
+        if options['workers'] > 1:
+            partitions = [p for p in range(PARTITIONS) if p % options['workers'] == options['worker']]
+
+        self.stopping = False
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGINT, self._stop)
+
+        published = 0
+        while not self.stopping:
+            close_old_connections()
+            try:
+                count = relay_batch(sink, partitions=partitions, batch_size=options['batch_size'])
+            except Exception as exc:
+                self.stderr.write(f'Sink failed: {exc}')
+                if options['once']:
+                    break
+                time.sleep(options['sleep'])
+                continue
+            published += count
+            if not count:
+                if options['once']:
+                    break
+                time.sleep(options['sleep'])
+
+        self.stdout.write(self.style.SUCCESS(f'Published {published} outbox events.'))
+
+    def _stop(self, signum, frame):
+        self.stopping = True
@@ -0,0 +1,50 @@
+import os
+import signal
+import socket
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from core.taskqueue import claim, run_task, requeue_stale
+
+
+class Command(BaseCommand):
+    help = 'Run a background worker that executes queued tasks. Start several processes to scale out.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=10, help='Tasks claimed per poll.')
+        parser.add_argument('--sleep', type=float, default=1.0, help='Seconds to wait when the queue is empty.')
+        parser.add_argument('--max-tasks', type=int, default=None, help='Exit after running this many tasks.')
+        parser.add_argument('--once', action='store_true', help='Drain the queue once and exit.')
+
+    def handle(self, *args, **options):
+        worker_id = f'{socket.gethostname()}:{os.getpid()}'
+        self.stopping = False
+        # SIGTERM/SIGINT: كمل الشغلانة الحالية واقفل
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGINT, self._stop)
+        self.stdout.write(f'Worker {worker_id} started.')
+
+        done = failed = 0
+        while not self.stopping:
+            close_old_connections()
+            requeue_stale()
+            tasks = claim(worker_id, batch_size=options['batch_size'])
+            if not tasks:
+                if options['once']:
+                    break
+                time.sleep(options['sleep'])
+                continue
+            for task_row in tasks:
+                if run_task(task_row):
+                    done += 1
+                else:
+                    failed += 1
+            if options['max_tasks'] and done + failed >= options['max_tasks']:
+                break
+
+        self.stdout.write(self.style.SUCCESS(f'Worker {worker_id} stopped: {done} done, {failed} failed.'))
+
+    def _stop(self, signum, frame):
+        self.stopping = True
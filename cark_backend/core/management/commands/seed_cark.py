@@ -0,0 +1,54 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.seeding import SEED_PASSWORD, Seeder
+
+
+def count(value):
+    # بيقبل 1e5 و 200000
+    number = float(value)
+    if number < 0 or not number.is_integer():
+        raise ValueError(value)
+    return int(number)
+
+
+class Command(BaseCommand):
+    help = 'Generate synthetic users, cars, rentals and documents at production scale.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=count, default=1000)
+        parser.add_argument('--cars', type=count, default=None, help='default: same as --users')
+        parser.add_argument('--rentals', type=count, default=None, help='default: 5 x --cars')
+        parser.add_argument('--documents', type=count, default=None, help='default: --users / 2')
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--password', default=SEED_PASSWORD)
+
+    def handle(self, *args, **options):
+        users = options['users']
+        cars = options['cars'] if options['cars'] is not None else users
+        rentals = options['rentals'] if options['rentals'] is not None else cars * 5
+        documents = options['documents'] if options['documents'] is not None else users // 2
+        if users < 1 or (rentals and cars < 1):
+            raise CommandError('At least one user is required, and at least one car when seeding rentals.')
+
+        started = time.perf_counter()
+        last_report = [started]
+
+        def progress(model, rows):
+            now = time.perf_counter()
+            if now - last_report[0] >= 5:
+                last_report[0] = now
+                self.stdout.write(f'  {model}: {rows}')
+
+        seeder = Seeder(random_seed=options['seed'], batch_size=options['batch_size'],
+                        password=options['password'], progress=progress if options['verbosity'] > 1 else None)
+        counts = seeder.run(users, cars, rentals, documents)
+        elapsed = time.perf_counter() - started
+        total = sum(counts.values())
+        for model, rows in counts.items():
+            self.stdout.write(f'{model:<22}{rows:>12}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Seeded {total} rows in {elapsed:.1f}s ({total / elapsed:,.0f} rows/s).'
+        ))
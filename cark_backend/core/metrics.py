@@ -0,0 +1,245 @@
+"""
+Registry بسيط للـ metrics (counters و histograms) بصيغة Prometheus text على /metrics.
+
+كل gunicorn worker بيجمع القيم في الذاكرة، ولو METRICS_DIR متحدد بيكتب snapshot
+في ملف باسم الـ pid كل METRICS_FLUSH_SECONDS، والـ /metrics بيجمع كل الملفات
+فالأرقام بتبقى للسيرفر كله مش للـ worker اللي رد على الطلب.
+الملفات بتفضل بعد ما الـ worker يقفل (الـ counters ماينفعش تقل)، فالمجلد يتمسح عند كل deploy.
+من غير METRICS_DIR والسيرفر شغال بأكتر من worker، الـ /metrics بيرجع 503 بدل أرقام worker واحد.
+"""
+import atexit
+import json
+import math
+import os
+import shlex
+import sys
+import threading
+import time
+
+from django.conf import settings
+from django.db import transaction
+
+METRICS_DIR = getattr(settings, 'METRICS_DIR', None)
+FLUSH_SECONDS = getattr(settings, 'METRICS_FLUSH_SECONDS', 5)
+
+# حدود الـ histogram بالثواني (مناسبة لزمن استجابة الـ API)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(pairs):
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _format_value(value):
+    if value == math.inf:
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Metric:
+    kind = None
+
+    def __init__(self, registry, name, documentation, labelnames=()):
+        self.registry = registry
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.values = {}
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f'{self.name} expects labels {self.labelnames}, got {tuple(labels)}.')
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def snapshot(self):
+        return [[list(key), list(value) if isinstance(value, list) else value] for key, value in self.values.items()]
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self.registry.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+        self.registry.maybe_flush()
+
+    def inc_on_commit(self, amount=1, **labels):
+        """
+        الزيادة بعد الـ commit بس، عشان العمليات اللي اترجعت ماتتحسبش.
+        """
+        self._key(labels)
+        transaction.on_commit(lambda: self.inc(amount, **labels))
+
+    @staticmethod
+    def merge(target, value):
+        return (target or 0) + value
+
+    def samples(self, key, value):
+        yield self.name + '_total', list(zip(self.labelnames, key)), value
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, registry, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(registry, name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self.registry.lock:
+            # [عدد كل bucket (مش تراكمي)..., عدد اللي فوق آخر bucket, المجموع]
+            state = self.values.get(key)
+            if state is None:
+                self.values[key] = state = [0] * (len(self.buckets) + 1) + [0.0]
+            index = len(self.buckets)
+            for position, bound in enumerate(self.buckets):
+                if value <= bound:
+                    index = position
+                    break
+            state[index] += 1
+            state[-1] += value
+        self.registry.maybe_flush()
+
+    @staticmethod
+    def merge(target, value):
+        if target is None:
+            return list(value)
+        return [left + right for left, right in zip(target, value)]
+
+    def samples(self, key, value):
+        labels = list(zip(self.labelnames, key))
+        cumulative = 0
+        for bound, count in zip(self.buckets + (math.inf,), value[:-1]):
+            cumulative += count
+            yield self.name + '_bucket', labels + [('le', _format_value(bound))], cumulative
+        yield self.name + '_sum', labels, value[-1]
+        yield self.name + '_count', labels, cumulative
+
+
+class Registry:
+    def __init__(self, directory=None):
+        self.directory = directory
+        self.lock = threading.RLock()
+        self.metrics = {}
+        self._last_flush = 0.0
+
+    def _register(self, cls, name, documentation, labelnames, **options):
+        with self.lock:
+            metric = self.metrics.get(name)
+            if metric is None:
+                metric = self.metrics[name] = cls(self, name, documentation, labelnames, **options)
+            elif not isinstance(metric, cls) or metric.labelnames != tuple(labelnames):
+                raise ValueError(f'Metric {name} is already registered with a different type or labels.')
+            return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._register(Counter, name, documentation, labelnames)
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def snapshot(self):
+        with self.lock:
+            return {name: metric.snapshot() for name, metric in self.metrics.items()}
+
+    def _path(self, pid=None):
+        return os.path.join(self.directory, f'metrics_{pid or os.getpid()}.json')
+
+    def flush(self):
+        if not self.directory:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path()
+        temporary = f'{path}.tmp'
+        with self.lock:
+            with open(temporary, 'w') as handle:
+                json.dump(self.snapshot(), handle)
+            # os.replace عشان اللي بيقرا مايشوفش ملف نصه مكتوب
+            os.replace(temporary, path)
+            self._last_flush = time.monotonic()
+
+    def maybe_flush(self):
+        if self.directory and time.monotonic() - self._last_flush >= FLUSH_SECONDS:
+            self.flush()
+
+    def _snapshots(self):
+        yield self.snapshot()
+        if not self.directory or not os.path.isdir(self.directory):
+            return
+        own = os.path.basename(self._path())
+        for filename in os.listdir(self.directory):
+            if filename == own or not (filename.startswith('metrics_') and filename.endswith('.json')):
+                continue
+            try:
+                with open(os.path.join(self.directory, filename)) as handle:
+                    yield json.load(handle)
+            except (OSError, ValueError):
+                # ملف worker بيتكتب أو اتمسح دلوقتي
+                continue
+
+    def collect(self):
+        """
+        القيم مجمعة من كل الـ workers. return: {name: {label key tuple: value}}
+        """
+        merged = {name: {} for name in self.metrics}
+        for snapshot in self._snapshots():
+            for name, values in snapshot.items():
+                metric = self.metrics.get(name)
+                if metric is None:
+                    continue
+                for key, value in values:
+                    key = tuple(key)
+                    merged[name][key] = metric.merge(merged[name].get(key), value)
+        return merged
+
+    def render(self):
+        lines = []
+        for name, values in sorted(self.collect().items()):
+            metric = self.metrics[name]
+            lines.append(f'# HELP {name} {metric.documentation}')
+            lines.append(f'# TYPE {name} {metric.kind}')
+            for key in sorted(values):
+                for sample, labels, value in metric.samples(key, values[key]):
+                    lines.append(f'{sample}{_format_labels(labels)} {_format_value(value)}')
+        return '\n'.join(lines) + '\n'
+
+
+def configured_workers(argv=None, env=None):
+    """
+    عدد الـ workers اللي السيرفر متشغل بيه (--workers / -w في أمر gunicorn أو GUNICORN_CMD_ARGS
+    أو WEB_CONCURRENCY). الـ workers بيتعملوا fork من الـ arbiter فالـ argv بتاعه متاح فيهم.
+    """
+    argv = sys.argv if argv is None else argv
+    env = os.environ if env is None else env
+    args = list(argv) + shlex.split(env.get('GUNICORN_CMD_ARGS', ''))
+    for index, arg in enumerate(args):
+        value = None
+        if arg in ('--workers', '-w') and index + 1 < len(args):
+            value = args[index + 1]
+        elif arg.startswith('--workers='):
+            value = arg.split('=', 1)[1]
+        if value is not None and value.isdigit():
+            return int(value)
+    concurrency = env.get('WEB_CONCURRENCY', '')
+    return int(concurrency) if concurrency.isdigit() else 1
+
+
+registry = Registry(METRICS_DIR)
+atexit.register(registry.flush)
+
+REQUEST_LATENCY = registry.histogram(
+    'cark_http_request_duration_seconds', 'API request latency by route.', ('method', 'route', 'status'),
+)
+CACHE_LOOKUPS = registry.counter(
+    'cark_cache_lookups', 'Cache lookups by cache name and result (hit/miss).', ('cache', 'result'),
+)
@@ -0,0 +1,277 @@
+import asyncio
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.http import JsonResponse
+from django.utils.cache import patch_vary_headers
+
+from . import compression, idempotency, instrumentation, metrics
+from .routers import use_replica
+
+IDEMPOTENCY_HEADER = 'HTTP_IDEMPOTENCY_KEY'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS', 'TRACE')
+
+# بعد أي كتابة، قراءات المستخدم بتروح للـ primary المدة دي (أكبر من أقصى تأخير مسموح للـ replica)
+READ_PRIMARY_COOKIE = 'read_primary'
+READ_PRIMARY_HEADER = 'HTTP_X_READ_PRIMARY'
+READ_PRIMARY_SECONDS = getattr(settings, 'REPLICA_STICKY_SECONDS', 10)
+
+
+class MetricsMiddleware:
+    """
+    زمن كل طلب في histogram بالـ route pattern (مش الـ path نفسه عشان عدد الـ labels مايكبرش).
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def _observe(self, request, response, started):
+        match = getattr(request, 'resolver_match', None)
+        metrics.REQUEST_LATENCY.observe(
+            time.perf_counter() - started,
+            method=request.method,
+            route=match.route if match is not None else 'unmatched',
+            status=response.status_code,
+        )
+        return response
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        started = time.perf_counter()
+        return self._observe(request, self.get_response(request), started)
+
+    async def __acall__(self, request):
+        started = time.perf_counter()
+        return self._observe(request, await self.get_response(request), started)
+
+
+class QueryInstrumentationMiddleware:
+    """
+    عدد الاستعلامات ووقت الـ DB والـ serializers لكل طلب في header "Server-Timing"
+    (بيظهر في تاب Network في المتصفح)، والطلبات البطيئة أو اللي فيها N+1 بتتسجل في الـ log
+    بأشكال الاستعلامات المسؤولة (core.instrumentation). مقفول في الـ production إلا بـ QUERY_INSTRUMENTATION،
+    ووقت الـ serializers بيتحسب في الـ ViewSets اللي فيها SerializerTimingMixin.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def _finish(self, request, response, stats):
+        if instrumentation.SERVER_TIMING:
+            response['Server-Timing'] = stats.server_timing()
+        instrumentation.report(request, response, stats)
+        return response
+
+    def __call__(self, request):
+        if not instrumentation.ENABLED:
+            return self.get_response(request)
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with instrumentation.collect() as stats:
+            response = self.get_response(request)
+        return self._finish(request, response, stats)
+
+    async def __acall__(self, request):
+        with instrumentation.collect() as stats:
+            response = await self.get_response(request)
+        return self._finish(request, response, stats)
+
+
+class CompressionMiddleware:
+    """
+    ضغط الـ responses الكبيرة بـ brotli أو gzip حسب Accept-Encoding (core.compression).
+    لازم يبقى قبل أي middleware بيقرا الـ content (IdempotencyKeyMiddleware بيحفظ النسخة غير المضغوطة).
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def _compress(self, request, response):
+        if (
+            response.streaming
+            or response.has_header('Content-Encoding')
+            or len(response.content) < compression.MIN_BYTES
+            or not compression.is_compressible(response)
+        ):
+            return response
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = compression.choose_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if encoding is None:
+            return response
+        compressed = compression.compress(response.content, encoding)
+        if len(compressed) >= len(response.content):
+            return response
+        response.content = compressed
+        response['Content-Length'] = str(len(compressed))
+        response['Content-Encoding'] = encoding
+        # البايتات اتغيرت فالـ ETag القوي بقى weak (زي GZipMiddleware بتاع Django)
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        return response
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self._compress(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self._compress(request, await self.get_response(request))
+
+
+class ReplicaRoutingMiddleware:
+    """
+    طلبات القراءة (GET/HEAD/...) بتتقري من الـ replicas (core.routers.ReplicaRouter)،
+    إلا لو المستخدم كتب حاجة قريب:
+    - بعد أي طلب كتابة ناجح بيرجع cookie "read_primary" وheader "X-Read-Primary-For"
+    - طول ما الـ cookie موجودة أو العميل باعت "X-Read-Primary: 1" القراءة من الـ primary
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def _reads_from_replica(self, request):
+        return (
+            request.method in SAFE_METHODS
+            and READ_PRIMARY_COOKIE not in request.COOKIES
+            and request.META.get(READ_PRIMARY_HEADER) != '1'
+        )
+
+    def _stick_to_primary(self, request, response):
+        if request.method not in SAFE_METHODS and response.status_code < 400:
+            response.set_cookie(READ_PRIMARY_COOKIE, '1', max_age=READ_PRIMARY_SECONDS, httponly=True, samesite='Lax')
+            response['X-Read-Primary-For'] = str(READ_PRIMARY_SECONDS)
+        return response
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with use_replica(self._reads_from_replica(request)):
+            response = self.get_response(request)
+        return self._stick_to_primary(request, response)
+
+    async def __acall__(self, request):
+        with use_replica(self._reads_from_replica(request)):
+            response = await self.get_response(request)
+        return self._stick_to_primary(request, response)
+
+
+class IdempotencyKeyMiddleware:
+    """
+    طلبات POST/PUT/PATCH/DELETE على الحجوزات والمدفوعات اللي معاها Idempotency-Key:
+    - أول مرة: الـ view بيتنفذ والـ response بيتحفظ
+    - retry بنفس المفتاح ونفس الطلب: الـ response المحفوظ بيرجع من غير تنفيذ
+    - retry والطلب الأصلي لسه شغال: بيستنى شوية وبعدين 409
+    - نفس المفتاح بطلب مختلف: 422
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def _key(self, request):
+        key = request.META.get(IDEMPOTENCY_HEADER)
+        if not key or request.method in SAFE_METHODS or not request.path.startswith(idempotency.PATH_PREFIXES):
+            return None
+        return key
+
+    def _check(self, record, owner, fingerprint, deadline):
+        """
+        return: (response, wait) و response=None و wait=False معناه الطلب ده هو اللي ينفذ
+        """
+        if owner:
+            return None, False
+        if record.fingerprint != fingerprint:
+            return JsonResponse(
+                {'error': 'Idempotency-Key was already used with a different request.'}, status=422,
+            ), False
+        if record.status_code is not None:
+            return idempotency.replay(record), False
+        if time.monotonic() >= deadline:
+            return JsonResponse(
+                {'error': 'A request with this Idempotency-Key is still in progress.'}, status=409,
+            ), False
+        return None, True
+
+    def _finish(self, record, response):
+        if response.status_code >= 500 or response.streaming:
+            idempotency.release(record)
+        else:
+            idempotency.store(record, response)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        key = self._key(request)
+        if key is None:
+            return self.get_response(request)
+        if len(key) > idempotency.MAX_KEY_LENGTH:
+            return JsonResponse({'error': 'Idempotency-Key is too long.'}, status=400)
+
+        scope = idempotency.request_scope(request)
+        fingerprint = idempotency.request_fingerprint(request)
+        deadline = time.monotonic() + idempotency.WAIT_SECONDS
+        while True:
+            record, owner = idempotency.acquire(scope, key, fingerprint)
+            response, wait = self._check(record, owner, fingerprint, deadline)
+            if response is not None:
+                return response
+            if not wait:
+                break
+            time.sleep(idempotency.POLL_INTERVAL_SECONDS)
+
+        try:
+            response = self.get_response(request)
+        except Exception:
+            idempotency.release(record)
+            raise
+        self._finish(record, response)
+        return response
+
+    async def __acall__(self, request):
+        key = self._key(request)
+        if key is None:
+            return await self.get_response(request)
+        if len(key) > idempotency.MAX_KEY_LENGTH:
+            return JsonResponse({'error': 'Idempotency-Key is too long.'}, status=400)
+
+        scope = idempotency.request_scope(request)
+        fingerprint = idempotency.request_fingerprint(request)
+        deadline = time.monotonic() + idempotency.WAIT_SECONDS
+        while True:
+            record, owner = await sync_to_async(idempotency.acquire)(scope, key, fingerprint)
+            response, wait = self._check(record, owner, fingerprint, deadline)
+            if response is not None:
+                return response
+            if not wait:
+                break
+            await asyncio.sleep(idempotency.POLL_INTERVAL_SECONDS)
+
+        try:
+            response = await self.get_response(request)
+        except Exception:
+            await sync_to_async(idempotency.release)(record)
+            raise
+        await sync_to_async(self._finish)(record, response)
+        return response
@@ -0,0 +1,111 @@
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+
+
+class IdempotencyKey(models.Model):
+    """
+    طلب اتبعت بـ Idempotency-Key. الصف بيتعمل قبل تنفيذ الـ view (وده نفسه القفل)
+    وبعد التنفيذ بيتحفظ فيه الـ response عشان أي retry يرجعله من غير ما يتنفذ تاني.
+    """
+    # hash للمستخدم (أو IP العميل) + method + path، عشان نفس المفتاح من عميلين مختلفين مايتلخبطش
+    scope = models.CharField(max_length=64)
+    key = models.CharField(max_length=255)
+    # hash للـ method + path + body
+    fingerprint = models.CharField(max_length=64)
+    # None طول ما الطلب الأصلي لسه شغال
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    content_type = models.CharField(max_length=100, blank=True, default='')
+    # الـ body مضغوط (zlib)
+    body = models.BinaryField(blank=True, default=b'')
+    locked_at = models.DateTimeField()
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['scope', 'key'], name='idempotency_scope_key_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.key} ({self.status_code or 'in progress'})"
+
+
+class Task(models.Model):
+    """
+    شغلانة مؤجلة في طابور الـ background jobs (core.taskqueue).
+    الـ workers بيسحبوا الشغلانات بـ SELECT ... FOR UPDATE SKIP LOCKED.
+    """
+    QUEUED = 'Queued'
+    RUNNING = 'Running'
+    DONE = 'Done'
+    FAILED = 'Failed'
+
+    STATUS_CHOICES = [
+        (QUEUED, 'Queued'),
+        (RUNNING, 'Running'),
+        (DONE, 'Done'),
+        (FAILED, 'Failed'),
+    ]
+
+    name = models.CharField(max_length=150)
+    args = models.JSONField(default=list, blank=True)
+    kwargs = models.JSONField(default=dict, blank=True)
+    # الأعلى بيتنفذ الأول
+    priority = models.SmallIntegerField(default=0)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=QUEUED)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=5)
+    # مش هتتنفذ قبل الوقت ده (للتأجيل وللـ backoff بعد الفشل)
+    run_at = models.DateTimeField()
+    locked_by = models.CharField(max_length=100, blank=True, default='')
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', '-priority', 'run_at'], name='task_claim_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.name} #{self.pk} ({self.status})"
+
+
+class OutboxEvent(models.Model):
+    """
+    حدث (domain event) بيتكتب في نفس الـ transaction اللي فيها التغيير (core.outbox.emit)
+    والـ relay (relay_outbox) بيبعته للـ sinks بعدين بترتيب الـ id لكل aggregate.
+    """
+    aggregate_type = models.CharField(max_length=30)
+    aggregate_id = models.CharField(max_length=64)
+    event_type = models.CharField(max_length=60)
+    payload = models.JSONField(default=dict, blank=True, encoder=DjangoJSONEncoder)
+    # كل aggregate ليه partition ثابت، فكل relay شغال على partitions مختلفة بيحافظ على الترتيب
+    partition = models.PositiveSmallIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    published_at = models.DateTimeField(null=True, blank=True)
+    # الحدث محجوز لـ relay بيبعته لحد الوقت ده؛ لو الـ relay مات الحجز بينتهي ويتبعت تاني
+    locked_until = models.DateTimeField(null=True, blank=True)
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True, default='')
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['published_at', 'partition', 'id'], name='outbox_pending_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.event_type} {self.aggregate_type}#{self.aggregate_id}"
+
+
+class PubSubMessage(models.Model):
+    """
+    رسالة pub/sub بين الـ processes (core.pubsub.DatabaseBroker). كل process فيه مشتركين
+    بيقرا الرسايل الجديدة بالـ id ويسلمها لهم، والرسايل بتتمسح بعد PUBSUB_RETENTION_SECONDS.
+    """
+    channel = models.CharField(max_length=150)
+    payload = models.JSONField(encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return f"{self.channel} #{self.pk}"
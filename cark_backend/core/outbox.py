@@ -0,0 +1,130 @@
+import json
+import zlib
+from datetime import timedelta
+from urllib import request as urllib_request
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import OutboxEvent
+
+PARTITIONS = getattr(settings, 'OUTBOX_PARTITIONS', 16)
+DEFAULT_SINK = getattr(settings, 'OUTBOX_SINK', 'core.outbox.FileSink')
+DEFAULT_SINK_OPTIONS = getattr(settings, 'OUTBOX_SINK_OPTIONS', {})
+# مدة حجز الدفعة لـ relay واحد؛ لازم تكون أطول من timeout الـ sink
+LOCK_SECONDS = getattr(settings, 'OUTBOX_LOCK_SECONDS', 60)
+
+
+def partition_for(aggregate_type, aggregate_id):
+    return zlib.crc32(f'{aggregate_type}:{aggregate_id}'.encode()) % PARTITIONS
+
+
+def emit(aggregate_type, aggregate_id, event_type, payload=None):
+    """
+    تسجيل domain event في الـ outbox. لازم تتنادى جوه نفس الـ transaction.atomic()
+    اللي فيها التغيير، فالحدث والتغيير يا يتحفظوا مع بعض يا لأ.
+    """
+    return OutboxEvent.objects.create(
+        aggregate_type=aggregate_type,
+        aggregate_id=str(aggregate_id),
+        event_type=event_type,
+        payload=payload or {},
+        partition=partition_for(aggregate_type, aggregate_id),
+    )
+
+
+def serialize_event(event):
+    return {
+        'id': event.id,
+        'aggregate_type': event.aggregate_type,
+        'aggregate_id': event.aggregate_id,
+        'event_type': event.event_type,
+        'payload': event.payload,
+        'occurred_at': event.created_at,
+    }
+
+
+class FileSink:
+    """
+    كتابة الأحداث في ملف JSON lines (سطر لكل حدث).
+    """
+
+    def __init__(self, path='outbox_events.jsonl'):
+        self.path = path
+
+    def publish(self, events):
+        with open(self.path, 'a', encoding='utf-8') as f:
+            for event in events:
+                f.write(json.dumps(event, cls=DjangoJSONEncoder, ensure_ascii=False) + '\n')
+
+
+class HttpSink:
+    """
+    إرسال الدفعة كـ POST واحد {"events": [...]}. أي status غير 2xx يعتبر فشل والدفعة تتعاد.
+    """
+
+    def __init__(self, url='http://127.0.0.1:8765/events', timeout=5):
+        self.url = url
+        self.timeout = timeout
+
+    def publish(self, events):
+        body = json.dumps({'events': events}, cls=DjangoJSONEncoder).encode()
+        req = urllib_request.Request(self.url, data=body, headers={'Content-Type': 'application/json'}, method='POST')
+        with urllib_request.urlopen(req, timeout=self.timeout) as response:
+            if not 200 <= response.status < 300:
+                raise IOError(f'Sink responded with {response.status}.')
+
+
+def get_sink(sink_path=None, **options):
+    return import_string(sink_path or DEFAULT_SINK)(**(options or DEFAULT_SINK_OPTIONS))
+
+
+def _claim(partitions, batch_size):
+    """
+    حجز دفعة في transaction قصيرة: locked_until و attempts بيتحدثوا والقفل بيتفك قبل الإرسال.
+    الـ partitions اللي فيها دفعة لسه محجوزة بتتساب، فمفيش حدث لـ aggregate بيتبعت قبل حدث قبله.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        pending = OutboxEvent.objects.filter(published_at__isnull=True)
+        if partitions is not None:
+            pending = pending.filter(partition__in=partitions)
+        busy = set(pending.filter(locked_until__gt=now).values_list('partition', flat=True).distinct())
+        events = list(
+            pending.select_for_update()
+            .filter(Q(locked_until__isnull=True) | Q(locked_until__lte=now))
+            .exclude(partition__in=busy)
+            .order_by('id')[:batch_size]
+        )
+        # relay تاني ممكن يكون حجز نفس الصفوف واحنا مستنيين القفل
+        events = [event for event in events if event.locked_until is None or event.locked_until <= now]
+        if events:
+            OutboxEvent.objects.filter(id__in=[event.id for event in events]).update(
+                locked_until=now + timedelta(seconds=LOCK_SECONDS), attempts=F('attempts') + 1,
+            )
+    return events
+
+
+def relay_batch(sink, partitions=None, batch_size=500):
+    """
+    إرسال دفعة من الأحداث اللي لسه ماتبعتتش بترتيب الـ id.
+    الدفعة بتتحجز الأول (_claim) والإرسال للـ sink بيحصل برا أي transaction، وبعده الأحداث
+    بتتعلم إنها اتبعتت. لو الـ sink فشل الحجز بيتلغي والدفعة كلها بتتعاد في اللفة الجاية.
+    الإرسال at-least-once: لو الـ relay مات بعد الإرسال الدفعة بتتبعت تاني بعد LOCK_SECONDS.
+    return: عدد الأحداث اللي اتبعتت
+    """
+    events = _claim(partitions, batch_size)
+    if not events:
+        return 0
+    ids = [event.id for event in events]
+    try:
+        sink.publish([serialize_event(event) for event in events])
+    except Exception as exc:
+        OutboxEvent.objects.filter(id__in=ids).update(locked_until=None, last_error=str(exc)[:1000])
+        raise
+    OutboxEvent.objects.filter(id__in=ids).update(published_at=timezone.now(), locked_until=None)
+    return len(events)
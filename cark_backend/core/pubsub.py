@@ -0,0 +1,176 @@
+import asyncio
+import logging
+import threading
+import time
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import Max
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+# أقصى عدد رسايل مستنية لكل مشترك؛ لو العميل بطيء أقدم رسالة بتتشال
+SUBSCRIBER_QUEUE_SIZE = getattr(settings, 'PUBSUB_QUEUE_SIZE', 100)
+# DatabaseBroker: كل قد إيه كل process بيقرا الرسايل الجديدة، وأقصى عدد في المرة
+POLL_SECONDS = getattr(settings, 'PUBSUB_POLL_SECONDS', 1.0)
+POLL_BATCH_SIZE = getattr(settings, 'PUBSUB_POLL_BATCH_SIZE', 500)
+# الرسايل الأقدم من كده بتتمسح (المشترك اللي فاته حاجة بياخد snapshot من جديد)
+RETENTION_SECONDS = getattr(settings, 'PUBSUB_RETENTION_SECONDS', 300)
+
+
+class Subscription:
+    """
+    اشتراك مشترك واحد (اتصال SSE مثلاً) في channel. الرسايل بتتقرا بـ await subscription.get().
+    """
+
+    def __init__(self, broker, channel, loop):
+        self.broker = broker
+        self.channel = channel
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        # True لو رسايل اتشالت عشان الطابور اتملى، فالعميل محتاج يعمل resync
+        self.overflowed = False
+
+    def deliver(self, message):
+        # بتتنفذ جوه الـ event loop بتاع المشترك
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.overflowed = True
+        self.queue.put_nowait(message)
+
+    async def get(self, timeout=None):
+        return await asyncio.wait_for(self.queue.get(), timeout)
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class InProcessBroker:
+    """
+    pub/sub جوه نفس الـ process. الـ publish ممكن يتنادى من أي thread (views sync أو on_commit)
+    والرسالة بتتسلم للمشتركين في الـ event loop بتاعهم.
+    بيشتغل بس لو كل الـ publishers والمشتركين في process واحدة (runserver)؛
+    غير كده DatabaseBroker بنفس الـ interface: subscribe(channel) و unsubscribe(subscription) و publish(channel, message).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = defaultdict(set)
+
+    def subscribe(self, channel):
+        subscription = Subscription(self, channel, asyncio.get_running_loop())
+        with self._lock:
+            self._subscribers[channel].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.channel)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.channel]
+
+    def publish(self, channel, message):
+        with self._lock:
+            subscribers = list(self._subscribers.get(channel, ()))
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.deliver, message)
+            except RuntimeError:
+                # الـ loop اتقفل والاتصال مات
+                self.unsubscribe(subscription)
+        return len(subscribers)
+
+
+class DatabaseBroker(InProcessBroker):
+    """
+    pub/sub بين الـ processes (الـ web workers و runworker) من غير broker خارجي:
+    publish بيكتب صف في PubSubMessage، وكل process فيها مشتركين عندها thread واحد بيقرا
+    الصفوف الجديدة (id > آخر id اتقرا) كل POLL_SECONDS ويسلمها للمشتركين المحليين.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._poller = None
+        self._started_at = None
+        self._cursor = None
+        self._cleaned_at = 0.0
+
+    def subscribe(self, channel):
+        subscription = super().subscribe(channel)
+        if self._poller is None:
+            with self._lock:
+                if self._poller is None:
+                    self._started_at = timezone.now()
+                    self._poller = threading.Thread(target=self._run, name='pubsub-poller', daemon=True)
+                    self._poller.start()
+        return subscription
+
+    def publish(self, channel, message):
+        from .models import PubSubMessage
+        PubSubMessage.objects.create(channel=channel, payload=message)
+
+    def _run(self):
+        from .models import PubSubMessage
+        while True:
+            try:
+                close_old_connections()
+                if self._cursor is None:
+                    # الرسايل اللي قبل أول اشتراك مش بتاعتنا (والـ thread ممكن يبدأ بعد الاشتراك بشوية)
+                    self._cursor = PubSubMessage.objects.filter(
+                        created_at__lt=self._started_at,
+                    ).aggregate(last=Max('id'))['last'] or 0
+                self.poll()
+                self._cleanup()
+            except Exception:
+                logger.exception('pubsub poll failed')
+            time.sleep(POLL_SECONDS)
+
+    def poll(self):
+        """
+        تسليم الرسايل الجديدة للمشتركين في الـ process دي. return: عدد الرسايل
+        """
+        from .models import PubSubMessage
+        with self._lock:
+            channels = list(self._subscribers)
+        rows = list(
+            PubSubMessage.objects.filter(id__gt=self._cursor)
+            .order_by('id').values_list('id', 'channel', 'payload')[:POLL_BATCH_SIZE]
+        )
+        for message_id, channel, payload in rows:
+            if channel in channels:
+                super().publish(channel, payload)
+            self._cursor = message_id
+        return len(rows)
+
+    def _cleanup(self):
+        from .models import PubSubMessage
+        now = time.monotonic()
+        if now - self._cleaned_at < RETENTION_SECONDS:
+            return
+        self._cleaned_at = now
+        PubSubMessage.objects.filter(created_at__lt=timezone.now() - timedelta(seconds=RETENTION_SECONDS)).delete()
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    # السيرفر شغال بكذا process (Procfile)، فالـ default لازم يعدي بينهم. InProcessBroker
+    # بيتحدد بـ PUBSUB_BACKEND بس لو كل حاجة في process واحدة
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                _broker = import_string(getattr(settings, 'PUBSUB_BACKEND', 'core.pubsub.DatabaseBroker'))()
+    return _broker
+
+
+def publish(channel, message):
+    return get_broker().publish(channel, message)
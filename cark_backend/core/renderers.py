@@ -0,0 +1,41 @@
+"""
+JSON renderer بـ orjson (أسرع بكتير من json بتاع الـ stdlib في القوايم الكبيرة).
+orjson اختياري: لو مش متسطب الـ renderer بيشتغل زي JSONRenderer بتاع DRF بالظبط.
+
+date و datetime و UUID بيتعملوا في orjson نفسه، و Decimal وباقي الأنواع
+(lazy strings، QuerySet، timedelta ...) بتروح لنفس الـ encoder بتاع DRF فالشكل مايتغيرش.
+"""
+from django.http import HttpResponse
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+_default = JSONEncoder().default
+
+
+class ORJSONRenderer(JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None:
+            return super().render(data, accepted_media_type, renderer_context)
+        if data is None:
+            return b''
+        options = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS
+        # orjson بيدعم indent=2 بس، فأي indent مطلوب (زي ?format=api) بيبقى 2
+        if self.get_indent(accepted_media_type, renderer_context or {}):
+            options |= orjson.OPT_INDENT_2
+        ret = orjson.dumps(data, default=_default, option=options)
+        # زي DRF: \u2028 و \u2029 بيتعملهم escape عشان الـ JSON يبقى JavaScript صالح
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
+
+
+def json_response(data, status=200):
+    """
+    بديل JsonResponse للـ views اللي برا DRF (زي الـ async views) بنفس الـ renderer.
+    """
+    return HttpResponse(ORJSONRenderer().render(data), status=status, content_type='application/json')
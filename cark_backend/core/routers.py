@@ -0,0 +1,99 @@
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+
+PRIMARY = 'default'
+# replica متأخرة أكتر من كده عن الـ primary مابتتقريش منها
+MAX_LAG_SECONDS = getattr(settings, 'REPLICA_MAX_LAG_SECONDS', 5)
+# نتيجة فحص التأخير بتتخزن المدة دي عشان مايبقاش في query زيادة مع كل قراءة
+LAG_CHECK_INTERVAL_SECONDS = getattr(settings, 'REPLICA_LAG_CHECK_INTERVAL_SECONDS', 5)
+
+# True بس جوه طلب قراءة (ReplicaRoutingMiddleware) أو use_replica()؛ أي حاجة تانية
+# (workers، management commands، طلبات الكتابة) بتقرا من الـ primary
+_read_from_replica = ContextVar('read_from_replica', default=False)
+_health = {}
+
+
+def replica_aliases():
+    return [alias for alias in settings.DATABASES if alias != PRIMARY]
+
+
+def replica_lag_seconds(alias):
+    """
+    تأخير الـ replica بالثواني، أو None لو مش معروف (الـ replication واقف).
+    غير MySQL (زي SQLite في التطوير) مفيش replication حقيقي فالتأخير صفر.
+    """
+    connection = connections[alias]
+    if connection.vendor != 'mysql':
+        return 0
+    with connection.cursor() as cursor:
+        try:
+            cursor.execute('SHOW REPLICA STATUS')
+        except Exception:
+            # MySQL أقدم من 8.0.22
+            cursor.execute('SHOW SLAVE STATUS')
+        row = cursor.fetchone()
+        if row is None:
+            return None
+        status = dict(zip([column[0] for column in cursor.description], row))
+    return status.get('Seconds_Behind_Source', status.get('Seconds_Behind_Master'))
+
+
+def is_healthy(alias):
+    now = time.monotonic()
+    cached = _health.get(alias)
+    if cached and now - cached[0] < LAG_CHECK_INTERVAL_SECONDS:
+        return cached[1]
+    try:
+        lag = replica_lag_seconds(alias)
+        healthy = lag is not None and lag <= MAX_LAG_SECONDS
+    except Exception:
+        healthy = False
+    _health[alias] = (now, healthy)
+    return healthy
+
+
+@contextmanager
+def use_replica(enabled=True):
+    """
+    تحديد مصدر القراءة لجزء من الكود، مثلاً أمر تقارير: with use_replica(): ...
+    """
+    token = _read_from_replica.set(enabled)
+    try:
+        yield
+    finally:
+        _read_from_replica.reset(token)
+
+
+def use_primary():
+    return use_replica(False)
+
+
+class ReplicaRouter:
+    """
+    القراءة من replica سليمة عشوائية لو مسموح (طلب GET من غير sticky cookie)، والكتابة دايماً على الـ primary.
+    أول كتابة في الطلب بترجع باقي قراءاته للـ primary عشان المستخدم يشوف اللي كتبه.
+    """
+
+    def db_for_read(self, model, **hints):
+        if not _read_from_replica.get():
+            return PRIMARY
+        replicas = [alias for alias in replica_aliases() if is_healthy(alias)]
+        if not replicas:
+            return PRIMARY
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        _read_from_replica.set(False)
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # الـ replicas بتاخد الـ schema من الـ primary عن طريق الـ replication
+        return db == PRIMARY
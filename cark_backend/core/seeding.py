@@ -0,0 +1,402 @@
+"""
+توليد بيانات تجريبية بحجم production (manage.py seed_cark و benchmarks.seed) بتوزيعات قريبة من الواقع:
+- 20% من المستخدمين أصحاب عربيات، وقليل منهم عندهم أساطيل (أغلب العربيات عند أقل الملاك)
+- الأسعار lognormal حوالين سعر الفئة، وموديلات العربيات متركزة حوالين 2019
+- الحجوزات متركزة على العربيات المشهورة، ومدتها أغلبها أيام قليلة
+- الحالة حسب التاريخ: اللي خلصت Finished/Canceled، الجارية Ongoing، والجاية Pending/Confirmed
+- CarStats متسقة مع الحجوزات اللي خلصت (عددها وإجمالي أسعارها)
+- المستندات أغلبها متوافق عليها ومعاها verification أو اتنين بنفس الحالة
+
+السرعة: الـ ids بتتحسب مقدماً (أكبر id + 1) فالـ foreign keys معروفة من غير ما نرجع للقاعدة،
+والصفوف بتتولد tuples جاهزة للقاعدة (أرقام عشرية وتواريخ كـ strings) وبتتكتب بـ executemany
+على دفعات بدل bulk_create، لأن تجهيز كل field في كل object هو اللي بياخد أغلب الوقت هناك.
+الـ signals مقفولة، ومع SQLite الـ PRAGMAs بتتظبط لكتابة سريعة طول مدة التوليد.
+نفس الـ random_seed بيطلع نفس البيانات.
+"""
+import itertools
+import random
+from contextlib import contextmanager
+from datetime import date, timedelta
+
+SEED_PASSWORD = 'bench-pass-123'
+
+CITIES = [
+    # (lat, lng, الوزن)
+    (30.0444, 31.2357, 60),  # القاهرة
+    (30.0131, 31.2089, 20),  # الجيزة
+    (31.2001, 29.9187, 15),  # الإسكندرية
+    (27.2579, 33.8116, 5),   # الغردقة
+]
+BRANDS = [
+    ('Toyota', ('Corolla', 'Yaris', 'Fortuner'), 25),
+    ('Hyundai', ('Elantra', 'Accent', 'Tucson'), 22),
+    ('Kia', ('Cerato', 'Sportage', 'Picanto'), 15),
+    ('Nissan', ('Sunny', 'Sentra', 'Qashqai'), 13),
+    ('Chevrolet', ('Optra', 'Aveo', 'Captiva'), 10),
+    ('Mercedes', ('C180', 'E200', 'GLC'), 8),
+    ('BMW', ('320i', '520i', 'X3'), 7),
+]
+# (الفئة، متوسط سعر اليوم من غير سواق، الوزن)
+CATEGORIES = [
+    ('Economy', 450, 60), ('Luxury', 1800, 10), ('Sports', 2500, 5),
+    ('Off-road', 1100, 10), ('Electric', 1300, 5), ('Other', 600, 10),
+]
+CAR_TYPES = [('Sedan', 45), ('SUV', 25), ('Hatchback', 20), ('Van', 5), ('Coupe', 3), ('Truck', 2)]
+COLORS = ['white', 'black', 'silver', 'grey', 'red', 'blue']
+DOCUMENT_TYPES = [('National ID', 'user'), ('Driving License', 'user'), ('Car License', 'car'), ('Car Insurance', 'car')]
+
+FUTURE_STATUSES = [('Pending', 50), ('Confirmed', 30), ('contractSigned', 20)]
+PAST_STATUSES = [('Finished', 75), ('Canceled', 25)]
+DOCUMENT_STATUSES = [('Approved', 70), ('Pending', 20), ('Rejected', 10)]
+STOP_COUNTS = [(1, 40), (2, 30), (3, 20), (4, 10)]
+
+# pragmas بتقلل الـ fsync أثناء التوليد بس (لو الجهاز وقع في النص القاعدة ممكن تبوظ)
+SQLITE_FAST_PRAGMAS = {'synchronous': 'OFF', 'journal_mode': 'MEMORY', 'temp_store': 'MEMORY', 'cache_size': '-200000'}
+
+
+class Table:
+    """
+    اختيار عشوائي بالأوزان. الـ cum_weights بتتحسب مرة واحدة بدل كل اختيار.
+    """
+
+    def __init__(self, items, weight_index=-1):
+        self.items = items
+        self.cum_weights = list(itertools.accumulate(item[weight_index] for item in items))
+
+    def pick(self, rnd):
+        return rnd.choices(self.items, cum_weights=self.cum_weights)[0]
+
+
+BRAND_TABLE = Table(BRANDS)
+CATEGORY_TABLE = Table(CATEGORIES)
+CAR_TYPE_TABLE = Table(CAR_TYPES)
+CITY_TABLE = Table(CITIES)
+FUTURE_TABLE = Table(FUTURE_STATUSES)
+PAST_TABLE = Table(PAST_STATUSES)
+DOCUMENT_STATUS_TABLE = Table(DOCUMENT_STATUSES)
+STOP_COUNT_TABLE = Table(STOP_COUNTS)
+
+
+def skewed_index(rnd, size, power=2):
+    # أول العناصر بتتختار أكتر بكتير (power أكبر = تركيز أكتر)
+    return min(int(size * rnd.random() ** power), size - 1)
+
+
+def coordinate(value):
+    return f'{value:.6f}'
+
+
+def batched(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        batch = list(itertools.islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+@contextmanager
+def signals_disabled():
+    """
+    إيقاف كل الـ model signals مؤقتاً (زي تحديث حالة المستند بعد كل verification).
+    """
+    from django.db.models import signals
+
+    muted = [
+        signals.pre_init, signals.post_init, signals.pre_save, signals.post_save,
+        signals.pre_delete, signals.post_delete, signals.m2m_changed,
+    ]
+    saved = [(signal, signal.receivers) for signal in muted]
+    for signal in muted:
+        signal.receivers = []
+        signal.sender_receivers_cache.clear()
+    try:
+        yield
+    finally:
+        for signal, receivers in saved:
+            signal.receivers = receivers
+            signal.sender_receivers_cache.clear()
+
+
+@contextmanager
+def fast_writes(connection):
+    """
+    إعدادات كتابة سريعة للـ connection طول مدة التوليد، وبترجع زي ما كانت بعدها.
+    """
+    previous = {}
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            for name, value in SQLITE_FAST_PRAGMAS.items():
+                cursor.execute(f'PRAGMA {name}')
+                previous[name] = cursor.fetchone()[0]
+                cursor.execute(f'PRAGMA {name} = {value}')
+        elif connection.vendor == 'mysql':
+            # الـ ids محسوبة والـ FKs مضمونة، فمفيش داعي للتحقق صف صف
+            cursor.execute('SET unique_checks = 0, foreign_key_checks = 0')
+    try:
+        yield
+    finally:
+        with connection.cursor() as cursor:
+            if connection.vendor == 'sqlite':
+                for name, value in previous.items():
+                    cursor.execute(f'PRAGMA {name} = {value}')
+            elif connection.vendor == 'mysql':
+                cursor.execute('SET unique_checks = 1, foreign_key_checks = 1')
+
+
+
+def _default(field, now):
+    if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False):
+        return now
+    if field.has_default():
+        return field.get_default()
+    if field.null:
+        return None
+    raise ValueError(f'{field.model.__name__}.{field.name} has no default and was not generated.')
+
+
+def bulk_insert(connection, model, columns, rows, batch_size):
+    """
+    INSERT لصفوف جاهزة (tuples بنفس ترتيب columns) بـ executemany.
+    الـ fields اللي مش في columns بتاخد الـ default بتاعها (أو الوقت الحالي لـ auto_now) مرة واحدة لكل الصفوف.
+    return: عدد الصفوف
+    """
+    from django.utils import timezone
+
+    meta = model._meta
+    fields = [meta.get_field(name) for name in columns]
+    names = {field.name for field in fields}
+    rest = [field for field in meta.concrete_fields if field.name not in names and not (field.primary_key and field.auto_created)]
+    now = timezone.now()
+    defaults = tuple(field.get_db_prep_save(_default(field, now), connection) for field in rest)
+    quote = connection.ops.quote_name
+    column_names = ', '.join(quote(field.column) for field in fields + rest)
+    placeholders = ', '.join(['%s'] * (len(fields) + len(rest)))
+    sql = f'INSERT INTO {quote(meta.db_table)} ({column_names}) VALUES ({placeholders})'
+
+    count = 0
+    with connection.cursor() as cursor:
+        for batch in batched(rows, batch_size):
+            if defaults:
+                batch = [row + defaults for row in batch]
+            cursor.executemany(sql, batch)
+            count += len(batch)
+    return count
+
+
+class Seeder:
+    def __init__(self, random_seed=42, batch_size=5000, password=SEED_PASSWORD, progress=None):
+        self.rnd = random.Random(random_seed)
+        self.batch_size = batch_size
+        self.password = password
+        # progress(model_name, rows_so_far) بعد كل دفعة
+        self.progress = progress
+        self.today = date.today()
+        self.counts = {}
+
+    def _next_id(self, model):
+        from django.db.models import Max
+
+        return (model.objects.aggregate(last=Max('pk'))['last'] or 0) + 1
+
+    def _insert(self, model, columns, rows):
+        from django.db import connection
+
+        name = model.__name__
+        self.counts[name] = self.counts.get(name, 0) + bulk_insert(connection, model, columns, rows, self.batch_size)
+        if self.progress:
+            self.progress(name, self.counts[name])
+
+    def run(self, users, cars, rentals, documents=0):
+        """
+        return: {اسم الـ model: عدد الصفوف اللي اتضافت}
+        """
+        from django.db import connection, transaction
+
+        if users < 1 or (rentals and cars < 1):
+            raise ValueError('At least one user is required, and at least one car when seeding rentals.')
+        with signals_disabled(), fast_writes(connection), transaction.atomic():
+            self._users(users)
+            self._cars(cars)
+            self._rentals(rentals)
+            self._car_stats()
+            self._documents(documents)
+            self._reset_sequences()
+        return self.counts
+
+    def _reset_sequences(self):
+        # الـ ids اتكتبت بإيدينا؛ في PostgreSQL الـ sequences لازم تتحدث (MySQL و SQLite بيحدثوها لوحدهم)
+        from django.apps import apps
+        from django.core.management.color import no_style
+        from django.db import connection
+
+        models = [apps.get_model(label) for label in (
+            'users.User', 'cars.Car', 'rentals.Rental', 'rentals.PlannedTrip', 'documents.Document',
+        )]
+        statements = connection.ops.sequence_reset_sql(no_style(), models)
+        if statements:
+            with connection.cursor() as cursor:
+                for statement in statements:
+                    cursor.execute(statement)
+
+    def _users(self, users):
+        from django.contrib.auth.hashers import make_password
+        from users.models import User
+
+        # الـ hash بيتحسب مرة واحدة (PBKDF2 لكل مستخدم لوحده بياخد وقت أطول من كل الباقي)
+        password = make_password(self.password)
+        first = self._next_id(User)
+        self.user_ids = range(first, first + users)
+        self.owner_ids = self.user_ids[:max(1, users // 5)]
+        self._insert(
+            User, ('id', 'password', 'email', 'phone_number', 'first_name', 'last_name', 'national_id'),
+            ((index, password, f'seed{index}@bench.cark', f'01{index:09d}', f'Seed{index}', 'User',
+              f'{29000000000000 + index:014d}') for index in self.user_ids),
+        )
+
+    def _cars(self, cars):
+        from cars.models import Car, CarRentalOptions, CarUsagePolicy
+
+        rnd = self.rnd
+        first = self._next_id(Car)
+        self.car_ids = range(first, first + cars)
+        # سعر اليوم لكل عربية، محتاجينه لـ CarStats
+        self.car_prices = []
+        self.finished_counts = [0] * cars
+        self.finished_earned = [0] * cars
+        owners = len(self.owner_ids)
+
+        for chunk in batched(self.car_ids, self.batch_size):
+            car_rows, option_rows, policy_rows = [], [], []
+            for index in chunk:
+                brand, models, _ = BRAND_TABLE.pick(rnd)
+                category, base_price, _ = CATEGORY_TABLE.pick(rnd)
+                daily = int(base_price * rnd.lognormvariate(0, 0.35))
+                self.car_prices.append(daily)
+                fuel = 'Electric' if category == 'Electric' else rnd.choices(
+                    ('Petrol', 'Diesel', 'Hybrid'), cum_weights=(80, 92, 100))[0]
+                car_rows.append((
+                    index, self.owner_ids[skewed_index(rnd, owners)], brand, rnd.choice(models),
+                    CAR_TYPE_TABLE.pick(rnd)[0], category, f'SEED{index:08d}', int(rnd.triangular(2008, 2025, 2019)),
+                    rnd.choice(COLORS), rnd.choices((4, 5, 7), cum_weights=(30, 85, 100))[0],
+                    'Automatic' if rnd.random() < 0.7 else 'Manual', fuel, int(rnd.uniform(5000, 250000)),
+                    rnd.random() < 0.85,
+                ))
+                option_rows.append((
+                    index, True, rnd.random() < 0.6, daily, daily * 20, daily * 8 // 5, daily * 32,
+                ))
+                policy_rows.append((
+                    index, rnd.choice((100, 150, 200, 300)), f'{rnd.uniform(1.5, 6):.2f}',
+                    rnd.choice((8, 10, 12)), rnd.choice((40, 60, 80, 100)),
+                ))
+            self._insert(Car, (
+                'id', 'owner_id', 'brand', 'model', 'car_type', 'car_category', 'plate_number', 'year', 'color',
+                'seating_capacity', 'transmission_type', 'fuel_type', 'current_odometer_reading', 'approval_status',
+            ), car_rows)
+            self._insert(CarRentalOptions, (
+                'car_id', 'available_with_driver', 'available_without_driver', 'daily_rental_price',
+                'monthly_rental_price', 'daily_rental_price_with_driver', 'monthly_price_with_driver',
+            ), option_rows)
+            self._insert(CarUsagePolicy, (
+                'car_id', 'daily_km_limit', 'extra_km_cost', 'daily_hour_limit', 'extra_hour_cost',
+            ), policy_rows)
+
+    def _rentals(self, rentals):
+        from rentals.models import PlannedTrip, PlannedTripStop, Rental
+
+        rnd = self.rnd
+        gauss = rnd.gauss
+        random_ = rnd.random
+        first = self._next_id(Rental)
+        trip_id = self._next_id(PlannedTrip)
+        users = self.user_ids
+        user_count = len(users)
+        car_count = len(self.car_ids)
+        car_first = self.car_ids[0] if car_count else None
+        # التواريخ كـ strings مرة واحدة لكل يوم بدل كل صف
+        day_cache = {}
+
+        def day(offset):
+            value = day_cache.get(offset)
+            if value is None:
+                value = day_cache[offset] = (self.today + timedelta(days=offset)).isoformat()
+            return value
+
+        for chunk in batched(range(first, first + rentals), self.batch_size):
+            rental_rows, trip_rows, stop_rows = [], [], []
+            for rental_id in chunk:
+                car_index = skewed_index(rnd, car_count)
+                start = int(rnd.uniform(-365, 60))
+                days = min(1 + int(rnd.expovariate(1 / 3)), 30)
+                end = start + days - 1
+                if end < 0:
+                    status = PAST_TABLE.pick(rnd)[0]
+                    if status == 'Finished':
+                        self.finished_counts[car_index] += 1
+                        self.finished_earned[car_index] += self.car_prices[car_index] * days
+                elif start <= 0:
+                    status = 'Ongoing'
+                else:
+                    status = FUTURE_TABLE.pick(rnd)[0]
+                lat, lng, _ = CITY_TABLE.pick(rnd)
+                rental_rows.append((
+                    rental_id, users[int(random_() * user_count)], car_first + car_index, day(start), day(end), status,
+                    'WithDriver' if random_() < 0.7 else 'WithoutDriver',
+                    rnd.choices(('cash', 'wallet', 'visa'), cum_weights=(50, 80, 100))[0],
+                    coordinate(lat + gauss(0, 0.05)), coordinate(lng + gauss(0, 0.05)),
+                    coordinate(lat + gauss(0, 0.05)), coordinate(lng + gauss(0, 0.05)),
+                ))
+                trip_rows.append((trip_id, rental_id))
+                for order in range(1, STOP_COUNT_TABLE.pick(rnd)[0] + 1):
+                    stop_rows.append((
+                        trip_id, order, coordinate(lat + gauss(0, 0.04)), coordinate(lng + gauss(0, 0.04)),
+                        rnd.choice((0, 10, 15, 30, 60)),
+                    ))
+                trip_id += 1
+            self._insert(Rental, (
+                'id', 'renter_id', 'car_id', 'start_date', 'end_date', 'status', 'rental_type', 'payment_method',
+                'pickup_lat', 'pickup_lng', 'dropoff_lat', 'dropoff_lng',
+            ), rental_rows)
+            self._insert(PlannedTrip, ('id', 'rental_id'), trip_rows)
+            self._insert(PlannedTripStop, (
+                'planned_trip_id', 'stop_order', 'latitude', 'longitude', 'approx_waiting_time_minutes',
+            ), stop_rows)
+
+    def _car_stats(self):
+        from cars.models import CarStats
+
+        self._insert(
+            CarStats, ('car_id', 'rental_history_count', 'total_earned'),
+            zip(self.car_ids, self.finished_counts, self.finished_earned),
+        )
+
+    def _documents(self, documents):
+        from documents.models import Document, DocumentType, DocumentVerification
+
+        rnd = self.rnd
+        types = [(DocumentType.objects.get_or_create(name=name)[0].pk, owner) for name, owner in DOCUMENT_TYPES]
+        if not self.car_ids:
+            # من غير عربيات كل المستندات بتبقى مستندات مستخدمين
+            types = [item for item in types if item[1] == 'user']
+        first = self._next_id(Document)
+        reviewer_id = self.user_ids[0]
+        users, cars = self.user_ids, self.car_ids
+
+        for chunk in batched(range(first, first + documents), self.batch_size):
+            document_rows, verification_rows = [], []
+            for document_id in chunk:
+                type_id, owner = rnd.choice(types)
+                status = DOCUMENT_STATUS_TABLE.pick(rnd)[0]
+                document_rows.append((
+                    document_id, type_id, status,
+                    users[int(rnd.random() * len(users))] if owner == 'user' else None,
+                    cars[int(rnd.random() * len(cars))] if owner == 'car' else None,
+                    f'documents/seed/{type_id}_{document_id}.pdf',
+                ))
+                verification_rows.append((document_id, 'ML', status, None, f'{rnd.uniform(0.6, 0.99):.2f}'))
+                if rnd.random() < 0.5:
+                    verification_rows.append((document_id, 'Admin', status, reviewer_id, None))
+            self._insert(Document, ('id', 'document_type_id', 'status', 'user_id', 'car_id', 'file'), document_rows)
+            self._insert(DocumentVerification, (
+                'document_id', 'verification_type', 'status', 'verified_by_id', 'ml_confidence',
+            ), verification_rows)
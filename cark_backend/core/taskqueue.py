@@ -0,0 +1,137 @@
+import logging
+import random
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .db import skip_locked_options
+from .models import Task
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_ATTEMPTS = getattr(settings, 'TASK_MAX_ATTEMPTS', 5)
+# الـ backoff بعد الفشل: BASE * 2^(المحاولة - 1) بحد أقصى MAX
+RETRY_BASE_SECONDS = getattr(settings, 'TASK_RETRY_BASE_SECONDS', 10)
+RETRY_MAX_SECONDS = getattr(settings, 'TASK_RETRY_MAX_SECONDS', 3600)
+# شغلانة Running أقدم من كده يعتبر الـ worker بتاعها وقع وترجع للطابور
+LOCK_TIMEOUT_SECONDS = getattr(settings, 'TASK_LOCK_TIMEOUT_SECONDS', 600)
+
+_registry = {}
+
+
+def task(name=None, priority=0, max_attempts=DEFAULT_MAX_ATTEMPTS):
+    """
+    تسجيل دالة كـ background task:
+
+        @task(priority=5)
+        def compute_rental_breakdown(rental_id, ...):
+            ...
+
+        compute_rental_breakdown.delay(rental.pk, ...)
+
+    الـ args لازم تبقى JSON (ids مش objects) لأن الشغلانة بتتنفذ في process تانية.
+    """
+    def decorator(func):
+        task_name = name or f'{func.__module__}.{func.__name__}'
+        _registry[task_name] = func
+        func.task_name = task_name
+        func.task_options = {'priority': priority, 'max_attempts': max_attempts}
+        func.delay = lambda *args, **kwargs: enqueue(task_name, args, kwargs)
+        return func
+    return decorator
+
+
+def enqueue(name, args=(), kwargs=None, priority=None, max_attempts=None, delay_seconds=0):
+    """
+    إضافة شغلانة للطابور. الصف بيتكتب في نفس الـ transaction الحالية،
+    فلو الـ transaction اترجعت الشغلانة بتختفي معاها والـ worker مش بيشوفها غير بعد الـ commit.
+    مع TASKS_EAGER=True (للتطوير من غير worker) الدالة بتتنفذ في نفس الـ process بعد الـ commit.
+    priority و max_attempts لو مش متحددين بياخدوا قيم الـ @task.
+    """
+    func = _registry[name]
+    kwargs = kwargs or {}
+    if getattr(settings, 'TASKS_EAGER', False):
+        transaction.on_commit(lambda: func(*args, **kwargs))
+        return None
+    options = func.task_options
+    priority = options['priority'] if priority is None else priority
+    max_attempts = options['max_attempts'] if max_attempts is None else max_attempts
+    return Task.objects.create(
+        name=name, args=list(args), kwargs=kwargs, priority=priority, max_attempts=max_attempts,
+        run_at=timezone.now() + timedelta(seconds=delay_seconds),
+    )
+
+
+def claim(worker_id, batch_size=1):
+    """
+    سحب شغلانات جاهزة للتنفيذ بالأولوية. skip_locked بيخلي كذا worker يسحبوا في نفس الوقت
+    من غير ما يستنوا بعض أو ياخدوا نفس الشغلانة.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        ids = list(
+            Task.objects.select_for_update(**skip_locked_options())
+            .filter(status=Task.QUEUED, run_at__lte=now)
+            .order_by('-priority', 'run_at', 'id')
+            .values_list('id', flat=True)[:batch_size]
+        )
+        if not ids:
+            return []
+        Task.objects.filter(id__in=ids).update(
+            status=Task.RUNNING, locked_by=worker_id, locked_at=now, attempts=F('attempts') + 1,
+        )
+    return list(Task.objects.filter(id__in=ids).order_by('-priority', 'run_at', 'id'))
+
+
+def retry_delay(attempts):
+    delay = min(RETRY_BASE_SECONDS * 2 ** max(attempts - 1, 0), RETRY_MAX_SECONDS)
+    # jitter عشان الشغلانات اللي فشلت مع بعض ماترجعش كلها في نفس اللحظة
+    return delay * random.uniform(0.8, 1.2)
+
+
+def run_task(task_row):
+    """
+    تنفيذ شغلانة اتسحبت. return: True لو نجحت
+    """
+    func = _registry.get(task_row.name)
+    try:
+        if func is None:
+            raise LookupError(f'Unknown task "{task_row.name}".')
+        func(*task_row.args, **task_row.kwargs)
+    except Exception:
+        error = traceback.format_exc()
+        logger.warning('Task %s #%s failed (attempt %s)', task_row.name, task_row.pk, task_row.attempts)
+        if task_row.attempts >= task_row.max_attempts:
+            Task.objects.filter(pk=task_row.pk).update(
+                status=Task.FAILED, last_error=error, finished_at=timezone.now(), locked_by='',
+            )
+        else:
+            Task.objects.filter(pk=task_row.pk).update(
+                status=Task.QUEUED, last_error=error, locked_by='',
+                run_at=timezone.now() + timedelta(seconds=retry_delay(task_row.attempts)),
+            )
+        return False
+    Task.objects.filter(pk=task_row.pk).update(status=Task.DONE, finished_at=timezone.now(), locked_by='')
+    return True
+
+
+def requeue_stale():
+    """
+    رجوع الشغلانات اللي الـ worker بتاعها وقع وهي Running للطابور.
+    الشغلانة اللي استنفدت محاولاتها (attempts بيزيد مع كل claim) بتتعلم Failed،
+    عشان شغلانة بتوقع الـ worker نفسه ماتفضلش تتعاد على طول.
+    return: عدد الشغلانات اللي رجعت للطابور
+    """
+    now = timezone.now()
+    stale = Task.objects.filter(status=Task.RUNNING, locked_at__lt=now - timedelta(seconds=LOCK_TIMEOUT_SECONDS))
+    exhausted = stale.filter(attempts__gte=F('max_attempts')).update(
+        status=Task.FAILED, locked_by='', finished_at=now,
+        last_error='Worker stopped while running the task and no attempts are left.',
+    )
+    if exhausted:
+        logger.error('%s stale tasks failed after their last attempt', exhausted)
+    return stale.update(status=Task.QUEUED, locked_by='', run_at=now)
@@ -0,0 +1,214 @@
+import ipaddress
+import json
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.serializers import BaseSerializer
+from rest_framework.test import APIClient
+
+from cark_backend.database import database_config, use_asgi_defaults, ASGI_POOL_SIZE
+from cars.tests import RecordingSink, create_car
+from users.tests import create_user, bearer
+from . import instrumentation, metrics, outbox, taskqueue
+from .models import OutboxEvent, Task
+
+calls = []
+
+
+@taskqueue.task(name='core.tests.record_call', max_attempts=2)
+def record_call(value, fail=False):
+    if fail:
+        raise RuntimeError('boom')
+    calls.append(value)
+
+
+class MetricsEndpointTests(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        other = metrics.Registry(self.directory)
+        other.counter('cark_rental_events', 'Rental events.', ('event',)).inc(5, event='confirmed')
+        with open(os.path.join(self.directory, 'metrics_999999.json'), 'w') as handle:
+            json.dump(other.snapshot(), handle)
+        patcher = mock.patch.object(metrics.registry, 'directory', self.directory)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _get(self, authorization=None, address='127.0.0.1'):
+        headers = {'HTTP_AUTHORIZATION': authorization} if authorization else {}
+        return APIClient().get('/metrics', REMOTE_ADDR=address, **headers)
+
+    def test_loopback_is_not_trusted_by_default(self):
+        # ورا reverse proxy على نفس الجهاز كل الطلبات جاية من 127.0.0.1
+        self.assertEqual(self._get().status_code, 401)
+
+    def test_token_staff_and_configured_networks(self):
+        with override_settings(METRICS_TOKEN='scrape-token'):
+            self.assertEqual(self._get('Bearer wrong').status_code, 401)
+            response = self._get('Bearer scrape-token')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('cark_rental_events_total{event="confirmed"}', response.content.decode())
+
+        self.assertEqual(self._get(bearer(create_user(is_staff=True))).status_code, 200)
+        self.assertEqual(self._get(bearer(create_user())).status_code, 401)
+
+        with mock.patch('core.views.ALLOWED_NETWORKS', (ipaddress.ip_network('10.0.0.0/8'),)):
+            self.assertEqual(self._get(address='10.1.2.3').status_code, 200)
+            self.assertEqual(self._get(address='127.0.0.1').status_code, 401)
+
+    def test_several_workers_without_shared_directory(self):
+        staff = bearer(create_user(is_staff=True))
+        with mock.patch.object(metrics.registry, 'directory', None), \
+                mock.patch('core.views.configured_workers', return_value=4), \
+                self.assertLogs('core.views', 'ERROR'):
+            self.assertEqual(self._get(staff).status_code, 503)
+
+    def test_configured_workers(self):
+        self.assertEqual(metrics.configured_workers(['gunicorn', 'app', '--workers', '4'], {}), 4)
+        self.assertEqual(metrics.configured_workers(['gunicorn', '-w', '3'], {}), 3)
+        self.assertEqual(metrics.configured_workers(['gunicorn', '--workers=2'], {}), 2)
+        self.assertEqual(metrics.configured_workers(['manage.py'], {'WEB_CONCURRENCY': '2'}), 2)
+        self.assertEqual(metrics.configured_workers(['manage.py'], {}), 1)
+
+
+class DatabaseConfigTests(TestCase):
+    def test_asgi_defaults_to_the_pool(self):
+        env = {}
+        use_asgi_defaults(env)
+        config = database_config(env)
+        self.assertEqual(config['ENGINE'], 'core.db_backends.mysql')
+        self.assertEqual(config['CONN_MAX_AGE'], 0)
+        self.assertEqual(config['OPTIONS']['pool_size'], ASGI_POOL_SIZE)
+
+    def test_asgi_keeps_explicit_settings(self):
+        env = {'DB_POOL_SIZE': '0', 'DB_CONN_MAX_AGE': '30'}
+        use_asgi_defaults(env)
+        config = database_config(env)
+        self.assertEqual(config['ENGINE'], 'django.db.backends.mysql')
+        self.assertEqual(config['CONN_MAX_AGE'], 30)
+        # engine من غير pool بيفضل من غير pool ومن غير اتصالات دائمة
+        env = {'DB_ENGINE': 'postgresql'}
+        use_asgi_defaults(env)
+        self.assertEqual(database_config(env)['ENGINE'], 'django.db.backends.postgresql')
+        self.assertEqual(database_config(env)['CONN_MAX_AGE'], 0)
+
+    def test_wsgi_keeps_persistent_connections(self):
+        self.assertEqual(database_config({})['CONN_MAX_AGE'], 60)
+
+
+@override_settings(TASKS_EAGER=False)
+class TaskQueueTests(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_claim_and_run_in_priority_order(self):
+        low = record_call.delay('low')
+        high = taskqueue.enqueue('core.tests.record_call', ('high',), priority=5)
+        later = taskqueue.enqueue('core.tests.record_call', ('later',), delay_seconds=3600)
+        claimed = taskqueue.claim('worker-1', batch_size=10)
+        self.assertEqual([row.pk for row in claimed], [high.pk, low.pk])
+        self.assertTrue(all(row.status == Task.RUNNING and row.attempts == 1 for row in claimed))
+        self.assertEqual(taskqueue.claim('worker-2'), [])
+
+        for row in claimed:
+            self.assertTrue(taskqueue.run_task(row))
+        self.assertEqual(calls, ['high', 'low'])
+        self.assertEqual(Task.objects.get(pk=later.pk).status, Task.QUEUED)
+        self.assertEqual(Task.objects.filter(status=Task.DONE).count(), 2)
+
+    def test_failures_back_off_then_fail(self):
+        queued = record_call.delay('x', fail=True)
+        row, = taskqueue.claim('worker-1')
+        with self.assertLogs('core.taskqueue', 'WARNING'):
+            self.assertFalse(taskqueue.run_task(row))
+        queued.refresh_from_db()
+        self.assertEqual(queued.status, Task.QUEUED)
+        self.assertGreater(queued.run_at, timezone.now())
+        self.assertIn('RuntimeError', queued.last_error)
+
+        Task.objects.filter(pk=queued.pk).update(run_at=timezone.now())
+        row, = taskqueue.claim('worker-1')
+        with self.assertLogs('core.taskqueue', 'WARNING'):
+            self.assertFalse(taskqueue.run_task(row))
+        self.assertEqual(Task.objects.get(pk=queued.pk).status, Task.FAILED)
+
+    def test_stale_tasks_are_requeued_until_attempts_run_out(self):
+        stale_at = timezone.now() - timedelta(seconds=taskqueue.LOCK_TIMEOUT_SECONDS + 1)
+        retry = record_call.delay('retry')
+        crashing = record_call.delay('crash')
+        Task.objects.filter(pk=retry.pk).update(status=Task.RUNNING, locked_at=stale_at, attempts=1)
+        Task.objects.filter(pk=crashing.pk).update(status=Task.RUNNING, locked_at=stale_at, attempts=2)
+
+        with self.assertLogs('core.taskqueue', 'ERROR'):
+            self.assertEqual(taskqueue.requeue_stale(), 1)
+        self.assertEqual(Task.objects.get(pk=retry.pk).status, Task.QUEUED)
+        crashing.refresh_from_db()
+        self.assertEqual(crashing.status, Task.FAILED)
+        self.assertIsNotNone(crashing.finished_at)
+
+    @override_settings(TASKS_EAGER=True)
+    def test_eager_tasks_run_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertIsNone(record_call.delay('eager'))
+            self.assertEqual(calls, [])
+        self.assertEqual(calls, ['eager'])
+        self.assertFalse(Task.objects.exists())
+
+
+class OutboxRelayTests(TestCase):
+    def setUp(self):
+        self.first = outbox.emit('rental', 1, 'rental.confirmed')
+        self.second = outbox.emit('rental', 1, 'rental.started')
+
+    def test_failed_batch_is_released_and_retried_in_order(self):
+        with self.assertRaises(IOError):
+            outbox.relay_batch(RecordingSink(fail=True))
+        self.first.refresh_from_db()
+        self.assertIsNone(self.first.locked_until)
+        self.assertEqual(self.first.attempts, 1)
+        self.assertEqual(self.first.last_error, 'Sink is down.')
+
+        sink = RecordingSink()
+        self.assertEqual(outbox.relay_batch(sink, batch_size=1), 1)
+        self.assertEqual(outbox.relay_batch(sink), 1)
+        self.assertEqual([event['event_type'] for event in sink.events], ['rental.confirmed', 'rental.started'])
+        self.assertFalse(OutboxEvent.objects.filter(published_at__isnull=True).exists())
+
+    def test_claimed_partition_waits_until_the_lock_expires(self):
+        # relay تاني حاجز أول حدث وبيبعته
+        OutboxEvent.objects.filter(pk=self.first.pk).update(locked_until=timezone.now() + timedelta(seconds=30))
+        self.assertEqual(outbox.relay_batch(RecordingSink()), 0)
+
+        # الـ relay ده مات: الحجز انتهى فالدفعة بتتبعت تاني بالترتيب
+        OutboxEvent.objects.filter(pk=self.first.pk).update(locked_until=timezone.now() - timedelta(seconds=1))
+        sink = RecordingSink()
+        self.assertEqual(outbox.relay_batch(sink), 2)
+        self.assertEqual([event['id'] for event in sink.events], [self.first.pk, self.second.pk])
+
+
+class QueryInstrumentationTests(TestCase):
+    def setUp(self):
+        create_car(create_user())
+        self.client = APIClient()
+
+    def test_server_timing_only_when_enabled(self):
+        with mock.patch.object(instrumentation, 'ENABLED', True), \
+                mock.patch.object(instrumentation, 'SERVER_TIMING', True):
+            timing = self.client.get('/api/cars/')['Server-Timing']
+        self.assertIn('queries', timing)
+        serializer_ms = float(timing.split('serializer;dur=')[1].split(',')[0])
+        self.assertGreater(serializer_ms, 0)
+
+        with mock.patch.object(instrumentation, 'ENABLED', True), \
+                mock.patch.object(instrumentation, 'SERVER_TIMING', False):
+            self.assertNotIn('Server-Timing', self.client.get('/api/cars/'))
+        with mock.patch.object(instrumentation, 'ENABLED', False):
+            self.assertNotIn('Server-Timing', self.client.get('/api/cars/'))
+
+    def test_drf_is_not_patched(self):
+        self.assertEqual(BaseSerializer.__dict__['data'].fget.__module__, 'rest_framework.serializers')
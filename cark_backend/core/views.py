@@ -0,0 +1,60 @@
+import hmac
+import ipaddress
+import logging
+
+from django.conf import settings
+from django.http import HttpResponse, JsonResponse
+from django.views.decorators.http import require_GET
+
+from .auth import authenticate_jwt
+from .metrics import configured_workers, registry
+
+logger = logging.getLogger(__name__)
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# الشبكات اللي تقدر تقرا /metrics من غير توكن، ومفيش default: ورا reverse proxy على نفس الجهاز
+# كل الطلبات بتيجي من 127.0.0.1، فالثقة في الـ loopback كانت هتخلي /metrics مفتوح للكل
+ALLOWED_NETWORKS = tuple(
+    ipaddress.ip_network(network)
+    for network in getattr(settings, 'METRICS_ALLOWED_NETWORKS', ())
+)
+
+
+def _internal(address):
+    try:
+        address = ipaddress.ip_address(address or '')
+    except ValueError:
+        return False
+    return any(address in network for network in ALLOWED_NETWORKS)
+
+
+def _authorized(request):
+    token = getattr(settings, 'METRICS_TOKEN', None)
+    if token:
+        provided = request.META.get('HTTP_AUTHORIZATION', '')
+        if hmac.compare_digest(provided.encode(), f'Bearer {token}'.encode()):
+            return True
+    if _internal(request.META.get('REMOTE_ADDR')):
+        return True
+    user = authenticate_jwt(request)
+    return user is not None and user.is_staff
+
+
+@require_GET
+def metrics(request):
+    """
+    GET /metrics
+    كل الـ metrics بصيغة Prometheus text. مسموح بـ "Authorization: Bearer <METRICS_TOKEN>"،
+    أو JWT لمستخدم staff، أو من METRICS_ALLOWED_NETWORKS لو متحددة.
+    """
+    if not _authorized(request):
+        return JsonResponse({'error': 'Metrics require METRICS_TOKEN, a staff user or an internal address.'}, status=401)
+    workers = configured_workers()
+    if not registry.directory and workers > 1:
+        # كل scrape كان هيشوف worker واحد بس
+        logger.error('METRICS_DIR is not set while running %s workers', workers)
+        return JsonResponse(
+            {'error': f'METRICS_DIR must be set when running {workers} workers.'}, status=503,
+        )
+    return HttpResponse(registry.render(), content_type=PROMETHEUS_CONTENT_TYPE)
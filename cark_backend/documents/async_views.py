@@ -0,0 +1,43 @@
+"""
+نسخة async من documents-by-entity للتشغيل تحت ASGI.
+"""
+from django.http import JsonResponse
+
+from cars.models import Car
+from core.auth import aauthenticate_jwt
+from .models import Document
+from .serializers import DocumentSerializer
+
+
+async def documents_by_entity(request):
+    """
+    GET /api/async/documents-by-entity/?user_id=<id> أو ?car_id=<id>
+    المستندات بتاعة المستخدم نفسه أو عربية بيملكها (أو أي حد للأدمن).
+    """
+    if request.method != 'GET':
+        return JsonResponse({'error': 'Method not allowed.'}, status=405)
+    user = await aauthenticate_jwt(request)
+    if user is None:
+        return JsonResponse({'error': 'Authentication credentials were not provided or are invalid.'}, status=401)
+
+    user_id = request.GET.get('user_id')
+    car_id = request.GET.get('car_id')
+    if not user_id and not car_id:
+        return JsonResponse({'error': 'Please provide either user_id or car_id.'}, status=400)
+    if user_id and car_id:
+        return JsonResponse({'error': 'Please provide only one of user_id or car_id.'}, status=400)
+    if not (user_id or car_id).isdigit():
+        return JsonResponse({'error': 'Invalid id.'}, status=400)
+
+    if user_id:
+        allowed = user.is_staff or int(user_id) == user.pk
+        documents = Document.objects.filter(user_id=user_id)
+    else:
+        allowed = user.is_staff or await Car.objects.filter(id=car_id, owner=user).aexists()
+        documents = Document.objects.filter(car_id=car_id)
+    if not allowed:
+        return JsonResponse({'error': 'You are not allowed to view these documents.'}, status=403)
+
+    documents = documents.prefetch_related('verifications__verified_by')
+    results = [document async for document in documents.order_by('id')]
+    return JsonResponse(DocumentSerializer(results, many=True).data, safe=False)
@@ -0,0 +1,7 @@
+from core.metrics import registry
+
+DOCUMENTS_UPLOADED = registry.counter('cark_documents_uploaded', 'Documents uploaded by owner type.', ('owner',))
+# status: Approved أو Rejected أو Pending (لو اترجع للمراجعة)
+DOCUMENT_STATUS_CHANGES = registry.counter(
+    'cark_document_status_changes', 'Document verification results by new status.', ('status',),
+)
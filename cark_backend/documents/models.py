@@ -1,9 +1,11 @@
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth import get_user_model
 from django.forms import ValidationError
 from cars.models import Car  # assuming cars app
 from users.models import Role  # assuming a separate Role model
 from django.conf import settings
+from core.outbox import emit
+from .metrics import DOCUMENT_STATUS_CHANGES
 
 User = get_user_model()
 
@@ -48,6 +50,7 @@ class Document(models.Model):
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='Pending')
     
     def update_status_from_verifications(self):
+        previous_status = self.status
         verifications = self.verifications.all()
         if not verifications.exists():
             self.status = 'Pending'
@@ -60,7 +63,14 @@ class Document(models.Model):
                 self.status = 'Pending'
             else:
                 self.status = 'Approved'
-        self.save()
+        with transaction.atomic():
+            self.save()
+            if self.status != previous_status:
+                DOCUMENT_STATUS_CHANGES.inc_on_commit(status=self.status)
+                emit('document', self.pk, 'document.status_changed', {
+                    'from': previous_status, 'to': self.status,
+                    'user_id': self.user_id, 'car_id': self.car_id, 'document_type_id': self.document_type_id,
+                })
 
   
     upload_date = models.DateTimeField(auto_now_add=True)
@@ -5,6 +5,8 @@ from rest_framework import serializers
 from cars.models import Car
 from .models import DocumentType, RoleDocumentRequirement, Document, DocumentVerification
 from users.models import Role
+from .tasks import create_document_verifications
+from .metrics import DOCUMENTS_UPLOADED
 
 
 # ✅ DocumentType
@@ -144,11 +146,10 @@ class DocumentSerializer(serializers.ModelSerializer):
             expiry_date=expiry_date
         )
 
-        # إنشاء الـ verifications تلقائيًا
-        DocumentVerification.objects.bulk_create([
-            DocumentVerification(document=document, verification_type='ML', status='Pending'),
-            DocumentVerification(document=document, verification_type='Admin', status='Pending'),
-        ])
+        DOCUMENTS_UPLOADED.inc_on_commit(owner='car' if document.car_id else 'user')
+
+        # إنشاء الـ verifications تلقائيًا (في background task)
+        create_document_verifications.delay(document.pk)
 
         return document
 
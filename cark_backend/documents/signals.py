@@ -1,9 +1,13 @@
 from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
-from .models import DocumentVerification
+from core.conditional import touch
+from .models import Document, DocumentVerification
+from .tasks import refresh_document_status
 
 @receiver(post_save, sender=DocumentVerification)
 @receiver(post_delete, sender=DocumentVerification)
 def update_document_status(sender, instance, **kwargs):
-    document = instance.document
-    document.update_status_from_verifications()
+    # الـ verifications بتظهر جوه المستند، فالـ ETag بتاعه لازم يتغير على طول
+    touch(Document, pk=instance.document_id)
+    # إعادة حساب الحالة بتتم في background task
+    refresh_document_status.delay(instance.document_id)
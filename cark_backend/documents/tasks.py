@@ -0,0 +1,26 @@
+from core.conditional import touch
+from core.taskqueue import task
+from .models import Document, DocumentVerification
+
+
+@task(priority=5)
+def create_document_verifications(document_id):
+    # إنشاء الـ verifications (ML + Admin) للمستند المرفوع؛ مرة واحدة بس لو الشغلانة اتعادت
+    if DocumentVerification.objects.filter(document_id=document_id).exists():
+        return
+    if not Document.objects.filter(pk=document_id).exists():
+        return
+    DocumentVerification.objects.bulk_create([
+        DocumentVerification(document_id=document_id, verification_type='ML', status='Pending'),
+        DocumentVerification(document_id=document_id, verification_type='Admin', status='Pending'),
+    ])
+    # bulk_create مابيبعتش signals
+    touch(Document, pk=document_id)
+
+
+@task()
+def refresh_document_status(document_id):
+    # إعادة حساب حالة المستند من الـ verifications بتاعته
+    document = Document.objects.filter(pk=document_id).first()
+    if document is not None:
+        document.update_status_from_verifications()
@@ -1,3 +1,72 @@
-from django.test import TestCase
+import json
+import os
+import tempfile
+import time
+from io import StringIO
 
-# Create your tests here.
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase, override_settings
+from rest_framework.test import APIClient
+
+from core.models import OutboxEvent
+from users.tests import create_user, bearer
+from .models import Document, DocumentType, DocumentVerification
+
+
+# الحالة بتتحسب في background task، فبتتنفذ هنا مع الـ commit
+@override_settings(TASKS_EAGER=True)
+class DocumentStatusOutboxTests(TransactionTestCase):
+    def setUp(self):
+        self.user = create_user()
+        self.document = Document.objects.create(
+            user=self.user, document_type=DocumentType.objects.create(name='National ID'), file='id.pdf',
+        )
+        self.path = tempfile.mktemp(suffix='.jsonl')
+
+    def tearDown(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def _events(self):
+        return OutboxEvent.objects.filter(aggregate_type='document', aggregate_id=str(self.document.pk)).order_by('id')
+
+    def test_status_changes_are_emitted_and_relayed_in_order(self):
+        verification = DocumentVerification.objects.create(document=self.document, verification_type='ML', status='Approved')
+        # نفس الحالة مرة تانية مش حدث جديد
+        verification.save()
+        verification.status = 'Rejected'
+        verification.save()
+        self.assertEqual(
+            [event.payload['to'] for event in self._events()], ['Approved', 'Rejected'],
+        )
+
+        for worker in (0, 1):
+            call_command('relay_outbox', once=True, path=self.path, workers=2, worker=worker, stdout=StringIO())
+        with open(self.path, encoding='utf-8') as f:
+            published = [json.loads(line) for line in f]
+        self.assertEqual([event['payload']['to'] for event in published], ['Approved', 'Rejected'])
+        self.assertEqual(published[0]['payload']['user_id'], self.user.pk)
+        self.assertFalse(self._events().filter(published_at__isnull=True).exists())
+
+        # الأحداث اللي اتبعتت مابتتبعتش تاني
+        call_command('relay_outbox', once=True, path=self.path, stdout=StringIO())
+        with open(self.path, encoding='utf-8') as f:
+            self.assertEqual(len(f.readlines()), 2)
+
+
+class DocumentConditionalGetTests(TestCase):
+    def test_list_not_modified_until_a_verification_changes_it(self):
+        admin = create_user(is_staff=True)
+        document = Document.objects.create(
+            user=admin, document_type=DocumentType.objects.create(name='Driving License'), file='license.pdf',
+        )
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=bearer(admin))
+        etag = client.get('/api/documents/')['ETag']
+        self.assertEqual(client.get('/api/documents/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        time.sleep(0.01)
+        DocumentVerification.objects.create(document=document, verification_type='ML', status='Approved')
+        response = client.get('/api/documents/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
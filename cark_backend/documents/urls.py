@@ -10,6 +10,7 @@ from .views import (
     admin_pending_documents_list,
     documents_by_entity
 )
+from . import async_views
 
 
 router = DefaultRouter()
@@ -28,4 +29,5 @@ urlpatterns = [
      
     # **مسار documents_by_entity**
     path('documents-by-entity/', documents_by_entity),
+    path('async/documents-by-entity/', async_views.documents_by_entity),
 ]
@@ -10,6 +10,8 @@ from rest_framework.decorators import action
 from rest_framework import status
 from django.utils import timezone
 from rest_framework.generics import ListAPIView
+from core.conditional import ConditionalGetMixin
+from core.instrumentation import SerializerTimingMixin
 
 from .models import Document
 from .serializers import DocumentSerializer
@@ -105,7 +107,7 @@ class MandatoryDocumentsByRoleView(APIView):
 
 
 # === Document CRUD + Custom actions ===
-class DocumentViewSet(viewsets.ModelViewSet):
+class DocumentViewSet(SerializerTimingMixin, ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = Document.objects.all()
     serializer_class = DocumentSerializer
     permission_classes = [IsAuthenticated]
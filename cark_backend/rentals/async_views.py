@@ -0,0 +1,35 @@
+"""
+نسخة async من تفاصيل الحجز (بتشتغل تحت ASGI زي rentals.stream).
+"""
+from django.http import JsonResponse
+
+from core.auth import aauthenticate_jwt
+from core.renderers import json_response
+from .models import Rental
+from .serializers import RentalSerializer
+
+
+def rental_detail_queryset():
+    # كل اللي RentalSerializer محتاجه بيتجاب مرة واحدة، فالـ serialization مفيهاش أي query
+    return Rental.objects.select_related(
+        'renter', 'car__rental_options', 'car__usage_policy', 'planned_trip',
+        'usage_info', 'payment_info', 'breakdown',
+    ).prefetch_related('planned_trip__stops')
+
+
+async def rental_detail(request, pk):
+    """
+    GET /api/async/rentals/<id>/
+    نفس بيانات GET /api/rentals/<id>/ للمستأجر أو صاحب العربية أو الأدمن.
+    """
+    if request.method != 'GET':
+        return JsonResponse({'error': 'Method not allowed.'}, status=405)
+    user = await aauthenticate_jwt(request)
+    if user is None:
+        return JsonResponse({'error': 'Authentication credentials were not provided or are invalid.'}, status=401)
+    rental = await rental_detail_queryset().filter(pk=pk).afirst()
+    if rental is None:
+        return JsonResponse({'error': 'Rental not found.'}, status=404)
+    if not user.is_staff and user.pk not in (rental.renter_id, rental.car.owner_id):
+        return JsonResponse({'error': 'You are not allowed to view this rental.'}, status=403)
+    return json_response(RentalSerializer(rental).data)
@@ -0,0 +1,231 @@
+from collections import defaultdict
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Sum
+from django.utils import timezone
+
+from cars.pricing import quote
+from wallets.services import settle_rental_payment
+from .events import record_event
+from .models import Rental, RentalBreakdown, RentalPayment, RentalUsage, PlannedTripStop
+from .routes import derive_planned_km
+from .telemetry import active_intervals
+from .zones import price_multiplier
+from .services import (
+    calculate_rental_financials, calculate_allowed_km, calculate_extra_km, calculate_extra_km_cost,
+    calculate_extra_hours,
+)
+
+# المسافة المخططة بتتحسب على السيرفر من المسار أو المحطات،
+# وقيمة planned_km اللي جاية من العميل بتستخدم بس لو الحجز مفيهوش أي إحداثيات
+def resolve_planned_km(rental, data):
+    planned_km = derive_planned_km(rental)
+    if planned_km is None:
+        planned_km = float(data.get('planned_km', 0))
+    return round(planned_km, 3)
+
+# دالة مساعدة لإنشاء breakdown
+def create_rental_breakdown(rental, planned_km, total_waiting_minutes, extra_hour_charges=0):
+    car = rental.car
+    policy = car.usage_policy
+    # السعر من تقويم العربية (المواسم، الويك إند، وأسعار الشهر/السنة للإيجار الطويل)
+    price = quote(car, rental.rental_type, rental.start_date, rental.end_date)
+    rental_days = price['rental_days']
+    payment_method = rental.payment_method
+    # معامل سعر الزون اللي بيبدأ منها الحجز (من الـ index في الذاكرة من غير query)
+    daily_price = price['average_daily_price'] * price_multiplier(rental.zone_id)
+    extra_km_rate = policy.extra_km_cost or 0
+    waiting_hour_rate = policy.waiting_rate()
+    commission_rate = 0.2
+    breakdown_data = calculate_rental_financials(
+        rental_days,
+        planned_km,
+        float(policy.daily_km_limit),
+        float(extra_km_rate),
+        total_waiting_minutes,
+        float(waiting_hour_rate),
+        float(daily_price),
+        payment_method,
+        commission_rate,
+        extra_hour_charges,
+    )
+    # حفظ breakdown
+    breakdown, _ = RentalBreakdown.objects.update_or_create(
+        rental=rental,
+        defaults={
+            'planned_km': planned_km,
+            'total_waiting_minutes': total_waiting_minutes,
+            'daily_price': _money(daily_price),
+            'extra_km_cost': breakdown_data['extra_km_cost'],
+            'waiting_cost': breakdown_data['waiting_time_cost'],
+            'total_cost': breakdown_data['total_costs'],
+            'buffer_amount': breakdown_data['insurance_buffer'],
+            'deposit': breakdown_data['deposit'],
+            'platform_fee': breakdown_data['platform_commission'],
+            'driver_earnings': breakdown_data['driver_earnings'],
+            'allowed_km': breakdown_data['allowed_km'],
+            'extra_km': breakdown_data['extra_km'],
+            'base_cost': breakdown_data['base_cost'],
+            'final_cost': breakdown_data['final_cost'],
+            'commission_rate': commission_rate,
+        }
+    )
+    return breakdown, breakdown_data
+
+
+# تحويل طريقة الدفع في الحجز لطريقة الدفع في RentalPayment
+PAYMENT_METHOD_MAP = {
+    'wallet': 'Wallet',
+    'visa': 'Card',
+    'cash': 'Cash',
+}
+
+
+def _money(value):
+    return Decimal(str(value)).quantize(Decimal('0.01'))
+
+
+# لو الرحلة مفيهاش نقاط GPS، الساعات بتتحسب من start_time لـ end_time جوه الفترة دي بس من كل يوم
+# (الساعات بالتوقيت المحلي، والليل مابيتحسبش استخدام)
+USAGE_DAY_START_HOUR = getattr(settings, 'USAGE_DAY_START_HOUR', 7)
+USAGE_DAY_END_HOUR = getattr(settings, 'USAGE_DAY_END_HOUR', 23)
+
+
+def _hours_by_day(intervals, day_window=None):
+    """
+    توزيع الفترات (start, end) على أيام التقويم المحلية.
+    day_window: (ساعة البداية، ساعة النهاية) لو الوقت برا الفترة دي من اليوم مايتحسبش
+    return: {date: hours}
+    """
+    tz = timezone.get_current_timezone()
+    first_hour, last_hour = day_window or (0, 24)
+    hours = defaultdict(float)
+    for start, end in intervals:
+        start, end = timezone.localtime(start, tz), timezone.localtime(end, tz)
+        day = start.date()
+        while day <= end.date():
+            midnight = datetime.combine(day, time.min, tzinfo=tz)
+            window_start = midnight + timedelta(hours=first_hour)
+            window_end = midnight + timedelta(hours=last_hour)
+            overlap = (min(end, window_end) - max(start, window_start)).total_seconds()
+            if overlap > 0:
+                hours[day] += overlap / 3600
+            day += timedelta(days=1)
+    return hours
+
+
+def _active_hours_by_day(rental, usage, end_time):
+    """
+    ساعات الاستخدام الفعلي لكل يوم: من نقاط الـ GPS، أو من start_time/end_time جوه ساعات اليوم
+    لو مفيش نقاط. وقت الانتظار في المحطات بيتشال لأنه بيتحاسب لوحده بسعر الانتظار.
+    """
+    intervals = [
+        (datetime.fromtimestamp(start, dt_timezone.utc), datetime.fromtimestamp(end, dt_timezone.utc))
+        for start, end in active_intervals(rental.pk)
+    ]
+    if intervals:
+        hours = _hours_by_day(intervals)
+    elif usage.start_time:
+        hours = _hours_by_day([(usage.start_time, end_time)], (USAGE_DAY_START_HOUR, USAGE_DAY_END_HOUR))
+    else:
+        return {}
+
+    waits = PlannedTripStop.objects.filter(
+        planned_trip__rental=rental, actual_waiting_minutes__gt=0,
+    ).values_list('actual_waiting_minutes', 'waiting_started_at')
+    for minutes, started_at in waits:
+        day = timezone.localdate(started_at or usage.start_time or end_time)
+        if day in hours:
+            hours[day] = max(0.0, hours[day] - minutes / 60)
+    return hours
+
+
+def settle_rental(rental):
+    """
+    التسوية النهائية آخر الرحلة: حساب الاستخدام الفعلي وكتابة RentalUsage و RentalPayment
+    والـ RentalBreakdown النهائي في transaction واحدة.
+    الدالة idempotent: لو الحجز اتسوى قبل كده بترجع نفس النتيجة من غير أي حساب جديد.
+    return: RentalUsage
+    """
+    with transaction.atomic():
+        rental = (
+            Rental.objects.select_for_update()
+            .select_related('car__rental_options', 'car__usage_policy')
+            .get(pk=rental.pk)
+        )
+        usage, _ = RentalUsage.objects.get_or_create(rental=rental)
+        if usage.settled_at is not None:
+            return usage
+
+        now = timezone.now()
+        policy = rental.car.usage_policy
+        rental_days = (rental.end_date - rental.start_date).days + 1
+
+        # مجموع دقائق الانتظار الفعلية والمخططة في query واحدة
+        waiting = PlannedTripStop.objects.filter(planned_trip__rental=rental).aggregate(
+            actual=Sum('actual_waiting_minutes'), planned=Sum('approx_waiting_time_minutes'),
+        )
+        total_waiting_minutes = waiting['actual'] or 0
+        extra_waiting_minutes = max(0, total_waiting_minutes - (waiting['planned'] or 0))
+
+        # المسافة الفعلية: من الـ GPS، أو من العداد، أو المسافة المخططة لو مفيش غيرها
+        distance_km = float(usage.total_distance_used or 0)
+        if not distance_km and usage.start_odometer is not None and usage.end_odometer is not None:
+            distance_km = float(usage.end_odometer - usage.start_odometer)
+        if not distance_km:
+            distance_km = derive_planned_km(rental) or 0.0
+
+        allowed_km = calculate_allowed_km(rental_days, policy.daily_km_limit)
+        extra_km = calculate_extra_km(distance_km, allowed_km)
+        extra_km_charges = calculate_extra_km_cost(extra_km, policy.extra_km_cost or 0)
+
+        # الساعات الإضافية بتتحسب لكل يوم لوحده من وقت الاستخدام الفعلي في اليوم ده
+        end_time = usage.end_time or now
+        extra_hours = sum(
+            calculate_extra_hours(hours, 1, policy.daily_hour_limit)
+            for hours in _active_hours_by_day(rental, usage, end_time).values()
+        )
+        extra_hour_charges = extra_hours * float(policy.extra_hour_cost or 0)
+
+        breakdown, financials = create_rental_breakdown(
+            rental, round(distance_km, 3), total_waiting_minutes, extra_hour_charges,
+        )
+
+        usage.total_distance_used = _money(distance_km)
+        usage.end_time = end_time
+        usage.actual_return_time = usage.actual_return_time or end_time
+        usage.extra_km = _money(extra_km)
+        usage.extra_km_charges = _money(extra_km_charges)
+        usage.extra_hours = _money(extra_hours)
+        usage.extra_hour_charges = _money(extra_hour_charges)
+        usage.total_waiting_minutes = total_waiting_minutes
+        usage.extra_waiting_minutes = extra_waiting_minutes
+        usage.waiting_time_cost = _money(financials['waiting_time_cost'])
+        usage.settled_at = now
+        usage.save()
+
+        RentalPayment.objects.update_or_create(
+            rental=rental,
+            defaults={
+                'deposit_amount': _money(financials['deposit']),
+                'insurance_amount': _money(financials['insurance_buffer']),
+                'refundable_buffer': _money(financials['insurance_buffer']),
+                'payment_method': PAYMENT_METHOD_MAP.get(rental.payment_method, 'Cash'),
+            },
+        )
+
+        Rental.objects.filter(pk=rental.pk).update(
+            insurance_buffer=_money(financials['insurance_buffer']),
+            deposit=_money(financials['deposit']),
+            platform_commission=_money(financials['platform_commission']),
+            driver_earnings=_money(financials['driver_earnings']),
+            updated_at=now,
+        )
+        if rental.payment_method == 'wallet':
+            # الفرق بين اللي اتدفع من المحفظة والتكلفة النهائية بيتسجل في الـ ledger مع التسوية
+            settle_rental_payment(rental, breakdown.final_cost)
+        record_event(rental.pk, 'Trip settled', f'final_cost={breakdown.final_cost:.2f}, distance_km={distance_km:.2f}')
+    return usage
@@ -0,0 +1,92 @@
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+
+from .models import RentalLog
+
+# عدد الأحداث اللي بتتجمع في الذاكرة جوه buffered_events قبل ما تتكتب بـ bulk_create واحد
+EVENT_BATCH_SIZE = getattr(settings, 'RENTAL_EVENT_BATCH_SIZE', 200)
+
+_local = threading.local()
+
+
+def _pending():
+    if not hasattr(_local, 'events'):
+        _local.events = []
+    return _local.events
+
+
+def record_event(rental_id, event, details=None, performed_by_type='System', performed_by_id=None):
+    """
+    تسجيل حدث في سجل الإيجار (RentalLog) في نفس الـ transaction اللي فيها التغيير،
+    فالحدث بيتحفظ مع التغيير أو بيترجع معاه ومفيش تغيير يتعمله commit من غير سجله.
+    بره buffered_events الكتابة فورية: INSERT واحد لكل حدث وقت النداء.
+    جوه buffered_events بس الكتابة بتتأجل لآخر الـ block (أو لما الـ buffer يتملي) وبتبقى bulk_create واحد،
+    فالكود اللي بيسجل أكتر من حدث في نفس التغيير (الانتقالات، صرف الأرباح) بيلف نفسه بيها.
+    """
+    entry = RentalLog(
+        rental_id=rental_id,
+        event=event,
+        details=details,
+        performed_by_type=performed_by_type,
+        performed_by_id=performed_by_id,
+    )
+    if not getattr(_local, 'buffering', False):
+        entry.save()
+        return
+    pending = _pending()
+    pending.append(entry)
+    if len(pending) >= EVENT_BATCH_SIZE:
+        flush_events()
+
+
+@contextmanager
+def buffered_events():
+    """
+    تجميع كل الأحداث اللي بتتسجل جوه الـ block وكتابتها مرة واحدة في الآخر.
+    لازم يبقى جوه الـ transaction.atomic بتاعة التغيير عشان الأحداث تتكتب في نفس الـ transaction.
+    لو الـ block خرج بـ exception الأحداث المتجمعة بتتشال (الـ transaction هترجع كده كده).
+    """
+    outer = getattr(_local, 'buffering', False)
+    _local.buffering = True
+    try:
+        yield
+    except BaseException:
+        if not outer:
+            _local.events = []
+        raise
+    else:
+        if not outer:
+            flush_events()
+    finally:
+        _local.buffering = outer
+
+
+def flush_events():
+    """
+    كتابة كل الأحداث المتجمعة بـ bulk_create واحد.
+    return: عدد الأحداث اللي اتكتبت
+    """
+    pending = _pending()
+    if not pending:
+        return 0
+    _local.events = []
+    RentalLog.objects.bulk_create(pending, batch_size=EVENT_BATCH_SIZE)
+    return len(pending)
+
+
+# الـ cursor بتاع الـ timeline: "<timestamp بالمايكروثانية>_<id>" لآخر حدث في الصفحة
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def encode_cursor(log):
+    micros = (log.timestamp - _EPOCH) // timedelta(microseconds=1)
+    return f'{micros}_{log.id}'
+
+
+def decode_cursor(cursor):
+    micros, log_id = cursor.split('_', 1)
+    return _EPOCH + timedelta(microseconds=int(micros)), int(log_id)
@@ -0,0 +1,33 @@
+import math
+
+# نصف قطر الأرض بالمتر
+EARTH_RADIUS_M = 6371008.8
+
+# الإحداثيات بتتخزن كأعداد صحيحة بالـ micro-degrees (درجة * 1,000,000)
+MICRO = 1_000_000
+
+
+def to_micro(degrees):
+    return int(round(float(degrees) * MICRO))
+
+
+def from_micro(micro_degrees):
+    return micro_degrees / MICRO
+
+
+# المسافة بين نقطتين (بالدرجات) بالمتر
+# lat1, lng1: النقطة الأولى
+# lat2, lng2: النقطة الثانية
+# return: المسافة بالمتر
+
+def haversine_m(lat1, lng1, lat2, lng2):
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    dphi = phi2 - phi1
+    dlmb = math.radians(lng2 - lng1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlmb / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(math.sqrt(a))
+
+
+def is_valid_coordinate(lat, lng):
+    return -90 <= lat <= 90 and -180 <= lng <= 180
@@ -0,0 +1,76 @@
+import math
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from core.metrics import CACHE_LOOKUPS
+from .geo import EARTH_RADIUS_M
+from .models import PlannedTripStop
+
+# نصف قطر المنطقة المسموحة حول كل نقطة (بالمتر)
+GEOFENCE_RADIUS_M = getattr(settings, 'GEOFENCE_RADIUS_METERS', 150)
+
+# أقل مدة يفضل فيها الـ geofence في الكاش لو تاريخ نهاية الرحلة عدى
+MIN_CACHE_SECONDS = 3600
+
+
+def geofence_key(rental):
+    # المفتاح فيه كل اللي الـ geofences بتتبني منه: إحداثيات الـ pickup/dropoff ونسخة المحطات.
+    # الكاش per-process (LocMemCache)، فأي تعديل بيغير المفتاح في كل الـ workers مرة واحدة
+    # ومفيش worker يقدر يقرا geofences قديمة.
+    return (
+        f'rental_geofence:{rental.pk}:{rental.location_version}:'
+        f'{rental.pickup_lat},{rental.pickup_lng}:{rental.dropoff_lat},{rental.dropoff_lng}'
+    )
+
+
+def _fence(lat, lng):
+    # بنخزن الإحداثيات بالراديان ومعاها cos(lat) عشان التحقق يبقى ضرب وجمع بس
+    lat_rad = math.radians(float(lat))
+    return (lat_rad, math.radians(float(lng)), math.cos(lat_rad))
+
+
+def build_geofences(rental):
+    """
+    تجهيز كل نقاط التحقق للرحلة (pickup, dropoff, وكل محطة) وتخزينها في الكاش لحد نهاية الرحلة.
+    """
+    fences = {}
+    if rental.pickup_lat is not None and rental.pickup_lng is not None:
+        fences['pickup'] = _fence(rental.pickup_lat, rental.pickup_lng)
+    if rental.dropoff_lat is not None and rental.dropoff_lng is not None:
+        fences['dropoff'] = _fence(rental.dropoff_lat, rental.dropoff_lng)
+    stops = PlannedTripStop.objects.filter(planned_trip__rental_id=rental.pk).values_list('id', 'latitude', 'longitude')
+    for stop_id, lat, lng in stops:
+        fences[f'stop:{stop_id}'] = _fence(lat, lng)
+
+    remaining_days = (rental.end_date - timezone.localdate()).days + 1
+    cache.set(geofence_key(rental), fences, max(MIN_CACHE_SECONDS, remaining_days * 86400))
+    return fences
+
+
+def get_geofences(rental):
+    fences = cache.get(geofence_key(rental))
+    CACHE_LOOKUPS.inc(cache='rental_geofence', result='miss' if fences is None else 'hit')
+    if fences is None:
+        fences = build_geofences(rental)
+    return fences
+
+
+def invalidate_geofences(rental):
+    cache.delete(geofence_key(rental))
+
+
+def is_inside(fences, name, lat, lng, radius_m=GEOFENCE_RADIUS_M):
+    """
+    التحقق إن النقطة (lat, lng) جوه دايرة الـ geofence اللي اسمها name.
+    بنستخدم equirectangular approximation ودقتها كافية جداً لمسافات مئات الأمتار.
+    return: True / False، أو None لو مفيش geofence بالاسم ده
+    """
+    fence = fences.get(name)
+    if fence is None:
+        return None
+    fence_lat, fence_lng, cos_lat = fence
+    x = (math.radians(lng) - fence_lng) * cos_lat
+    y = math.radians(lat) - fence_lat
+    return (x * x + y * y) * EARTH_RADIUS_M * EARTH_RADIUS_M <= radius_m * radius_m
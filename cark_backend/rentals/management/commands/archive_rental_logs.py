@@ -0,0 +1,46 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from rentals.models import RentalLog, RentalLogArchive
+
+
+class Command(BaseCommand):
+    help = 'Move RentalLog events older than N days into the monthly RentalLogArchive table.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--older-than-days', type=int, default=90)
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options['older_than_days'])
+        batch_size = options['batch_size']
+        moved = 0
+
+        # كل دفعة في transaction لوحدها عشان الأمر يقدر يكمل من مكانه لو وقف
+        while True:
+            with transaction.atomic():
+                batch = list(
+                    RentalLog.objects.filter(timestamp__lt=cutoff).order_by('id')[:batch_size]
+                )
+                if not batch:
+                    break
+                RentalLogArchive.objects.bulk_create([
+                    RentalLogArchive(
+                        id=log.id,
+                        month=log.timestamp.strftime('%Y-%m'),
+                        rental_id=log.rental_id,
+                        timestamp=log.timestamp,
+                        event=log.event,
+                        details=log.details,
+                        performed_by_type=log.performed_by_type,
+                        performed_by_id=log.performed_by_id,
+                    )
+                    for log in batch
+                ], ignore_conflicts=True)
+                RentalLog.objects.filter(id__in=[log.id for log in batch]).delete()
+            moved += len(batch)
+
+        self.stdout.write(self.style.SUCCESS(f'Archived {moved} rental log events older than {cutoff:%Y-%m-%d}.'))
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from rentals.payouts import run_payouts, DEFAULT_CHUNK_SIZE
+
+
+class Command(BaseCommand):
+    help = 'Pay out owner earnings for all finished rentals that have not been paid out yet.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+        parser.add_argument('--limit', type=int, default=None, help='Stop after this many rentals.')
+
+    def handle(self, *args, **options):
+        def progress(processed, elapsed):
+            self.stdout.write(f'{processed} rentals paid out ({processed / elapsed:.1f} rentals/s)')
+
+        result = run_payouts(chunk_size=options['chunk_size'], limit=options['limit'], on_chunk=progress)
+        self.stdout.write(self.style.SUCCESS(
+            f"Batch {result['batch_id']}: {result['processed']} rentals in {result['seconds']}s "
+            f"({result['rentals_per_second']} rentals/s)."
+        ))
@@ -0,0 +1,4 @@
+from core.metrics import registry
+
+# event: created أو الحالة الجديدة بعد الانتقال (confirmed, finished, ...)
+RENTAL_EVENTS = registry.counter('cark_rental_events', 'Rentals created and rental status transitions.', ('event',))
@@ -0,0 +1,51 @@
+# Generated by Django 5.2.18 on 2026-10-19 05:23
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rentals', '0007_rename_st_art_date_rental_start_date'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RentalLogArchive',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('month', models.CharField(db_index=True, max_length=7)),
+                ('timestamp', models.DateTimeField()),
+                ('event', models.CharField(max_length=255)),
+                ('details', models.TextField(blank=True, null=True)),
+                ('performed_by_type', models.CharField(choices=[('System', 'System'), ('Owner', 'Owner'), ('Renter', 'Renter')], default='System', max_length=10)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='rentallog',
+            name='timestamp',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='rentallog',
+            index=models.Index(fields=['rental', 'timestamp'], name='rentallog_rental_ts_idx'),
+        ),
+        migrations.AddField(
+            model_name='rentallogarchive',
+            name='performed_by',
+            field=models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='rentallogarchive',
+            name='rental',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='archived_logs', to='rentals.rental'),
+        ),
+        migrations.AddIndex(
+            model_name='rentallogarchive',
+            index=models.Index(fields=['rental', 'timestamp'], name='rentallogarchive_rental_ts_idx'),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-19 05:24
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rentals', '0008_rentallog_event_stream'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RentalTrackState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_lat_e6', models.IntegerField(blank=True, null=True)),
+                ('last_lng_e6', models.IntegerField(blank=True, null=True)),
+                ('last_recorded_at', models.IntegerField(blank=True, null=True)),
+                ('distance_m', models.FloatField(default=0)),
+                ('point_count', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('rental', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='track_state', to='rentals.rental')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='RentalTelemetryPoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('recorded_at', models.IntegerField()),
+                ('lat_e6', models.IntegerField()),
+                ('lng_e6', models.IntegerField()),
+                ('rental', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='telemetry_points', to='rentals.rental')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['rental', 'recorded_at'], name='telemetry_rental_ts_idx')],
+            },
+        ),
+    ]
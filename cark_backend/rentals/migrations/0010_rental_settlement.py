@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-19 05:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rentals', '0009_rental_telemetry'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='rentalusage',
+            name='settled_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='rentalpayment',
+            name='payment_method',
+            field=models.CharField(choices=[('Cash', 'Cash'), ('Card', 'Card'), ('PayPal', 'PayPal'), ('Wallet', 'Wallet')], default='Cash', max_length=10),
+        ),
+    ]
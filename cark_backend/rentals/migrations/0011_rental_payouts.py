@@ -0,0 +1,52 @@
+# Generated by Django 5.2.18 on 2026-10-19 05:29
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cars', '0001_initial'),
+        ('rentals', '0010_rental_settlement'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PayoutEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('gross_amount', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('platform_commission', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('owner_earnings', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('batch_id', models.CharField(db_index=True, max_length=32)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='rental',
+            name='paid_out_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='rental',
+            index=models.Index(fields=['status', 'paid_out_at', 'id'], name='rental_payout_idx'),
+        ),
+        migrations.AddField(
+            model_name='payoutentry',
+            name='car',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='payout_entries', to='cars.car'),
+        ),
+        migrations.AddField(
+            model_name='payoutentry',
+            name='owner',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='payout_entries', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='payoutentry',
+            name='rental',
+            field=models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='payout_entry', to='rentals.rental'),
+        ),
+    ]
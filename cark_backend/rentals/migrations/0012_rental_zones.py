@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-19 06:12
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rentals', '0011_rental_payouts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RentalZone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('polygon', models.JSONField()),
+                ('allow_with_driver', models.BooleanField(default=True)),
+                ('allow_without_driver', models.BooleanField(default=True)),
+                ('price_multiplier', models.DecimalField(decimal_places=3, default=1, max_digits=5)),
+                ('priority', models.IntegerField(default=0)),
+                ('is_active', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='rental',
+            name='zone',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='rentals', to='rentals.rentalzone'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 06:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rentals', '0012_rental_zones'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='rental',
+            name='location_version',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-19 06:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rentals', '0013_rental_location_version'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='rentaltelemetrypoint',
+            name='recorded_at',
+            field=models.BigIntegerField(),
+        ),
+        migrations.AlterField(
+            model_name='rentaltrackstate',
+            name='last_recorded_at',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+    ]
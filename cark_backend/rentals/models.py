@@ -1,5 +1,6 @@
 from django.db import models
 from django.contrib.auth import get_user_model
+from django.utils import timezone
 from cars.models import Car
 
 User = get_user_model()
@@ -44,8 +45,9 @@ class Rental(models.Model):
     negotiation_status = models.CharField(max_length=30, choices=NEGOTIATION_STATUS_CHOICES, default='NotNegotiated')
     #نوع الايجار بدون سايقة أو مع سائق
     rental_type = models.CharField(max_length=20, choices=[('WithDriver', 'With Driver'), ('WithoutDriver', 'Without Driver')], default='WithDriver')
-    # زون الايجار
+    # زون الايجار (اسم الزون اللي فيها الـ pickup، بيتملى أوتوماتيك من zone)
     rental_zone_WithoutDriver = models.CharField(max_length=100, null=True, blank=True)
+    zone = models.ForeignKey('RentalZone', on_delete=models.SET_NULL, null=True, blank=True, related_name='rentals')
     
     # مواقع التقاط السيارة والتوصيل
 
@@ -71,9 +73,20 @@ class Rental(models.Model):
     contract_signed = models.BooleanField(default=False)
     # --- END NEW FIELDS ---
 
+    # وقت صرف الأرباح للمالك (null = لسه ماتصرفتش)
+    paid_out_at = models.DateTimeField(null=True, blank=True)
+    # بيزيد مع كل تعديل في المحطات المخططة (جزء من مفتاح الـ geofences في الكاش)
+    location_version = models.PositiveIntegerField(default=0)
+
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # اختيار الحجوزات المنتهية اللي لسه ماتصرفش أرباحها
+            models.Index(fields=['status', 'paid_out_at', 'id'], name='rental_payout_idx'),
+        ]
+
 
 
     def __str__(self):
@@ -93,6 +106,7 @@ class RentalPayment(models.Model):
         ('Cash', 'Cash'),
         ('Card', 'Card'),
         ('PayPal', 'PayPal'),
+        ('Wallet', 'Wallet'),
     ]
 
 
@@ -152,6 +166,9 @@ class RentalUsage(models.Model):
     extra_waiting_minutes = models.IntegerField(default=0)
     waiting_time_cost = models.DecimalField(max_digits=10, decimal_places=2, default=0)
 
+    # وقت التسوية النهائية آخر الرحلة (لو متسجل التسوية مش بتتعاد)
+    settled_at = models.DateTimeField(null=True, blank=True)
+
     def __str__(self):
         return f"Usage info for Rental #{self.rental.id}"
 
@@ -196,16 +213,45 @@ class RentalLog(models.Model):
     ]
 
     rental = models.ForeignKey(Rental, on_delete=models.CASCADE, related_name='logs')
-    timestamp = models.DateTimeField(auto_now_add=True)
+    # وقت الحدث نفسه (مش وقت الكتابة) لأن الكتابة بتتم على دفعات
+    timestamp = models.DateTimeField(default=timezone.now, editable=False)
     event = models.CharField(max_length=255)
     details = models.TextField(null=True, blank=True)
     performed_by_type = models.CharField(max_length=10, choices=PERFORMED_BY_CHOICES, default='System')
     performed_by = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True, related_name='rental_logs')
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['rental', 'timestamp'], name='rentallog_rental_ts_idx'),
+        ]
+
     def __str__(self):
         return f"[{self.timestamp}] Rental #{self.rental.id} - {self.event}"
 
 
+class RentalLogArchive(models.Model):
+    """
+    أرشيف أحداث الإيجار القديمة مقسم بالشهر (month = 'YYYY-MM').
+    الصفوف بتتنقل هنا من RentalLog بأمر archive_rental_logs وبتحتفظ بنفس الـ id.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    month = models.CharField(max_length=7, db_index=True)
+    rental = models.ForeignKey(Rental, on_delete=models.CASCADE, db_constraint=False, related_name='archived_logs')
+    timestamp = models.DateTimeField()
+    event = models.CharField(max_length=255)
+    details = models.TextField(null=True, blank=True)
+    performed_by_type = models.CharField(max_length=10, choices=RentalLog.PERFORMED_BY_CHOICES, default='System')
+    performed_by = models.ForeignKey(User, on_delete=models.DO_NOTHING, db_constraint=False, null=True, blank=True, related_name='+')
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['rental', 'timestamp'], name='rentallogarchive_rental_ts_idx'),
+        ]
+
+    def __str__(self):
+        return f"[{self.timestamp}] Rental #{self.rental_id} - {self.event} (archived {self.month})"
+
+
 class RentalBreakdown(models.Model):
     rental = models.OneToOneField(Rental, on_delete=models.CASCADE, related_name='breakdown')
     planned_km = models.FloatField(default=0)
@@ -227,4 +273,75 @@ class RentalBreakdown(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
-        return f"Breakdown for Rental #{self.rental.id}"
\ No newline at end of file
+        return f"Breakdown for Rental #{self.rental.id}"
+
+
+class PayoutEntry(models.Model):
+    """
+    قيد صرف الأرباح لحجز واحد (append-only). الـ rental unique فالحجز مايتصرفش مرتين.
+    """
+    rental = models.OneToOneField(Rental, on_delete=models.CASCADE, related_name='payout_entry')
+    car = models.ForeignKey(Car, on_delete=models.CASCADE, related_name='payout_entries')
+    owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name='payout_entries')
+    gross_amount = models.DecimalField(max_digits=10, decimal_places=2)
+    platform_commission = models.DecimalField(max_digits=10, decimal_places=2)
+    owner_earnings = models.DecimalField(max_digits=10, decimal_places=2)
+    batch_id = models.CharField(max_length=32, db_index=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Payout for Rental #{self.rental_id} - {self.owner_earnings}"
+
+
+class RentalTelemetryPoint(models.Model):
+    """
+    نقطة GPS واحدة من رحلة جارية (append-only).
+    الإحداثيات integer micro-degrees والوقت epoch seconds عشان الصف يفضل صغير.
+    الكتابة بتتم بـ executemany في rentals.telemetry مش بإنشاء object لكل نقطة.
+    """
+    rental = models.ForeignKey(Rental, on_delete=models.CASCADE, related_name='telemetry_points')
+    recorded_at = models.BigIntegerField()
+    lat_e6 = models.IntegerField()
+    lng_e6 = models.IntegerField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['rental', 'recorded_at'], name='telemetry_rental_ts_idx'),
+        ]
+
+
+class RentalTrackState(models.Model):
+    """
+    آخر نقطة والمسافة المتراكمة لكل رحلة، عشان حساب المسافة يبقى incremental مع كل دفعة نقاط.
+    """
+    rental = models.OneToOneField(Rental, on_delete=models.CASCADE, related_name='track_state')
+    last_lat_e6 = models.IntegerField(null=True, blank=True)
+    last_lng_e6 = models.IntegerField(null=True, blank=True)
+    last_recorded_at = models.BigIntegerField(null=True, blank=True)
+    distance_m = models.FloatField(default=0)
+    point_count = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Track state for Rental #{self.rental_id}"
+
+
+class RentalZone(models.Model):
+    """
+    منطقة تشغيل (polygon) بتحدد فين ينفع الـ pickup والـ dropoff لكل نوع إيجار،
+    ومعامل سعر للحجوزات اللي بتبدأ منها. polygon: [[lat, lng], ...] (3 نقط على الأقل).
+    البحث بيتم من index في الذاكرة (rentals.zones) مش من القاعدة.
+    """
+    name = models.CharField(max_length=100, unique=True)
+    polygon = models.JSONField()
+    allow_with_driver = models.BooleanField(default=True)
+    allow_without_driver = models.BooleanField(default=True)
+    price_multiplier = models.DecimalField(max_digits=5, decimal_places=3, default=1)
+    # لو الزونات متداخلة، الأعلى priority هي اللي بتتختار
+    priority = models.IntegerField(default=0)
+    is_active = models.BooleanField(default=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return self.name
@@ -0,0 +1,125 @@
+import time
+import uuid
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import F, Case, When, Value, IntegerField, DecimalField
+from django.utils import timezone
+
+from cars.models import CarStats
+from core.db import skip_locked_options
+from .billing import settle_rental
+from .events import buffered_events, record_event
+from .models import Rental, RentalBreakdown, PayoutEntry
+from .services import calculate_platform_commission, calculate_driver_earnings
+
+DEFAULT_CHUNK_SIZE = 500
+
+
+def _money(value):
+    return Decimal(str(value)).quantize(Decimal('0.01'))
+
+
+def _settle_missing(rental_ids):
+    # الحجوزات اللي خلصت قبل ما التسوية تتعمل تلقائياً آخر الرحلة
+    unsettled = Rental.objects.filter(id__in=rental_ids).exclude(usage_info__settled_at__isnull=False)
+    for rental in unsettled:
+        settle_rental(rental)
+
+
+def _pay_chunk(rental_ids, batch_id):
+    """
+    صرف أرباح دفعة واحدة من الحجوزات في transaction واحدة.
+    return: عدد الحجوزات اللي اتصرفت
+    """
+    now = timezone.now()
+    with transaction.atomic(), buffered_events():
+        # قفل الحجوزات ومع skip_locked أي runner تاني شغال بالتوازي بياخد دفعة غيرها
+        rows = list(
+            Rental.objects.select_for_update(**skip_locked_options())
+            .filter(id__in=rental_ids, status='Finished', paid_out_at__isnull=True)
+            .values_list('id', 'car_id', 'car__owner_id')
+        )
+        if not rows:
+            return 0
+        ids = [row[0] for row in rows]
+        breakdowns = {
+            rental_id: (final_cost, commission_rate)
+            for rental_id, final_cost, commission_rate in RentalBreakdown.objects.filter(rental_id__in=ids)
+            .values_list('rental_id', 'final_cost', 'commission_rate')
+        }
+
+        entries = []
+        rentals = []
+        car_totals = defaultdict(lambda: [0, Decimal('0')])
+        for rental_id, car_id, owner_id in rows:
+            final_cost, commission_rate = breakdowns.get(rental_id, (0, 0.2))
+            commission = calculate_platform_commission(final_cost, commission_rate)
+            earnings = calculate_driver_earnings(final_cost, commission)
+            entries.append(PayoutEntry(
+                rental_id=rental_id, car_id=car_id, owner_id=owner_id, batch_id=batch_id,
+                gross_amount=_money(final_cost),
+                platform_commission=_money(commission),
+                owner_earnings=_money(earnings),
+            ))
+            rentals.append(Rental(
+                id=rental_id, paid_out_at=now, updated_at=now,
+                platform_commission=_money(commission), driver_earnings=_money(earnings),
+            ))
+            car_totals[car_id][0] += 1
+            car_totals[car_id][1] += _money(earnings)
+
+        PayoutEntry.objects.bulk_create(entries)
+        Rental.objects.bulk_update(rentals, ['paid_out_at', 'updated_at', 'platform_commission', 'driver_earnings'])
+
+        # تحديث إحصائيات كل العربيات في الدفعة بـ UPDATE واحد (F() + CASE)
+        CarStats.objects.bulk_create([CarStats(car_id=car_id) for car_id in car_totals], ignore_conflicts=True)
+        CarStats.objects.filter(car_id__in=car_totals).update(
+            rental_history_count=F('rental_history_count') + Case(
+                *[When(car_id=car_id, then=Value(count)) for car_id, (count, _) in car_totals.items()],
+                output_field=IntegerField(),
+            ),
+            total_earned=F('total_earned') + Case(
+                *[When(car_id=car_id, then=Value(total)) for car_id, (_, total) in car_totals.items()],
+                output_field=DecimalField(max_digits=10, decimal_places=2),
+            ),
+        )
+        for entry in entries:
+            record_event(entry.rental_id, 'Payout processed', f'owner_earnings={entry.owner_earnings}, batch={batch_id}')
+    return len(rows)
+
+
+def run_payouts(chunk_size=DEFAULT_CHUNK_SIZE, limit=None, rental_ids=None, on_chunk=None):
+    """
+    صرف أرباح كل الحجوزات المنتهية اللي لسه ماتصرفتش على دفعات.
+    كل دفعة بتتحفظ لوحدها، فلو التشغيل وقف في النص التشغيل الجاي بيكمل من مكانه.
+    on_chunk: دالة اختيارية بتتنادى بعد كل دفعة بـ (processed, elapsed_seconds)
+    return: dict فيه batch_id وعدد الحجوزات والوقت والمعدل (rentals/second)
+    """
+    batch_id = uuid.uuid4().hex
+    started = time.perf_counter()
+    processed = 0
+    last_id = 0
+
+    while limit is None or processed < limit:
+        size = chunk_size if limit is None else min(chunk_size, limit - processed)
+        queryset = Rental.objects.filter(status='Finished', paid_out_at__isnull=True, id__gt=last_id)
+        if rental_ids is not None:
+            queryset = queryset.filter(id__in=rental_ids)
+        chunk = list(queryset.order_by('id').values_list('id', flat=True)[:size])
+        if not chunk:
+            break
+        last_id = chunk[-1]
+        _settle_missing(chunk)
+        processed += _pay_chunk(chunk, batch_id)
+        if on_chunk:
+            on_chunk(processed, time.perf_counter() - started)
+
+    elapsed = time.perf_counter() - started
+    return {
+        'batch_id': batch_id,
+        'processed': processed,
+        'seconds': round(elapsed, 3),
+        'rentals_per_second': round(processed / elapsed, 1) if elapsed and processed else 0,
+    }
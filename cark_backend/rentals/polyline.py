@@ -0,0 +1,91 @@
+import math
+from array import array
+
+from .geo import EARTH_RADIUS_M
+
+# فك وتشفير الـ Encoded Polyline (صيغة Google) وحساب طول المسار.
+# الملف ده مش بيعتمد على Django عشان يتقاس لوحده في benchmarks/bench_polyline.py
+
+
+def decode_polyline(encoded, precision=5):
+    """
+    فك الـ polyline لمصفوفتين (lats, lngs) من نوع array('d').
+    """
+    factor = float(10 ** precision)
+    data = encoded.encode('ascii')
+    length = len(data)
+    lats = array('d')
+    lngs = array('d')
+    index = lat = lng = 0
+
+    while index < length:
+        result = shift = 0
+        while True:
+            b = data[index] - 63
+            index += 1
+            result |= (b & 0x1f) << shift
+            shift += 5
+            if b < 0x20:
+                break
+        lat += ~(result >> 1) if result & 1 else result >> 1
+
+        result = shift = 0
+        while True:
+            b = data[index] - 63
+            index += 1
+            result |= (b & 0x1f) << shift
+            shift += 5
+            if b < 0x20:
+                break
+        lng += ~(result >> 1) if result & 1 else result >> 1
+
+        lats.append(lat / factor)
+        lngs.append(lng / factor)
+
+    return lats, lngs
+
+
+def _encode_value(value, out):
+    value = ~(value << 1) if value < 0 else value << 1
+    while value >= 0x20:
+        out.append((0x20 | (value & 0x1f)) + 63)
+        value >>= 5
+    out.append(value + 63)
+
+
+def encode_polyline(points, precision=5):
+    """
+    تشفير قائمة نقاط [(lat, lng), ...] لـ polyline.
+    """
+    factor = 10 ** precision
+    out = bytearray()
+    prev_lat = prev_lng = 0
+    for lat, lng in points:
+        lat_i = int(round(lat * factor))
+        lng_i = int(round(lng * factor))
+        _encode_value(lat_i - prev_lat, out)
+        _encode_value(lng_i - prev_lng, out)
+        prev_lat, prev_lng = lat_i, lng_i
+    return out.decode('ascii')
+
+
+def path_length_m(lats, lngs):
+    """
+    طول المسار بالمتر (مجموع haversine لكل الأجزاء).
+    التحويل للراديان و cos(lat) بيتحسبوا مرة واحدة لكل نقطة مش مرتين لكل جزء.
+    """
+    if len(lats) < 2:
+        return 0.0
+    radians = math.radians
+    sin = math.sin
+    asin = math.asin
+    sqrt = math.sqrt
+    rlat = array('d', map(radians, lats))
+    rlng = array('d', map(radians, lngs))
+    coslat = array('d', map(math.cos, rlat))
+
+    total = 0.0
+    for lat1, lat2, lng1, lng2, cos1, cos2 in zip(rlat, rlat[1:], rlng, rlng[1:], coslat, coslat[1:]):
+        a = sin((lat2 - lat1) * 0.5) ** 2 + cos1 * cos2 * sin((lng2 - lng1) * 0.5) ** 2
+        total += asin(sqrt(a))
+    return 2 * EARTH_RADIUS_M * total
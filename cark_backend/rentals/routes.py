@@ -0,0 +1,68 @@
+import hashlib
+from array import array
+
+from django.core.cache import cache
+
+from core.metrics import CACHE_LOOKUPS
+from .models import PlannedTrip
+from .polyline import decode_polyline, path_length_m
+
+# مدة تخزين المسار المفكوك في الكاش (بالثانية)
+ROUTE_CACHE_SECONDS = 24 * 3600
+
+
+def _route_cache_key(trip):
+    digest = hashlib.md5(trip.route_polyline.encode()).hexdigest()
+    return f'trip_route:{trip.pk}:{digest}'
+
+
+def route_geometry(trip):
+    """
+    المسار المفكوك للرحلة مع طوله بالكيلومتر، من الكاش لو موجود.
+    الـ key فيه hash للـ polyline فأي تعديل في المسار بيعمل key جديد تلقائياً.
+    return: dict فيه lats, lngs, km أو None لو مفيش polyline أو الـ polyline بايظ
+    """
+    if not trip.route_polyline:
+        return None
+    key = _route_cache_key(trip)
+    geometry = cache.get(key)
+    CACHE_LOOKUPS.inc(cache='trip_route', result='miss' if geometry is None else 'hit')
+    if geometry is None:
+        try:
+            lats, lngs = decode_polyline(trip.route_polyline)
+        except (ValueError, IndexError):
+            # polyline متسجل من غير الـ serializer (الأدمن مثلاً)؛ المسافة بتتحسب من المحطات
+            return None
+        geometry = {'lats': lats, 'lngs': lngs, 'km': path_length_m(lats, lngs) / 1000}
+        cache.set(key, geometry, ROUTE_CACHE_SECONDS)
+    return geometry
+
+
+def derive_planned_km(rental):
+    """
+    حساب المسافة المخططة للرحلة على السيرفر:
+    - من الـ route_polyline لو موجود
+    - غير كده من pickup -> المحطات بالترتيب -> dropoff
+    return: المسافة بالكيلومتر أو None لو مفيش أي إحداثيات
+    """
+    trip = PlannedTrip.objects.filter(rental_id=rental.pk).first()
+    if trip is not None:
+        geometry = route_geometry(trip)
+        if geometry is not None:
+            return geometry['km']
+
+    lats = array('d')
+    lngs = array('d')
+    if rental.pickup_lat is not None and rental.pickup_lng is not None:
+        lats.append(float(rental.pickup_lat))
+        lngs.append(float(rental.pickup_lng))
+    if trip is not None:
+        for lat, lng in trip.stops.order_by('stop_order').values_list('latitude', 'longitude'):
+            lats.append(float(lat))
+            lngs.append(float(lng))
+    if rental.dropoff_lat is not None and rental.dropoff_lng is not None:
+        lats.append(float(rental.dropoff_lat))
+        lngs.append(float(rental.dropoff_lng))
+    if len(lats) < 2:
+        return None
+    return path_length_m(lats, lngs) / 1000
@@ -1,5 +1,11 @@
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
 from rest_framework import serializers
-from .models import Rental, RentalPayment, RentalUsage, PlannedTrip, PlannedTripStop, RentalBreakdown
+from .geofence import geofence_key
+from .polyline import decode_polyline
+from . import zones
+from .models import Rental, RentalPayment, RentalUsage, PlannedTrip, PlannedTripStop, RentalBreakdown, RentalLog, RentalZone
 from cars.models import Car, CarRentalOptions, CarUsagePolicy
 from users.models import User
 
@@ -19,7 +25,7 @@ class CarRentalOptionsSerializer(serializers.ModelSerializer):
 class CarUsagePolicySerializer(serializers.ModelSerializer):
     class Meta:
         model = CarUsagePolicy
-        fields = ['daily_km_limit', 'extra_km_cost', 'daily_hour_limit', 'extra_hour_cost']
+        fields = ['daily_km_limit', 'extra_km_cost', 'daily_hour_limit', 'extra_hour_cost', 'waiting_hour_cost']
 
 # Serializer لعرض بيانات السيارة مع الخيارات والسياسة
 class CarSerializer(serializers.ModelSerializer):
@@ -65,6 +71,12 @@ class RentalBreakdownSerializer(serializers.ModelSerializer):
             'created_at', 'updated_at'
         ]
 
+# Serializer لأحداث سجل الإيجار (بيشتغل مع RentalLog و RentalLogArchive)
+class RentalLogSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = RentalLog
+        fields = ['id', 'timestamp', 'event', 'details', 'performed_by_type', 'performed_by']
+
 # Serializer رئيسي لعرض الحجز بكل التفاصيل
 class RentalSerializer(serializers.ModelSerializer):
     renter = UserSerializer(read_only=True)
@@ -79,20 +91,50 @@ class RentalSerializer(serializers.ModelSerializer):
             'id', 'renter', 'car', 'start_date', 'end_date', 'status', 'negotiation_status',
             'rental_type', 'pickup_lat', 'pickup_lng', 'dropoff_lat', 'dropoff_lng', 'pickup_address', 'dropoff_address',
             'payment_method', 'insurance_buffer', 'deposit', 'platform_commission', 'driver_earnings', 'contract_type', 'contract_signed',
-            'created_at', 'updated_at', 'planned_trip', 'usage_info', 'payment_info', 'breakdown'
+            'created_at', 'updated_at', 'planned_trip', 'usage_info', 'payment_info', 'breakdown', 'zone'
+        ]
+
+# Serializers مختصرة لقوايم الحجوزات (list): من غير الرحلة والمحطات والفلوس
+class RentalRenterSummarySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = User
+        fields = ['id', 'first_name', 'last_name']
+
+class RentalCarSummarySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Car
+        fields = ['id', 'brand', 'model', 'plate_number', 'car_category']
+
+class RentalListSerializer(serializers.ModelSerializer):
+    renter = RentalRenterSummarySerializer(read_only=True)
+    car = RentalCarSummarySerializer(read_only=True)
+    class Meta:
+        model = Rental
+        fields = [
+            'id', 'renter', 'car', 'start_date', 'end_date', 'status', 'rental_type',
+            'payment_method', 'created_at', 'updated_at'
         ]
 
 # Serializer لإنشاء/تحديث الحجز مع المحطات
 class RentalCreateUpdateSerializer(serializers.ModelSerializer):
     stops = PlannedTripStopSerializer(many=True, write_only=True)
+    route_polyline = serializers.CharField(write_only=True, required=False, allow_null=True, allow_blank=True)
     class Meta:
         model = Rental
         fields = [
             'car', 'start_date', 'end_date', 'rental_type',
             'pickup_lat', 'pickup_lng', 'dropoff_lat', 'dropoff_lng', 'pickup_address', 'dropoff_address',
-            'payment_method', 'stops'
+            'payment_method', 'stops', 'route_polyline'
         ]
 
+    def validate_route_polyline(self, value):
+        if value:
+            try:
+                decode_polyline(value)
+            except (ValueError, IndexError):
+                raise serializers.ValidationError('Invalid encoded polyline.')
+        return value
+
     def validate(self, data):
         # تحقق من وجود السيارة والتواريخ والمحطات
         if not data.get('car'):
@@ -101,24 +143,138 @@ class RentalCreateUpdateSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError('Start and end dates are required.')
         if not data.get('stops') or len(data.get('stops')) == 0:
             raise serializers.ValidationError('At least one stop is required.')
+        orders = [stop['stop_order'] for stop in data['stops']]
+        if len(orders) != len(set(orders)):
+            raise serializers.ValidationError('Stop orders must be unique.')
+        if self.instance is None or self.LOCATION_FIELDS.intersection(data):
+            self._validate_zone(data)
         return data
 
+    LOCATION_FIELDS = {'car', 'rental_type', 'pickup_lat', 'pickup_lng', 'dropoff_lat', 'dropoff_lng'}
+    # إتاحة العربية لكل نوع إيجار في CarRentalOptions
+    CAR_AVAILABILITY_FIELDS = {'WithDriver': 'available_with_driver', 'WithoutDriver': 'available_without_driver'}
+
+    def _validate_zone(self, data):
+        """
+        العربية لازم تكون متاحة لنوع الإيجار، ولو في زونات للنوع ده الـ pickup والـ dropoff لازم يبقوا جواها.
+        الزون اللي فيها الـ pickup بتتحفظ مع الحجز (ومعامل السعر بتاعها بيتطبق في الـ breakdown).
+        """
+        def value(name):
+            return data[name] if name in data else getattr(self.instance, name, None)
+
+        rental_type = value('rental_type') or 'WithDriver'
+        options = getattr(value('car'), 'rental_options', None)
+        if options is None or not getattr(options, self.CAR_AVAILABILITY_FIELDS[rental_type]):
+            raise serializers.ValidationError({'rental_type': f'This car is not available for {rental_type} rentals.'})
+
+        index = zones.get_index()
+        pickup = (value('pickup_lat'), value('pickup_lng'))
+        dropoff = (value('dropoff_lat'), value('dropoff_lng'))
+        zone = index.locate(*pickup, rental_type) if None not in pickup else None
+        if index.restricts(rental_type):
+            if zone is None:
+                raise serializers.ValidationError({'pickup_lat': 'Pickup location is outside the allowed zones for this rental type.'})
+            if None not in dropoff and index.locate(*dropoff, rental_type) is None:
+                raise serializers.ValidationError({'dropoff_lat': 'Drop-off location is outside the allowed zones for this rental type.'})
+        data['zone_id'] = zone.id if zone is not None else None
+        data['rental_zone_WithoutDriver'] = zone.name if zone is not None and rental_type == 'WithoutDriver' else None
+
+    # الحقول اللي بيحددها العميل لكل محطة، وأي حقول تانية (الانتظار الفعلي، التحقق من الموقع...) بتتحفظ زي ما هي
+    PLANNED_STOP_FIELDS = ['latitude', 'longitude', 'approx_waiting_time_minutes', 'address']
+
     def create(self, validated_data):
         stops_data = validated_data.pop('stops')
-        rental = Rental.objects.create(**validated_data)
-        planned_trip = PlannedTrip.objects.create(rental=rental)
-        for stop in stops_data:
-            PlannedTripStop.objects.create(planned_trip=planned_trip, **stop)
+        route_polyline = validated_data.pop('route_polyline', None)
+        with transaction.atomic():
+            rental = Rental.objects.create(**validated_data)
+            planned_trip = PlannedTrip.objects.create(rental=rental, route_polyline=route_polyline or None)
+            PlannedTripStop.objects.bulk_create([
+                PlannedTripStop(planned_trip=planned_trip, **stop) for stop in stops_data
+            ])
         return rental
 
     def update(self, instance, validated_data):
         stops_data = validated_data.pop('stops', None)
-        for attr, value in validated_data.items():
-            setattr(instance, attr, value)
-        instance.save()
-        if stops_data is not None:
-            planned_trip = instance.planned_trip
-            planned_trip.stops.all().delete()
-            for stop in stops_data:
-                PlannedTripStop.objects.create(planned_trip=planned_trip, **stop)
+        route_polyline = validated_data.pop('route_polyline', False)
+        old_fence_key = geofence_key(instance)
+        with transaction.atomic():
+            for attr, value in validated_data.items():
+                setattr(instance, attr, value)
+            instance.save()
+            planned_trip = None
+            if route_polyline is not False or stops_data is not None:
+                planned_trip, _ = PlannedTrip.objects.get_or_create(rental=instance)
+            if route_polyline is not False:
+                planned_trip.route_polyline = route_polyline or None
+                planned_trip.save(update_fields=['route_polyline'])
+            if stops_data is not None and self._sync_stops(planned_trip, stops_data):
+                Rental.objects.filter(pk=instance.pk).update(location_version=F('location_version') + 1)
+                instance.refresh_from_db(fields=['location_version'])
+            if old_fence_key != geofence_key(instance):
+                # النسخة القديمة مابقتش بتتقري؛ بنمسحها من كاش الـ process ده بعد الـ commit
+                transaction.on_commit(lambda: cache.delete(old_fence_key))
         return instance
+
+    def _sync_stops(self, planned_trip, stops_data):
+        """
+        مقارنة المحطات الجديدة بالموجودة على أساس stop_order:
+        - المحطات اللي اتشالت بتتمسح
+        - الجديدة بتتعمل بـ bulk_create
+        - اللي اتغيرت بتتحدث بـ bulk_update في الحقول المخططة بس
+        return: True لو حصل أي تغيير
+        """
+        existing = {stop.stop_order: stop for stop in planned_trip.stops.all()}
+        incoming = {stop['stop_order']: stop for stop in stops_data}
+
+        removed = [stop.id for order, stop in existing.items() if order not in incoming]
+        created = []
+        changed = []
+        for order, data in incoming.items():
+            stop = existing.get(order)
+            if stop is None:
+                created.append(PlannedTripStop(planned_trip=planned_trip, **data))
+                continue
+            dirty = False
+            for field in self.PLANNED_STOP_FIELDS:
+                if field in data and getattr(stop, field) != data[field]:
+                    setattr(stop, field, data[field])
+                    dirty = True
+            if dirty:
+                changed.append(stop)
+
+        if removed:
+            PlannedTripStop.objects.filter(id__in=removed).delete()
+        if changed:
+            PlannedTripStop.objects.bulk_update(changed, self.PLANNED_STOP_FIELDS)
+        if created:
+            PlannedTripStop.objects.bulk_create(created)
+        return bool(removed or changed or created)
+
+
+# مدخلات حساب التكاليف (عند إنشاء الحجز و calculate_costs). بتتحقق قبل أي حاجة
+# عشان القيم الغلط ترجع 400 بدل ما تفشل جوه الـ background task
+class RentalCostInputSerializer(serializers.Serializer):
+    planned_km = serializers.FloatField(min_value=0, default=0)
+    total_waiting_minutes = serializers.IntegerField(min_value=0, default=0)
+
+
+# Serializer لزونات التشغيل (rentals.zones)
+class RentalZoneSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = RentalZone
+        fields = [
+            'id', 'name', 'polygon', 'allow_with_driver', 'allow_without_driver',
+            'price_multiplier', 'priority', 'is_active', 'created_at', 'updated_at'
+        ]
+        read_only_fields = ['created_at', 'updated_at']
+
+    def validate_polygon(self, value):
+        error = zones.validate_polygon(value)
+        if error:
+            raise serializers.ValidationError(error)
+        return value
+
+    def validate_price_multiplier(self, value):
+        if value <= 0:
+            raise serializers.ValidationError('Price multiplier must be greater than 0.')
+        return value
@@ -41,6 +41,17 @@ def calculate_waiting_time_cost(total_waiting_minutes, waiting_hour_rate):
 def calculate_base_cost(rental_days, daily_price):
     return float(rental_days) * float(daily_price)
 
+# حساب الساعات الإضافية
+# used_hours: عدد ساعات الرحلة الفعلية
+# rental_days: عدد الأيام
+# daily_hour_limit: الحد اليومي للساعات
+# return: الساعات الإضافية
+
+def calculate_extra_hours(used_hours, rental_days, daily_hour_limit):
+    if not daily_hour_limit:
+        return 0.0
+    return max(0.0, float(used_hours) - float(rental_days) * float(daily_hour_limit))
+
 # حساب البوفر (25%)
 # total_costs: إجمالي التكاليف
 # payment_method: طريقة الدفع
@@ -80,19 +91,21 @@ def calculate_driver_earnings(final_cost, platform_commission):
 # extra_km_cost: تكلفة الكيلومترات الإضافية
 # waiting_time_cost: تكلفة الانتظار
 # insurance_buffer: البوفر
+# extra_hour_charges: تكلفة الساعات الإضافية (بتتحسب في التسوية آخر الرحلة)
 # return: التكلفة النهائية
 
-def calculate_final_cost(base_cost, extra_km_cost, waiting_time_cost, insurance_buffer):
-    return float(base_cost) + float(extra_km_cost) + float(waiting_time_cost) + float(insurance_buffer)
+def calculate_final_cost(base_cost, extra_km_cost, waiting_time_cost, insurance_buffer, extra_hour_charges=0):
+    return float(base_cost) + float(extra_km_cost) + float(waiting_time_cost) + float(insurance_buffer) + float(extra_hour_charges)
 
 # حساب إجمالي التكاليف بدون البوفر
 # base_cost: تكلفة الإيجار الأساسية
 # extra_km_cost: تكلفة الكيلومترات الإضافية
 # waiting_time_cost: تكلفة الانتظار
+# extra_hour_charges: تكلفة الساعات الإضافية
 # return: الإجمالي
 
-def calculate_total_costs(base_cost, extra_km_cost, waiting_time_cost):
-    return float(base_cost) + float(extra_km_cost) + float(waiting_time_cost)
+def calculate_total_costs(base_cost, extra_km_cost, waiting_time_cost, extra_hour_charges=0):
+    return float(base_cost) + float(extra_km_cost) + float(waiting_time_cost) + float(extra_hour_charges)
 
 # دالة رئيسية لحساب كل شيء دفعة واحدة
 # تعيد dict فيه كل التفاصيل المالية المطلوبة للفلو
@@ -106,17 +119,18 @@ def calculate_rental_financials(
     waiting_hour_rate,
     daily_price,
     payment_method,
-    commission_rate=0.2
+    commission_rate=0.2,
+    extra_hour_charges=0
 ):
     allowed_km = calculate_allowed_km(rental_days, daily_km_limit)
     extra_km = calculate_extra_km(planned_km, allowed_km)
     extra_km_cost = calculate_extra_km_cost(extra_km, extra_km_rate)
     waiting_time_cost = calculate_waiting_time_cost(total_waiting_minutes, waiting_hour_rate)
     base_cost = calculate_base_cost(rental_days, daily_price)
-    total_costs = calculate_total_costs(base_cost, extra_km_cost, waiting_time_cost)
+    total_costs = calculate_total_costs(base_cost, extra_km_cost, waiting_time_cost, extra_hour_charges)
     insurance_buffer = calculate_insurance_buffer(total_costs, payment_method)
     deposit = calculate_deposit(total_costs, insurance_buffer)
-    final_cost = calculate_final_cost(base_cost, extra_km_cost, waiting_time_cost, insurance_buffer)
+    final_cost = calculate_final_cost(base_cost, extra_km_cost, waiting_time_cost, insurance_buffer, extra_hour_charges)
     platform_commission = calculate_platform_commission(final_cost, commission_rate)
     driver_earnings = calculate_driver_earnings(final_cost, platform_commission)
     return {
@@ -124,6 +138,7 @@ def calculate_rental_financials(
         'extra_km': extra_km,
         'extra_km_cost': extra_km_cost,
         'waiting_time_cost': waiting_time_cost,
+        'extra_hour_charges': extra_hour_charges,
         'base_cost': base_cost,
         'total_costs': total_costs,
         'insurance_buffer': insurance_buffer,
@@ -0,0 +1,34 @@
+from django.db.models.signals import post_save, post_delete
+from django.db import transaction
+from django.dispatch import receiver
+from core.conditional import touch
+from . import zones
+from .models import Rental, PlannedTrip, PlannedTripStop, RentalUsage, RentalPayment, RentalZone
+
+
+@receiver(post_save, sender=PlannedTrip)
+@receiver(post_save, sender=RentalUsage)
+@receiver(post_save, sender=RentalPayment)
+@receiver(post_delete, sender=PlannedTrip)
+@receiver(post_delete, sender=RentalUsage)
+@receiver(post_delete, sender=RentalPayment)
+def touch_rental(sender, instance, **kwargs):
+    # البيانات دي بتظهر جوه الحجز ومالهاش updated_at، فالحجز نفسه بيتعمله touch عشان الـ ETag يتغير
+    touch(Rental, pk=instance.rental_id)
+
+
+@receiver(post_save, sender=PlannedTripStop)
+@receiver(post_delete, sender=PlannedTripStop)
+def touch_rental_from_stop(sender, instance, **kwargs):
+    # لو الرحلة متحملة مع المحطة (select_related) مانحتاجش subquery
+    if PlannedTripStop.planned_trip.is_cached(instance):
+        touch(Rental, pk=instance.planned_trip.rental_id)
+    else:
+        touch(Rental, planned_trip__id=instance.planned_trip_id)
+
+
+@receiver(post_save, sender=RentalZone)
+@receiver(post_delete, sender=RentalZone)
+def refresh_zone_index(sender, instance, **kwargs):
+    # الـ index بيتبني من جديد بعد الـ commit (والـ workers التانية في خلال ZONE_REFRESH_SECONDS)
+    transaction.on_commit(zones.invalidate)
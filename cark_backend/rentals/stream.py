@@ -0,0 +1,93 @@
+"""
+Server-Sent Events لتغييرات حالة الحجوزات بدل الـ polling على GET /api/rentals/<id>/.
+الـ endpoint async ومحتاج السيرفر يشتغل ASGI (cark_backend.asgi:application).
+"""
+import asyncio
+import json
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from django.http import JsonResponse, StreamingHttpResponse
+
+from core.auth import aauthenticate_jwt
+from core.pubsub import get_broker, publish
+from .models import Rental
+
+# كل قد إيه بيتبعت comment عشان الـ proxies ماتقفلش الاتصال
+KEEPALIVE_SECONDS = getattr(settings, 'RENTAL_STREAM_KEEPALIVE_SECONDS', 15)
+CLOSED_STATUSES = ('Finished', 'Canceled')
+
+
+def user_channel(user_id):
+    return f'rentals:user:{user_id}'
+
+
+def status_delta(rental, from_status, to_status, updated_at):
+    return {'id': rental.pk, 'from': from_status, 'status': to_status, 'updated_at': updated_at}
+
+
+def publish_status_change(rental, delta):
+    # المستأجر وصاحب العربية الاتنين بيوصلهم التغيير
+    for user_id in {rental.renter_id, rental.car.owner_id}:
+        publish(user_channel(user_id), delta)
+
+
+def _sse(event, data, event_id=None):
+    lines = []
+    if event_id is not None:
+        lines.append(f'id: {event_id}')
+    lines.append(f'event: {event}')
+    lines.append(f'data: {json.dumps(data, cls=DjangoJSONEncoder)}')
+    return '\n'.join(lines) + '\n\n'
+
+
+async def _snapshot(user):
+    rentals = (
+        Rental.objects.filter(Q(renter=user) | Q(car__owner=user))
+        .exclude(status__in=CLOSED_STATUSES)
+        .values('id', 'status', 'updated_at')
+    )
+    return [row async for row in rentals]
+
+
+async def _events(user):
+    # الاشتراك قبل الـ snapshot عشان مفيش تغيير يضيع بينهم
+    subscription = get_broker().subscribe(user_channel(user.pk))
+    event_id = 0
+    try:
+        yield _sse('snapshot', await _snapshot(user), event_id)
+        while True:
+            try:
+                delta = await subscription.get(timeout=KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                yield ': keepalive\n\n'
+                continue
+            event_id += 1
+            if subscription.overflowed:
+                # العميل فاتته رسايل، فبياخد snapshot كامل من جديد
+                subscription.overflowed = False
+                yield _sse('snapshot', await _snapshot(user), event_id)
+                continue
+            yield _sse('status', delta, event_id)
+    finally:
+        subscription.close()
+
+
+async def rental_status_stream(request):
+    """
+    GET /api/rentals/stream/
+    أول event هو snapshot بحالات الحجوزات المفتوحة للمستخدم (كمستأجر أو صاحب عربية)،
+    وبعدها event "status" لكل تغيير حالة: {"id", "from", "status", "updated_at"}
+    """
+    if request.method != 'GET':
+        return JsonResponse({'error': 'Method not allowed.'}, status=405)
+    # EventSource في المتصفح مبيبعتش headers، فالتوكن ممكن ييجي في ?token= كمان
+    user = await aauthenticate_jwt(request, allow_query_token=True)
+    if user is None:
+        return JsonResponse({'error': 'Authentication credentials were not provided or are invalid.'}, status=401)
+    response = StreamingHttpResponse(_events(user), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # nginx مايعملش buffering للـ stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -0,0 +1,29 @@
+from django.db import transaction
+
+from core.taskqueue import task
+from .billing import create_rental_breakdown, resolve_planned_km
+from .models import Rental, RentalUsage
+
+# الحجوزات دي الـ breakdown بتاعها نهائي (التسوية) أو مالوش لازمة
+CLOSED_STATUSES = ('Finished', 'Canceled')
+
+
+@task(priority=10)
+def compute_rental_breakdown(rental_id, planned_km=0, total_waiting_minutes=0):
+    """
+    حساب الـ breakdown المبدئي للحجز بعد إنشائه (المسافة من المسار والمحطات + التكاليف).
+    الحجز بيتقفل (select_for_update) عشان الشغلانة ماتكتبش فوق breakdown التسوية النهائية
+    لو اتأخرت في الطابور لحد ما الرحلة خلصت.
+    """
+    with transaction.atomic():
+        rental = (
+            Rental.objects.select_for_update()
+            .select_related('car__rental_options', 'car__usage_policy')
+            .filter(pk=rental_id).first()
+        )
+        if rental is None or rental.status in CLOSED_STATUSES:
+            return
+        if RentalUsage.objects.filter(rental=rental, settled_at__isnull=False).exists():
+            return
+        planned_km = resolve_planned_km(rental, {'planned_km': planned_km})
+        create_rental_breakdown(rental, planned_km, total_waiting_minutes)
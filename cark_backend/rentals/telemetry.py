@@ -0,0 +1,141 @@
+from datetime import datetime, time
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .geo import to_micro, from_micro, haversine_m, is_valid_coordinate
+from .models import RentalTelemetryPoint, RentalTrackState, RentalUsage
+
+# أقصى عدد نقاط في الطلب الواحد
+MAX_POINTS_PER_BATCH = getattr(settings, 'TELEMETRY_MAX_POINTS_PER_BATCH', 1000)
+
+# أي مسافة بين نقطتين متتاليتين بسرعة أعلى من كده بتتعتبر قفزة GPS وماتتحسبش في المسافة
+MAX_SPEED_KMH = getattr(settings, 'TELEMETRY_MAX_SPEED_KMH', 200)
+
+# أقصى فرق مسموح بين ساعة الجهاز وساعة السيرفر: النقاط بتتقبل بس من أول يوم الإيجار - الفرق ده
+# لحد وقت السيرفر الحالي + الفرق ده، عشان نقطة وقتها في المستقبل ماتقفلش الرحلة على النقاط الحقيقية
+CLOCK_SKEW_SECONDS = getattr(settings, 'TELEMETRY_CLOCK_SKEW_SECONDS', 300)
+
+# فجوة أطول من كده (بالثواني) بين نقطتين متتاليتين معناها إن العربية ماكانتش شغالة في الوقت ده
+ACTIVE_GAP_SECONDS = getattr(settings, 'TELEMETRY_ACTIVE_GAP_SECONDS', 600)
+
+
+class TelemetryError(Exception):
+    pass
+
+
+def parse_points(raw_points):
+    """
+    تحويل النقاط من [[lat, lng, epoch_seconds], ...] لـ tuples (ts, lat_e6, lng_e6) مترتبة بالوقت.
+    """
+    if not isinstance(raw_points, list) or not raw_points:
+        raise TelemetryError('points must be a non-empty list of [lat, lng, timestamp].')
+    if len(raw_points) > MAX_POINTS_PER_BATCH:
+        raise TelemetryError(f'At most {MAX_POINTS_PER_BATCH} points are accepted per request.')
+
+    points = []
+    for raw in raw_points:
+        if not isinstance(raw, (list, tuple)) or len(raw) != 3:
+            raise TelemetryError('Each point must be [lat, lng, timestamp].')
+        try:
+            lat, lng, ts = float(raw[0]), float(raw[1]), int(raw[2])
+        except (TypeError, ValueError, OverflowError):
+            raise TelemetryError('Each point must be [lat, lng, timestamp].')
+        if not is_valid_coordinate(lat, lng):
+            raise TelemetryError('Point coordinates are out of range.')
+        points.append((ts, to_micro(lat), to_micro(lng)))
+    points.sort()
+    return points
+
+
+def accepted_window(rental):
+    """
+    return: (أقل، أكبر) epoch seconds مقبول لنقاط الرحلة دي
+    """
+    tz = timezone.get_current_timezone()
+    rental_start = datetime.combine(rental.start_date, time.min, tzinfo=tz)
+    return (
+        int(rental_start.timestamp()) - CLOCK_SKEW_SECONDS,
+        int(timezone.now().timestamp()) + CLOCK_SKEW_SECONDS,
+    )
+
+
+def ingest_points(rental, raw_points):
+    """
+    تخزين دفعة نقاط GPS لرحلة جارية وتحديث المسافة المقطوعة بشكل incremental.
+    النقاط اللي وقتها قبل أو يساوي آخر نقطة متسجلة بتتهمل (تكرار أو وصول متأخر)،
+    وكمان اللي وقتها برا accepted_window.
+    return: dict فيه عدد النقاط المقبولة والمتجاهلة وإجمالي المسافة بالكيلومتر
+    """
+    points = parse_points(raw_points)
+    earliest, latest = accepted_window(rental)
+
+    with transaction.atomic():
+        state, _ = RentalTrackState.objects.select_for_update().get_or_create(rental=rental)
+
+        last = None
+        if state.last_recorded_at is not None:
+            last = (state.last_recorded_at, state.last_lat_e6, state.last_lng_e6)
+
+        rows = []
+        distance_m = state.distance_m
+        max_speed_ms = MAX_SPEED_KMH / 3.6
+        for point in points:
+            ts, lat_e6, lng_e6 = point
+            if not earliest <= ts <= latest or (last is not None and ts <= last[0]):
+                continue
+            if last is not None:
+                segment = haversine_m(from_micro(last[1]), from_micro(last[2]), from_micro(lat_e6), from_micro(lng_e6))
+                if segment <= max_speed_ms * (ts - last[0]):
+                    distance_m += segment
+            rows.append((rental.pk, ts, lat_e6, lng_e6))
+            last = point
+
+        if rows:
+            table = connection.ops.quote_name(RentalTelemetryPoint._meta.db_table)
+            with connection.cursor() as cursor:
+                cursor.executemany(
+                    f'INSERT INTO {table} (rental_id, recorded_at, lat_e6, lng_e6) VALUES (%s, %s, %s, %s)',
+                    rows,
+                )
+            state.last_recorded_at, state.last_lat_e6, state.last_lng_e6 = last
+            state.distance_m = distance_m
+            state.point_count += len(rows)
+            state.save()
+            RentalUsage.objects.update_or_create(
+                rental=rental,
+                defaults={'total_distance_used': Decimal(distance_m / 1000).quantize(Decimal('0.01'))},
+            )
+
+    return {
+        'accepted': len(rows),
+        'ignored': len(points) - len(rows),
+        'total_distance_km': round(state.distance_m / 1000, 3),
+    }
+
+
+def active_intervals(rental_id):
+    """
+    فترات الاستخدام الفعلي للرحلة من نقاط الـ GPS: النقاط المتتالية اللي الفرق بينها
+    ACTIVE_GAP_SECONDS أو أقل بتتجمع في فترة واحدة.
+    return: list of (start, end) epoch seconds
+    """
+    intervals = []
+    timestamps = (
+        RentalTelemetryPoint.objects.filter(rental_id=rental_id)
+        .order_by('recorded_at').values_list('recorded_at', flat=True)
+    )
+    start = previous = None
+    for ts in timestamps.iterator():
+        if previous is not None and ts - previous > ACTIVE_GAP_SECONDS:
+            if previous > start:
+                intervals.append((start, previous))
+            start = ts
+        elif start is None:
+            start = ts
+        previous = ts
+    if previous is not None and previous > start:
+        intervals.append((start, previous))
+    return intervals
@@ -1,3 +1,454 @@
-from django.test import TestCase
+import time
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
 
-# Create your tests here.
+from unittest import mock
+
+from django.db import connection, transaction
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from cars.models import CarStats, CarUsagePolicy
+from core.db import skip_locked_options
+from cars.tests import create_car
+from core.models import Task
+from users.tests import create_user, bearer
+from . import zones
+from .telemetry import parse_points, TelemetryError
+from .billing import settle_rental
+from .payouts import run_payouts
+from .events import buffered_events, record_event
+from .routes import derive_planned_km
+from .models import (
+    PayoutEntry, Rental, RentalTrackState, PlannedTrip, PlannedTripStop, RentalLog, RentalUsage, RentalBreakdown, RentalTelemetryPoint, RentalZone,
+)
+from .transitions import transition_rental, TransitionError, TransitionConflict, TransitionForbidden
+
+CAIRO = [[29.95, 31.15], [29.95, 31.40], [30.15, 31.40], [30.15, 31.15]]
+DOWNTOWN = [[30.0, 31.2], [30.1, 31.2], [30.0, 31.3]]
+
+
+def create_rental(renter, car, status='Pending', stops=2, start_date=date(2026, 1, 1), days=3):
+    """
+    حجز بـ planned trip فيه stops (10 دقايق انتظار مخطط لكل واحدة).
+    """
+    rental = Rental.objects.create(
+        renter=renter, car=car, start_date=start_date, end_date=start_date + timedelta(days=days - 1), status=status,
+        pickup_lat=Decimal('30.0444'), pickup_lng=Decimal('31.2357'),
+        dropoff_lat=Decimal('30.0500'), dropoff_lng=Decimal('31.2400'),
+    )
+    trip = PlannedTrip.objects.create(rental=rental)
+    for i in range(stops):
+        PlannedTripStop.objects.create(
+            planned_trip=trip, stop_order=i + 1, latitude=Decimal('30.0460') + Decimal(i) / 1000,
+            longitude=Decimal('31.2370'), approx_waiting_time_minutes=10,
+        )
+    return rental
+
+
+def utc(*args):
+    return datetime(*args, tzinfo=dt_timezone.utc)
+
+
+class RentalTransitionTests(TestCase):
+    def setUp(self):
+        self.owner = create_user()
+        self.renter = create_user()
+        self.car = create_car(self.owner)
+        self.rental = create_rental(self.renter, self.car)
+
+    def test_stale_status_loses_the_compare_and_swap(self):
+        stale = Rental.objects.get(pk=self.rental.pk)
+        transition_rental(self.rental, 'Confirmed', user=self.owner)
+        with self.assertRaises(TransitionConflict):
+            transition_rental(stale, 'Canceled', user=self.renter)
+        self.assertEqual(Rental.objects.get(pk=self.rental.pk).status, 'Confirmed')
+        self.assertEqual(list(RentalLog.objects.values_list('event', 'performed_by_type')), [('Pending -> Confirmed', 'Owner')])
+
+    def test_transition_must_be_allowed_from_the_current_status(self):
+        with self.assertRaises(TransitionError):
+            transition_rental(self.rental, 'Finished', user=self.owner)
+        self.assertFalse(RentalLog.objects.exists())
+
+    def test_actor_rules(self):
+        with self.assertRaises(TransitionForbidden):
+            transition_rental(self.rental, 'Confirmed', user=self.renter)
+        with self.assertRaises(TransitionForbidden):
+            transition_rental(self.rental, 'Canceled', user=create_user())
+        transition_rental(self.rental, 'Confirmed', user=self.owner)
+        transition_rental(self.rental, 'Awaiting Deposit', user=self.owner)
+        # الدفع بيأكده النظام بس
+        with self.assertRaises(TransitionForbidden):
+            transition_rental(self.rental, 'Deposit Paid', user=self.owner)
+        transition_rental(self.rental, 'Deposit Paid')
+        self.assertEqual(Rental.objects.get(pk=self.rental.pk).status, 'Deposit Paid')
+        self.assertEqual(
+            list(RentalLog.objects.order_by('id').values_list('performed_by_type', flat=True)), ['Owner', 'Owner', 'System'],
+        )
+
+    def test_transition_endpoint_status_codes(self):
+        client = APIClient()
+        url = f'/api/rentals/{self.rental.pk}/'
+        client.force_authenticate(self.renter)
+        self.assertEqual(client.post(url + 'confirm_booking/', {}, format='json').status_code, 403)
+        client.force_authenticate(create_user())
+        self.assertEqual(client.post(url + 'transition/', {'status': 'Canceled'}, format='json').status_code, 403)
+        client.force_authenticate(self.owner)
+        self.assertEqual(client.post(url + 'confirm_booking/', {}, format='json').status_code, 200)
+        self.assertEqual(client.post(url + 'transition/', {'status': 'Finished'}, format='json').status_code, 400)
+        self.assertEqual(client.post(url + 'transition/', {'status': 'Awaiting Deposit'}, format='json').status_code, 200)
+        self.assertEqual(client.post(url + 'transition/', {'status': 'Deposit Paid'}, format='json').status_code, 403)
+
+
+@override_settings(TASKS_EAGER=False)
+class RentalCreateTests(TestCase):
+    def setUp(self):
+        self.car = create_car(create_user())
+        self.client = APIClient()
+        self.client.force_authenticate(create_user())
+
+    def _create(self, **extra):
+        start_date = date.today() + timedelta(days=7)
+        return self.client.post('/api/rentals/', {
+            'car': self.car.pk, 'rental_type': 'WithDriver', 'payment_method': 'cash',
+            'start_date': str(start_date), 'end_date': str(start_date + timedelta(days=1)),
+            'stops': [{'stop_order': 1, 'latitude': '30.046000', 'longitude': '31.237000', 'approx_waiting_time_minutes': 5}],
+            **extra,
+        }, format='json')
+
+    def test_breakdown_is_queued_with_validated_inputs(self):
+        response = self._create(planned_km='12.5', total_waiting_minutes='15')
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(response.data['breakdown_status'], 'pending')
+        queued = Task.objects.get(pk=response.data['breakdown_task'])
+        self.assertEqual(queued.kwargs, {'planned_km': 12.5, 'total_waiting_minutes': 15})
+
+    def test_invalid_cost_inputs_are_rejected_before_anything_is_saved(self):
+        for extra in ({'total_waiting_minutes': 'abc'}, {'total_waiting_minutes': -1}, {'planned_km': 'far'},
+                      {'planned_km': None}):
+            response = self._create(**extra)
+            self.assertEqual(response.status_code, 400, extra)
+        self.assertFalse(Rental.objects.exists())
+        self.assertFalse(Task.objects.exists())
+
+    def test_non_ascii_polyline(self):
+        self.assertEqual(self._create(route_polyline='مسار').status_code, 400)
+        self.assertFalse(Rental.objects.exists())
+        # polyline اتسجل من بره الـ API: المسافة بتتحسب من المحطات
+        rental = create_rental(create_user(), self.car)
+        PlannedTrip.objects.filter(rental=rental).update(route_polyline='_p~iF~ps|U_ulLnnqCمسار')
+        expected = derive_planned_km(Rental.objects.get(pk=rental.pk))
+        self.assertGreater(expected, 0)
+        PlannedTrip.objects.filter(rental=rental).update(route_polyline=None)
+        self.assertAlmostEqual(derive_planned_km(rental), expected)
+
+    def test_calculate_costs_validates_inputs(self):
+        rental = create_rental(create_user(), self.car)
+        url = f'/api/rentals/{rental.pk}/calculate_costs/'
+        self.assertEqual(self.client.post(url, {'total_waiting_minutes': 'x'}, format='json').status_code, 400)
+        response = self.client.post(url, {'total_waiting_minutes': 20}, format='json')
+        self.assertEqual(response.status_code, 200, response.data)
+
+
+class RentalEventTests(TestCase):
+    def setUp(self):
+        self.rental = create_rental(create_user(), create_car(create_user()))
+
+    def test_buffered_events_are_written_in_one_batch_at_the_end(self):
+        with transaction.atomic(), buffered_events():
+            for i in range(3):
+                record_event(self.rental.pk, f'event {i}')
+            self.assertFalse(RentalLog.objects.exists())
+        self.assertEqual(RentalLog.objects.count(), 3)
+
+    def test_events_roll_back_with_the_change(self):
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic(), buffered_events():
+                record_event(self.rental.pk, 'buffered')
+                raise RuntimeError
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                record_event(self.rental.pk, 'direct')
+                raise RuntimeError
+        self.assertFalse(RentalLog.objects.exists())
+
+
+class SettlementTests(TestCase):
+    def setUp(self):
+        self.owner = create_user()
+        self.car = create_car(self.owner)
+        self.rental = create_rental(create_user(), self.car, status='Ongoing')
+
+    def test_amounts_without_telemetry(self):
+        # من غير GPS الاستخدام هو الفترة من البداية للنهاية جوه ساعات اليوم (7 لـ 23)
+        RentalUsage.objects.create(
+            rental=self.rental, start_time=utc(2026, 1, 1, 6), end_time=utc(2026, 1, 2, 12), total_distance_used=450,
+        )
+        PlannedTripStop.objects.filter(planned_trip__rental=self.rental).update(actual_waiting_minutes=30)
+        usage = settle_rental(self.rental)
+
+        self.assertEqual(usage.total_waiting_minutes, 60)
+        self.assertEqual(usage.extra_waiting_minutes, 40)
+        # 3 أيام × 100 كم مسموح
+        self.assertEqual(usage.extra_km, Decimal('150.00'))
+        self.assertEqual(usage.extra_km_charges, Decimal('300.00'))
+        # اليوم الأول 16 ساعة - ساعة انتظار = 15 (7 زيادة)، التاني 5 ساعات
+        self.assertEqual(usage.extra_hours, Decimal('7.00'))
+        self.assertEqual(usage.extra_hour_charges, Decimal('420.00'))
+        breakdown = RentalBreakdown.objects.get(rental=self.rental)
+        self.assertAlmostEqual(breakdown.total_cost, 1500 + 300 + 60 + 420, delta=2)
+
+    def test_settlement_is_idempotent(self):
+        RentalUsage.objects.create(rental=self.rental, start_time=utc(2026, 1, 1, 8), end_time=utc(2026, 1, 1, 12))
+        first = settle_rental(self.rental)
+        second = settle_rental(self.rental)
+        self.assertEqual(second.settled_at, first.settled_at)
+        self.assertEqual(RentalLog.objects.filter(rental=self.rental, event='Trip settled').count(), 1)
+
+    def test_active_hours_from_telemetry_and_waiting_rate(self):
+        CarUsagePolicy.objects.filter(car=self.car).update(waiting_hour_cost=40)
+        first_day = int(utc(2026, 1, 1, 8).timestamp())
+        second_day = int(utc(2026, 1, 2, 9).timestamp())
+        points = [
+            RentalTelemetryPoint(rental=self.rental, recorded_at=first_day + i * 300, lat_e6=30000000, lng_e6=31000000)
+            for i in range(121)
+        ]
+        points += [
+            RentalTelemetryPoint(rental=self.rental, recorded_at=second_day + i * 300, lat_e6=30000000, lng_e6=31000000)
+            for i in range(37)
+        ]
+        RentalTelemetryPoint.objects.bulk_create(points)
+        RentalUsage.objects.create(rental=self.rental, start_time=utc(2026, 1, 1, 7), end_time=utc(2026, 1, 2, 13))
+        PlannedTripStop.objects.filter(planned_trip__rental=self.rental).update(
+            actual_waiting_minutes=30, waiting_started_at=utc(2026, 1, 1, 12),
+        )
+        usage = settle_rental(self.rental)
+
+        # اليوم الأول 10 ساعات حركة - ساعة انتظار = 9 (ساعة زيادة)، التاني 3 ساعات
+        self.assertEqual(usage.extra_hours, Decimal('1.00'))
+        self.assertEqual(usage.extra_hour_charges, Decimal('60.00'))
+        self.assertEqual(usage.waiting_time_cost, Decimal('40.00'))
+
+
+class TelemetryTests(TestCase):
+    def setUp(self):
+        self.owner = create_user()
+        self.renter = create_user()
+        self.rental = create_rental(self.renter, create_car(self.owner), status='Ongoing', start_date=date.today())
+        self.url = f'/api/rentals/{self.rental.pk}/telemetry/'
+        self.client = APIClient()
+        self.client.force_authenticate(self.renter)
+        self.now = int(time.time())
+
+    def _post(self, points, client=None):
+        return (client or self.client).post(self.url, {'points': points}, format='json')
+
+    def test_distance_is_accumulated_across_batches(self):
+        points = [[30.0 + i * 0.001, 31.0, self.now - 600 + i * 10] for i in range(20)]
+        response = self._post(points[:10])
+        self.assertEqual(response.status_code, 200, response.data)
+        # النقاط المكررة والأقدم من آخر نقطة بتتهمل
+        response = self._post(points[5:])
+        self.assertEqual((response.data['accepted'], response.data['ignored']), (10, 5))
+        self.assertAlmostEqual(response.data['total_distance_km'], 19 * 0.1112, places=1)
+        self.assertEqual(RentalTelemetryPoint.objects.filter(rental=self.rental).count(), 20)
+        self.assertEqual(RentalTrackState.objects.get(rental=self.rental).point_count, 20)
+        usage = RentalUsage.objects.get(rental=self.rental)
+        self.assertEqual(float(usage.total_distance_used), round(response.data['total_distance_km'], 2))
+
+    def test_points_outside_the_rental_window_are_ignored(self):
+        response = self._post([[30, 31, self.now + 86400], [30, 31, self.now - 86400 * 2]])
+        self.assertEqual((response.data['accepted'], response.data['ignored']), (0, 2))
+        # نقطة في المستقبل ماتقفلش الرحلة على النقاط الحقيقية
+        self.assertEqual(self._post([[30, 31, self.now]]).data['accepted'], 1)
+
+    def test_malformed_points_are_rejected(self):
+        for points in ([{'a': 1}], [[30, 31]], [[30, 31, 'x']], [[100, 31, self.now]], [], 'abc'):
+            response = self._post(points)
+            self.assertEqual(response.status_code, 400, points)
+        for points in ([[30, 31, self.now, 1]], [[30, 31, float('inf')]], [(30, float('nan'), self.now)]):
+            with self.assertRaises(TelemetryError):
+                parse_points(points)
+        self.assertFalse(RentalTelemetryPoint.objects.exists())
+
+    def test_only_rental_parties_can_send_points(self):
+        outsider = APIClient()
+        outsider.force_authenticate(create_user())
+        self.assertEqual(self._post([[30, 31, self.now]], client=outsider).status_code, 403)
+        self.assertIn(self._post([[30, 31, self.now]], client=APIClient()).status_code, (401, 403))
+        owner = APIClient()
+        owner.force_authenticate(self.owner)
+        self.assertEqual(self._post([[30, 31, self.now]], client=owner).status_code, 200)
+        self.assertEqual(RentalTelemetryPoint.objects.count(), 1)
+
+    def test_only_ongoing_trips_accept_points(self):
+        Rental.objects.filter(pk=self.rental.pk).update(status='Finished')
+        self.assertEqual(self._post([[30, 31, self.now]]).status_code, 400)
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        self.owner = create_user(is_staff=True)
+        self.car = create_car(self.owner)
+        self.rentals = [create_rental(create_user(), self.car) for _ in range(3)]
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=bearer(self.owner))
+
+    def test_list_not_modified_until_a_rental_changes(self):
+        etag = self.client.get('/api/rentals/')['ETag']
+        response = self.client.get('/api/rentals/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+        self.assertEqual(response.content, b'')
+        # نفس البيانات بـ fields مختلفة ليها ETag مختلف
+        self.assertEqual(self.client.get('/api/rentals/?fields=id', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+        time.sleep(0.01)
+        RentalUsage.objects.create(rental=self.rentals[0])
+        self.assertEqual(self.client.get('/api/rentals/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+        etag = self.client.get('/api/rentals/')['ETag']
+        Rental.objects.filter(pk=self.rentals[2].pk).delete()
+        self.assertEqual(self.client.get('/api/rentals/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_detail_follows_related_changes(self):
+        url = f'/api/rentals/{self.rentals[1].pk}/'
+        response = self.client.get(url)
+        etag = response['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']).status_code, 304)
+
+        time.sleep(0.01)
+        stop = PlannedTripStop.objects.filter(planned_trip__rental=self.rentals[1]).first()
+        stop.is_completed = True
+        stop.save()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+        etag = self.client.get(url)['ETag']
+        time.sleep(0.01)
+        options = self.car.rental_options
+        options.daily_rental_price = 400
+        options.save()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+class ZoneIndexTests(TestCase):
+    def _index(self, *polygons):
+        built = []
+        for i, polygon in enumerate(polygons):
+            zone = RentalZone(pk=i + 1, name=f'zone {i}', polygon=polygon, priority=i)
+            built.append(zones.Zone(zone))
+        return zones.ZoneIndex(built)
+
+    def test_locate_prefers_higher_priority(self):
+        index = self._index(CAIRO, DOWNTOWN)
+        self.assertEqual(index.locate(30.01, 31.21).name, 'zone 1')
+        self.assertEqual(index.locate(30.12, 31.35).name, 'zone 0')
+        self.assertIsNone(index.locate(30.2, 31.2))
+        # جوه الـ bounding box بتاع المثلث بس بره المثلث نفسه
+        self.assertEqual(index.locate(30.09, 31.29).name, 'zone 0')
+        self.assertIsNone(index.locate(30.12, 31.35, 'Unknown'))
+
+    def test_validate_polygon(self):
+        self.assertIsNone(zones.validate_polygon(CAIRO))
+        self.assertIsNotNone(zones.validate_polygon([[1, 2]]))
+        self.assertIsNotNone(zones.validate_polygon([[1, 2], [3, 4], [5]]))
+        self.assertIsNotNone(zones.validate_polygon([[1, 2], [3, 4], [True, 5]]))
+        self.assertIsNotNone(zones.validate_polygon([[1, 2], [3, 4], [91, 5]]))
+
+
+class ZoneValidationTests(TestCase):
+    def setUp(self):
+        zones.invalidate()
+        self.car = create_car(create_user())
+        self.renter = create_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.renter)
+        self.admin = APIClient()
+        self.admin.force_authenticate(create_user(is_staff=True))
+
+    def tearDown(self):
+        zones.invalidate()
+
+    def _book(self, rental_type, pickup=(30.0444, 31.2357), dropoff=(30.05, 31.24)):
+        start_date = date.today() + timedelta(days=14)
+        return self.client.post('/api/rentals/', {
+            'car': self.car.pk, 'rental_type': rental_type, 'payment_method': 'cash',
+            'start_date': str(start_date), 'end_date': str(start_date + timedelta(days=1)),
+            'pickup_lat': f'{pickup[0]:.6f}', 'pickup_lng': f'{pickup[1]:.6f}',
+            'dropoff_lat': f'{dropoff[0]:.6f}', 'dropoff_lng': f'{dropoff[1]:.6f}',
+            'stops': [{'stop_order': 1, 'latitude': '30.046000', 'longitude': '31.237000', 'approx_waiting_time_minutes': 5}],
+        }, format='json')
+
+    def test_zone_admin_validation(self):
+        self.assertEqual(self.client.post('/api/rental-zones/', {'name': 'Cairo', 'polygon': CAIRO}, format='json').status_code, 403)
+        self.assertEqual(self.admin.post('/api/rental-zones/', {'name': 'Cairo', 'polygon': [[1, 2]]}, format='json').status_code, 400)
+
+    def test_bookings_are_limited_to_zones_of_their_type(self):
+        response = self._book('WithoutDriver', pickup=(31.2, 29.9))
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertIsNone(Rental.objects.get(pk=response.data['id']).zone)
+
+        # الـ index بيتحدث بعد الـ commit
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.admin.post('/api/rental-zones/', {
+                'name': 'Cairo', 'polygon': CAIRO, 'allow_with_driver': False, 'price_multiplier': '1.5',
+            }, format='json')
+            self.admin.post('/api/rental-zones/', {
+                'name': 'Downtown', 'polygon': DOWNTOWN, 'priority': 5, 'allow_with_driver': False,
+            }, format='json')
+        self.assertEqual(response.status_code, 201, response.data)
+
+        self.assertEqual(self._book('WithoutDriver', pickup=(31.2, 29.9)).status_code, 400)
+        self.assertEqual(self._book('WithoutDriver', dropoff=(31.2, 29.9)).status_code, 400)
+        response = self._book('WithoutDriver', pickup=(30.12, 31.35))
+        self.assertEqual(response.status_code, 201, response.data)
+        rental = Rental.objects.get(pk=response.data['id'])
+        self.assertEqual((rental.zone.name, rental.rental_zone_WithoutDriver), ('Cairo', 'Cairo'))
+        response = self._book('WithoutDriver', pickup=(30.01, 31.21))
+        self.assertEqual(Rental.objects.get(pk=response.data['id']).zone.name, 'Downtown')
+        # مفيش زون بتسمح بالسواق، فالنوع ده مش متقيد
+        self.assertEqual(self._book('WithDriver', pickup=(31.2, 29.9)).status_code, 201)
+
+        response = self.client.get('/api/rental-zones/locate/', {'lat': 30.12, 'lng': 31.35, 'rental_type': 'WithoutDriver'})
+        self.assertEqual(response.status_code, 200)
+
+
+class PayoutTests(TestCase):
+    def setUp(self):
+        self.car = create_car(create_user())
+        self.rentals = [create_rental(create_user(), self.car, status='Finished', stops=0) for _ in range(5)]
+        for rental in self.rentals:
+            RentalUsage.objects.create(rental=rental, start_time=utc(2026, 1, 1, 8), end_time=utc(2026, 1, 1, 12))
+
+    def test_chunks_pay_each_rental_once(self):
+        chunks = []
+        result = run_payouts(chunk_size=2, on_chunk=lambda processed, elapsed: chunks.append(processed))
+        self.assertEqual(result['processed'], 5)
+        self.assertEqual(chunks, [2, 4, 5])
+        self.assertEqual(PayoutEntry.objects.filter(batch_id=result['batch_id']).count(), 5)
+        self.assertFalse(Rental.objects.filter(paid_out_at__isnull=True).exists())
+        stats = CarStats.objects.get(car=self.car)
+        self.assertEqual(stats.rental_history_count, 5)
+        self.assertEqual(
+            stats.total_earned, sum(PayoutEntry.objects.values_list('owner_earnings', flat=True)),
+        )
+        self.assertEqual(RentalLog.objects.filter(event='Payout processed').count(), 5)
+        self.assertEqual(run_payouts()['processed'], 0)
+
+    def test_rentals_taken_by_another_runner_are_skipped(self):
+        def other_runner(processed, elapsed):
+            # runner تاني صرف حجز من الدفعة الجاية قبل ما نوصله
+            if processed == 2:
+                Rental.objects.filter(pk=self.rentals[3].pk).update(paid_out_at=utc(2026, 1, 5))
+        result = run_payouts(chunk_size=2, on_chunk=other_runner)
+        self.assertEqual(result['processed'], 4)
+        self.assertFalse(PayoutEntry.objects.filter(rental=self.rentals[3]).exists())
+
+    def test_skip_locked_where_supported(self):
+        with mock.patch.object(connection.features, 'has_select_for_update_skip_locked', True), \
+                mock.patch.object(connection.features, 'has_select_for_update_of', True):
+            self.assertEqual(skip_locked_options(), {'skip_locked': True, 'of': ('self',)})
+        with mock.patch.object(connection.features, 'has_select_for_update_skip_locked', False), \
+                mock.patch.object(connection.features, 'has_select_for_update_of', False):
+            self.assertEqual(skip_locked_options(), {})
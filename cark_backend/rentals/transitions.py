@@ -0,0 +1,155 @@
+from django.db import transaction
+from django.utils import timezone
+
+from core.outbox import emit
+from .models import Rental
+from .events import record_event
+from .metrics import RENTAL_EVENTS
+from .stream import status_delta, publish_status_change
+
+# جدول الانتقالات المسموحة بين حالات الإيجار
+# المفتاح: الحالة الحالية
+# القيمة: الحالات التي يمكن الانتقال إليها
+RENTAL_TRANSITIONS = {
+    'Pending': ('Confirmed', 'Canceled'),
+    'Confirmed': ('Awaiting Deposit', 'contractSigned', 'Canceled'),
+    'Awaiting Deposit': ('Deposit Paid', 'Canceled'),
+    'Deposit Paid': ('Awaiting Contract', 'contractSigned'),
+    'Awaiting Contract': ('contractSigned', 'Canceled'),
+    'contractSigned': ('Awaiting Final Payment', 'Ongoing'),
+    'Awaiting Final Payment': ('Final Payment Paid',),
+    'Final Payment Paid': ('Ongoing',),
+    'Ongoing': ('Finished',),
+    'Finished': (),
+    'Canceled': (),
+}
+
+# مين يقدر ينقل الحجز لكل حالة (نفس قيم performed_by_type في RentalLog).
+# System يعني كود السيرفر (الدفع مثلاً) بينادي transition_rental من غير user، فحالات الدفع
+# ماينفعش توصلها من أي endpoint بمستخدم.
+OWNER = 'Owner'
+RENTER = 'Renter'
+SYSTEM = 'System'
+
+TRANSITION_ACTORS = {
+    'Confirmed': (OWNER,),
+    'Canceled': (OWNER, RENTER, SYSTEM),
+    'Awaiting Deposit': (OWNER, SYSTEM),
+    'Deposit Paid': (SYSTEM,),
+    'Awaiting Contract': (OWNER, SYSTEM),
+    'contractSigned': (OWNER, RENTER),
+    'Awaiting Final Payment': (OWNER, SYSTEM),
+    'Final Payment Paid': (SYSTEM,),
+    'Ongoing': (OWNER, RENTER),
+    'Finished': (OWNER, RENTER),
+}
+
+# الحالات اللي ينفع يتدفع فيها الحجز: بعد موافقة المالك وقبل بداية الرحلة
+PAYABLE_STATUSES = (
+    'Confirmed', 'Awaiting Deposit', 'Deposit Paid', 'Awaiting Contract', 'contractSigned', 'Awaiting Final Payment',
+)
+# الحالات اللي مستنية الدفع، والانتقال (System) اللي بيحصل أول ما الدفع يتم
+PAYMENT_TRANSITIONS = {
+    'Awaiting Deposit': 'Deposit Paid',
+    'Awaiting Final Payment': 'Final Payment Paid',
+}
+
+# حقول إضافية يتم تحديثها تلقائياً مع الانتقال لحالة معينة
+TRANSITION_FIELDS = {
+    'contractSigned': {'contract_signed': True},
+}
+
+
+class TransitionError(Exception):
+    """
+    الانتقال غير مسموح من الحالة الحالية.
+    """
+
+
+class TransitionConflict(TransitionError):
+    """
+    حالة الإيجار اتغيرت من طلب تاني قبل تنفيذ الانتقال.
+    """
+
+
+class TransitionForbidden(TransitionError):
+    """
+    المنفذ مش من الأدوار المسموح لها بالانتقال ده (TRANSITION_ACTORS).
+    """
+
+
+def can_transition(from_status, to_status):
+    return to_status in RENTAL_TRANSITIONS.get(from_status, ())
+
+
+def actor_role(rental, user):
+    """
+    دور المنفذ في الحجز: System لو مفيش user (كود السيرفر)، Renter أو Owner،
+    أو None لأي مستخدم تاني (مش مسموح له بأي انتقال).
+    """
+    if user is None:
+        return SYSTEM
+    if not getattr(user, 'is_authenticated', False):
+        return None
+    if user.id == rental.renter_id:
+        return RENTER
+    if user.id == rental.car.owner_id:
+        return OWNER
+    return None
+
+
+def can_perform(rental, to_status, user):
+    return actor_role(rental, user) in TRANSITION_ACTORS.get(to_status, ())
+
+
+def performed_by_type_for(rental, user):
+    # تحديد نوع المنفذ (مالك / مستأجر / النظام) لتسجيله في RentalLog؛ أي حد مش طرف في الحجز بيتسجل System
+    return actor_role(rental, user) or SYSTEM
+
+
+def transition_rental(rental, to_status, user=None, details=None, **fields):
+    """
+    تنفيذ انتقال الحالة كـ UPDATE ... WHERE id=? AND status=? واحد.
+    لو طلبين حاولوا نفس الانتقال في نفس الوقت، واحد بس هينجح والتاني ياخد TransitionConflict.
+    user=None معناها النظام (مثلاً كود الدفع)، وغير كده لازم user يبقى من أدوار TRANSITION_ACTORS.
+    """
+    from_status = rental.status
+    if not can_transition(from_status, to_status):
+        raise TransitionError(f'Cannot move rental from {from_status} to {to_status}.')
+    if not can_perform(rental, to_status, user):
+        raise TransitionForbidden(f'You are not allowed to move this rental to {to_status}.')
+
+    values = dict(TRANSITION_FIELDS.get(to_status, {}))
+    values.update(fields)
+    performed_by_type = performed_by_type_for(rental, user)
+    now = timezone.now()
+
+    with transaction.atomic():
+        updated = Rental.objects.filter(pk=rental.pk, status=from_status).update(
+            status=to_status, updated_at=now, **values
+        )
+        if not updated:
+            raise TransitionConflict('Rental status was changed by another request.')
+        record_event(
+            rental.pk,
+            f'{from_status} -> {to_status}',
+            details=details,
+            performed_by_type=performed_by_type,
+            performed_by_id=user.id if performed_by_type != 'System' else None,
+        )
+        delta = status_delta(rental, from_status, to_status, now)
+        transaction.on_commit(lambda: publish_status_change(rental, delta))
+        RENTAL_EVENTS.inc_on_commit(event=to_status.lower())
+        emit('rental', rental.pk, 'rental.status_changed', {
+            'from': from_status,
+            'to': to_status,
+            'performed_by_type': performed_by_type,
+            'performed_by_id': user.id if performed_by_type != 'System' else None,
+        })
+
+    # تحديث النسخة الموجودة في الذاكرة بنفس القيم اللي اتحفظت
+    rental.status = to_status
+    rental.updated_at = now
+    for attr, value in values.items():
+        setattr(rental, attr, value)
+    return rental
@@ -1,12 +1,16 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from . import views
+from . import views, stream, async_views
 
 router = DefaultRouter()
 router.register(r'rentals', views.RentalViewSet, basename='rental')
+router.register(r'rental-zones', views.RentalZoneViewSet, basename='rental-zone')
 
 urlpatterns = [
     path('', views.home, name='home'),  # مثال على رابط
+    # لازم قبل الـ router عشان "stream" مايتقريش كـ id حجز
+    path('rentals/stream/', stream.rental_status_stream, name='rental-status-stream'),
     path('', include(router.urls)),
+    path('async/rentals/<int:pk>/', async_views.rental_detail, name='rental-detail-async'),
     # أضف روابط أخرى هنا حسب الحاجة
 ]
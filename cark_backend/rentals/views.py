@@ -2,17 +2,41 @@ from django.http import HttpResponse
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from .models import Rental, PlannedTrip, PlannedTripStop, RentalUsage, RentalPayment, RentalBreakdown
-from .serializers import RentalSerializer, RentalCreateUpdateSerializer, PlannedTripStopSerializer, RentalBreakdownSerializer
-from .services import calculate_rental_financials
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
+from .models import Rental, PlannedTrip, PlannedTripStop, RentalUsage, RentalPayment, RentalBreakdown, RentalLog, RentalLogArchive, PayoutEntry, RentalZone
+from .serializers import RentalSerializer, RentalListSerializer, RentalCreateUpdateSerializer, PlannedTripStopSerializer, RentalBreakdownSerializer, RentalLogSerializer, RentalZoneSerializer, RentalCostInputSerializer
+from .billing import create_rental_breakdown, resolve_planned_km, settle_rental
+from .payouts import run_payouts, DEFAULT_CHUNK_SIZE
+from .transitions import (
+    transition_rental, TransitionError, TransitionConflict, TransitionForbidden, RENTAL_TRANSITIONS, performed_by_type_for,
+    actor_role, OWNER, RENTER,
+)
+from .events import buffered_events, record_event, encode_cursor, decode_cursor
+from .telemetry import ingest_points, TelemetryError
+from .tasks import compute_rental_breakdown
+from .geofence import get_geofences, build_geofences, invalidate_geofences, is_inside
+from .metrics import RENTAL_EVENTS
+from . import zones
 from cars.models import Car
+from core.outbox import emit
+from core.conditional import ConditionalGetMixin
+from core.instrumentation import SerializerTimingMixin
+from core.fieldsets import SparseFieldsetMixin
 from django.shortcuts import get_object_or_404
 from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+# الانتقالات اللي محتاجة تحقق من الموقع: (اسم الـ geofence، رسالة الخطأ)
+TRANSITION_LOCATION_CHECKS = {
+    'Ongoing': ('pickup', 'Current location is not at the pickup point.'),
+    'Finished': ('dropoff', 'Current location is not at the drop-off point.'),
+}
 
 def home(request):
     return HttpResponse("Welcome to Rentals Home!")
 
-class RentalViewSet(viewsets.ModelViewSet):
+class RentalViewSet(SerializerTimingMixin, ConditionalGetMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     """
     ViewSet رئيسي لإدارة جميع خطوات فلو الإيجار مع السائق:
     - إنشاء الحجز
@@ -22,29 +46,52 @@ class RentalViewSet(viewsets.ModelViewSet):
     - بدء الرحلة
     - تأكيد الوصول للمحطات
     - إنهاء الانتظار
+    - استقبال نقاط GPS أثناء الرحلة (telemetry)
     - إنهاء الرحلة
     - توزيع الأرباح
+    - نقل الحالة حسب جدول الانتقالات (transition)
+    - سجل أحداث الحجز (timeline)
+
+    الـ list بترجع RentalListSerializer المختصر، و ?fields=id,status,car.brand
+    بيختار حقول من الـ RentalSerializer الكامل في list و retrieve.
     """
     queryset = Rental.objects.all()
     serializer_class = RentalSerializer
+    # العربية والـ breakdown ليهم updated_at، وباقي الـ nested بيعمل touch للحجز (rentals.signals)
+    last_modified_fields = ('updated_at', 'car__updated_at', 'breakdown__updated_at')
 
     def get_serializer_class(self):
         if self.action in ['create', 'update', 'partial_update']:
             return RentalCreateUpdateSerializer
+        if self.action == 'list' and self.requested_fields() is None:
+            return RentalListSerializer
         return RentalSerializer
 
     def create(self, request, *args, **kwargs):
         """
         إنشاء حجز جديد مع محطات الرحلة.
+        الـ breakdown بيتحسب في background task، فالـ response فيه breakdown_status
+        ('pending' أو 'ready') و breakdown_task (رقم الشغلانة)، والـ breakdown بيظهر
+        في GET /api/rentals/<id>/ أول ما الشغلانة تخلص.
         """
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
+        costs = RentalCostInputSerializer(data=request.data)
+        costs.is_valid(raise_exception=True)
         with transaction.atomic():
             rental = serializer.save(renter=request.user)
-            planned_km = float(request.data.get('planned_km', 0))
-            total_waiting_minutes = int(request.data.get('total_waiting_minutes', 0))
-            create_rental_breakdown(rental, planned_km, total_waiting_minutes)
-        return Response(RentalSerializer(rental).data, status=status.HTTP_201_CREATED)
+            RENTAL_EVENTS.inc_on_commit(event='created')
+            emit('rental', rental.pk, 'rental.created', {
+                'renter_id': rental.renter_id, 'car_id': rental.car_id, 'status': rental.status,
+                'start_date': rental.start_date, 'end_date': rental.end_date,
+            })
+            # الـ breakdown بيتحسب في background task بعد الـ commit
+            breakdown_task = compute_rental_breakdown.delay(rental.pk, **costs.validated_data)
+        data = RentalSerializer(rental).data
+        # مع TASKS_EAGER الشغلانة بتخلص مع الـ commit فالـ breakdown بيبقى جاهز هنا
+        data['breakdown_status'] = 'ready' if data['breakdown'] else 'pending'
+        data['breakdown_task'] = breakdown_task.pk if breakdown_task is not None else None
+        return Response(data, status=status.HTTP_201_CREATED)
 
     @action(detail=True, methods=['post'])
     def calculate_costs(self, request, pk=None):
@@ -52,25 +99,113 @@ class RentalViewSet(viewsets.ModelViewSet):
         حساب التكاليف التفصيلية للرحلة (أجرة، كيلومترات إضافية، انتظار، بوفر، عربون...)
         """
         rental = self.get_object()
-        planned_km = float(request.data.get('planned_km', 0))
-        total_waiting_minutes = int(request.data.get('total_waiting_minutes', 0))
-        create_rental_breakdown(rental, planned_km, total_waiting_minutes)
+        if rental.status == 'Finished':
+            # بعد نهاية الرحلة الـ breakdown النهائي اتحسب في التسوية ومش بيتغير
+            return Response(RentalBreakdownSerializer(rental.breakdown).data)
+        costs = RentalCostInputSerializer(data=request.data)
+        costs.is_valid(raise_exception=True)
+        planned_km = resolve_planned_km(rental, costs.validated_data)
+        total_waiting_minutes = costs.validated_data['total_waiting_minutes']
+        with transaction.atomic():
+            create_rental_breakdown(rental, planned_km, total_waiting_minutes)
+            self._record(rental, 'Costs calculated', f'planned_km={planned_km}, total_waiting_minutes={total_waiting_minutes}')
         breakdown = rental.breakdown
         return Response(RentalBreakdownSerializer(breakdown).data)
 
+    def _record(self, rental, event, details=None):
+        performed_by_type = performed_by_type_for(rental, self.request.user)
+        record_event(
+            rental.pk, event, details=details,
+            performed_by_type=performed_by_type,
+            performed_by_id=self.request.user.id if performed_by_type != 'System' else None,
+        )
+
+    def _verify_location(self, rental, fence_name, error_message):
+        """
+        التحقق من latitude/longitude المرسلة مقابل الـ geofence المتخزن في الكاش للرحلة.
+        لو النقطة مش في الكاش بنبنيه تاني من القاعدة، ولو لسه مش موجودة (مفيش إحداثيات
+        متسجلة للنقطة دي) الطلب بيترفض.
+        """
+        fences = get_geofences(rental)
+        if fence_name not in fences:
+            fences = build_geofences(rental)
+        if fence_name not in fences:
+            return Response({'error': 'No location is recorded for this rental to verify against.'}, status=400)
+        try:
+            lat = float(self.request.data.get('latitude'))
+            lng = float(self.request.data.get('longitude'))
+        except (TypeError, ValueError):
+            return Response({'error': 'latitude and longitude are required.'}, status=400)
+        if not is_inside(fences, fence_name, lat, lng):
+            return Response({'error': error_message}, status=400)
+        return None
+
+    def _on_transition(self, rental, to_status):
+        """
+        الخطوات المرتبطة بالانتقال لحالات معينة، بتتنفذ في نفس الـ transaction بتاعة الانتقال.
+        """
+        if to_status == 'Ongoing':
+            RentalUsage.objects.update_or_create(rental=rental, defaults={'start_time': timezone.now()})
+            # تجهيز الـ geofences للرحلة كلها مرة واحدة
+            transaction.on_commit(lambda: build_geofences(rental))
+        elif to_status == 'Finished':
+            # حساب الفاتورة النهائية (الاستخدام، الدفع، والـ breakdown النهائي)
+            settle_rental(rental)
+            transaction.on_commit(lambda: invalidate_geofences(rental))
+
+    def _apply_transition(self, rental, to_status, error_message, **fields):
+        """
+        تنفيذ انتقال الحالة ورجوع Response بالخطأ لو الانتقال مرفوض.
+        """
+        try:
+            # حدث الانتقال وحدث التسوية بيتكتبوا بـ INSERT واحد في نفس الـ transaction
+            with transaction.atomic(), buffered_events():
+                transition_rental(rental, to_status, user=self.request.user, **fields)
+                self._on_transition(rental, to_status)
+        except TransitionConflict as e:
+            return Response({'error': str(e)}, status=status.HTTP_409_CONFLICT)
+        except TransitionForbidden as e:
+            return Response({'error': str(e)}, status=status.HTTP_403_FORBIDDEN)
+        except TransitionError:
+            return Response({'error': error_message}, status=400)
+        return None
+
+    @action(detail=True, methods=['post'])
+    def transition(self, request, pk=None):
+        """
+        نقل الحجز لأي حالة مسموحة حسب جدول الانتقالات (RENTAL_TRANSITIONS)
+        """
+        rental = self.get_object()
+        to_status = request.data.get('status')
+        if not to_status:
+            return Response({'error': 'status is required.'}, status=400)
+        previous_status = rental.status
+        if to_status in TRANSITION_LOCATION_CHECKS:
+            error = self._verify_location(rental, *TRANSITION_LOCATION_CHECKS[to_status])
+            if error:
+                return error
+        error = self._apply_transition(
+            rental, to_status,
+            f'Cannot move rental from {previous_status} to {to_status}. '
+            f'Allowed: {list(RENTAL_TRANSITIONS.get(previous_status, ()))}'
+        )
+        if error:
+            return error
+        return Response({'status': rental.status, 'previous_status': previous_status})
+
     @action(detail=True, methods=['post'])
     def confirm_booking(self, request, pk=None):
         """
         تأكيد الحجز من قبل المالك (مع تحديد نوع العقد)
         """
         rental = self.get_object()
-        if rental.status != 'Pending':
-            return Response({'error': 'Cannot confirm booking unless status is Pending.'}, status=400)
+        fields = {}
         contract_type = request.data.get('contract_type')
         if contract_type:
-            rental.contract_type = contract_type  # owner يحدد نوع العقد هنا
-        rental.status = 'Confirmed'
-        rental.save()
+            fields['contract_type'] = contract_type  # owner يحدد نوع العقد هنا
+        error = self._apply_transition(rental, 'Confirmed', 'Cannot confirm booking unless status is Pending.', **fields)
+        if error:
+            return error
         return Response({'status': 'Booking confirmed.', 'contract_type': rental.contract_type})
 
     @action(detail=True, methods=['post'])
@@ -79,23 +214,23 @@ class RentalViewSet(viewsets.ModelViewSet):
         توقيع العقد (ورقي أو إلكتروني)
         """
         rental = self.get_object()
-        if rental.status != 'Confirmed':
-            return Response({'error': 'Contract can only be signed after confirmation.'}, status=400)
-        rental.contract_signed = True
-        rental.status = 'contractSigned'
-        rental.save()
+        error = self._apply_transition(rental, 'contractSigned', 'Contract can only be signed after confirmation.')
+        if error:
+            return error
         return Response({'status': 'Contract signed.'})
 
     @action(detail=True, methods=['post'])
     def start_trip(self, request, pk=None):
         """
-        بدء الرحلة (يتطلب تحقق من الموقع في التطبيق الفعلي)
+        بدء الرحلة (مع تحقق إن الموقع عند نقطة الاستلام)
         """
         rental = self.get_object()
-        if rental.status != 'contractSigned':
-            return Response({'error': 'Trip can only be started after contract is signed.'}, status=400)
-        rental.status = 'Ongoing'
-        rental.save()
+        error = self._verify_location(rental, *TRANSITION_LOCATION_CHECKS['Ongoing'])
+        if error:
+            return error
+        error = self._apply_transition(rental, 'Ongoing', 'Trip can only be started after contract is signed.')
+        if error:
+            return error
         return Response({'status': 'Trip started.'})
 
     @action(detail=True, methods=['post'])
@@ -106,11 +241,16 @@ class RentalViewSet(viewsets.ModelViewSet):
         stop_id = request.data.get('stop_id')
         if not stop_id:
             return Response({'error': 'stop_id is required.'}, status=400)
-        stop = get_object_or_404(PlannedTripStop, id=stop_id, planned_trip__rental_id=pk)
+        stop = get_object_or_404(PlannedTripStop.objects.select_related('planned_trip__rental__car'), id=stop_id, planned_trip__rental_id=pk)
         # تحقق من الموقع (GPS)
+        error = self._verify_location(stop.planned_trip.rental, f'stop:{stop.id}', 'Current location does not match the stop location.')
+        if error:
+            return error
         stop.location_verified = True
         stop.waiting_started_at = request.data.get('waiting_started_at')
-        stop.save()
+        with transaction.atomic():
+            stop.save()
+            self._record(stop.planned_trip.rental, 'Stop arrival', f'stop_id={stop.id}, stop_order={stop.stop_order}')
         return Response({'status': 'Stop arrival confirmed.'})
 
     @action(detail=True, methods=['post'])
@@ -122,76 +262,144 @@ class RentalViewSet(viewsets.ModelViewSet):
         if not stop_id:
             return Response({'error': 'stop_id is required.'}, status=400)
         actual_waiting_minutes = int(request.data.get('actual_waiting_minutes', 0))
-        stop = get_object_or_404(PlannedTripStop, id=stop_id, planned_trip__rental_id=pk)
+        stop = get_object_or_404(PlannedTripStop.objects.select_related('planned_trip__rental__car'), id=stop_id, planned_trip__rental_id=pk)
         stop.waiting_ended_at = request.data.get('waiting_ended_at')
         stop.actual_waiting_minutes = actual_waiting_minutes
-        stop.save()
+        with transaction.atomic():
+            stop.save()
+            self._record(stop.planned_trip.rental, 'Waiting ended', f'stop_id={stop.id}, actual_waiting_minutes={actual_waiting_minutes}')
         return Response({'status': 'Waiting ended.'})
 
-    @action(detail=True, methods=['post'])
-    def end_trip(self, request, pk=None):
+    @action(detail=True, methods=['post'], permission_classes=[IsAuthenticated])
+    def telemetry(self, request, pk=None):
         """
-        إنهاء الرحلة (يتطلب تحقق من الموقع في التطبيق الفعلي)
+        استقبال دفعة نقاط GPS للرحلة الجارية: {"points": [[lat, lng, epoch_seconds], ...]}
+        وتحديث المسافة المقطوعة في RentalUsage.total_distance_used.
+        النقاط بتدخل في حساب المسافة والفاتورة، فمسموح بيها للمستأجر والمالك (السواق) بس.
         """
         rental = self.get_object()
+        if actor_role(rental, request.user) not in (RENTER, OWNER):
+            return Response({'error': 'Only the renter or the owner can send telemetry for this rental.'}, status=status.HTTP_403_FORBIDDEN)
         if rental.status != 'Ongoing':
-            return Response({'error': 'Trip can only be ended if it is ongoing.'}, status=400)
-        rental.status = 'Finished'
-        rental.save()
-        # حساب الفاتورة النهائية (يمكنك استدعاء دوال الحسابات هنا)
-        return Response({'status': 'Trip ended. Final billing will be processed.'})
+            return Response({'error': 'Telemetry is only accepted while the trip is ongoing.'}, status=400)
+        try:
+            result = ingest_points(rental, request.data.get('points'))
+        except TelemetryError as e:
+            return Response({'error': str(e)}, status=400)
+        return Response(result)
 
     @action(detail=True, methods=['post'])
+    def end_trip(self, request, pk=None):
+        """
+        إنهاء الرحلة (مع تحقق إن الموقع عند نقطة التسليم) وعمل التسوية النهائية
+        """
+        rental = self.get_object()
+        error = self._verify_location(rental, *TRANSITION_LOCATION_CHECKS['Finished'])
+        if error:
+            return error
+        error = self._apply_transition(rental, 'Finished', 'Trip can only be ended if it is ongoing.')
+        if error:
+            return error
+        return Response({
+            'status': 'Trip ended. Final billing processed.',
+            'breakdown': RentalBreakdownSerializer(rental.breakdown).data,
+        })
+
+    @action(detail=True, methods=['get'])
+    def timeline(self, request, pk=None):
+        """
+        سجل أحداث الحجز (الأحدث أولاً) مع keyset pagination:
+        ?limit=50&cursor=<next_cursor من الصفحة اللي قبلها>
+        الأحداث القديمة بتتقري من الأرشيف بعد ما الجدول الأساسي يخلص.
+        """
+        rental = self.get_object()
+        try:
+            limit = max(1, min(int(request.query_params.get('limit', 50)), 200))
+            cursor = request.query_params.get('cursor')
+            before = decode_cursor(cursor) if cursor else None
+        except ValueError:
+            return Response({'error': 'Invalid limit or cursor.'}, status=400)
+
+        events = []
+        for model in (RentalLog, RentalLogArchive):
+            queryset = model.objects.filter(rental_id=rental.pk)
+            if before:
+                timestamp, last_id = before
+                queryset = queryset.filter(Q(timestamp__lt=timestamp) | Q(timestamp=timestamp, id__lt=last_id))
+            events += list(queryset.order_by('-timestamp', '-id')[:limit - len(events)])
+            if len(events) >= limit:
+                break
+
+        return Response({
+            'results': RentalLogSerializer(events, many=True).data,
+            'next_cursor': encode_cursor(events[-1]) if len(events) == limit else None,
+        })
+
+    @action(detail=True, methods=['post'], permission_classes=[IsAdminUser])
     def payout(self, request, pk=None):
         """
-        توزيع الأرباح وخصم عمولة المنصة بعد نهاية الرحلة
+        توزيع الأرباح وخصم عمولة المنصة بعد نهاية الرحلة (للأدمن فقط)
         """
         rental = self.get_object()
         if rental.status != 'Finished':
             return Response({'error': 'Payout can only be processed after trip is finished.'}, status=400)
-        # منطق توزيع الأرباح والعمولة (يمكنك التوسع فيه لاحقاً)
-        return Response({'status': 'Payout processed.'})
-
-# دالة مساعدة لإنشاء breakdown
-def create_rental_breakdown(rental, planned_km, total_waiting_minutes):
-    car = rental.car
-    options = car.rental_options
-    policy = car.usage_policy
-    rental_days = (rental.end_date - rental.start_date).days + 1
-    payment_method = rental.payment_method
-    daily_price = options.daily_rental_price_with_driver or 0
-    extra_km_rate = policy.extra_km_cost or 0
-    waiting_hour_rate = policy.extra_hour_cost or 0
-    commission_rate = 0.2
-    breakdown_data = calculate_rental_financials(
-        rental_days,
-        planned_km,
-        float(policy.daily_km_limit),
-        float(extra_km_rate),
-        total_waiting_minutes,
-        float(waiting_hour_rate),
-        float(daily_price),
-        payment_method,
-        commission_rate
-    )
-    # حفظ breakdown
-    RentalBreakdown.objects.update_or_create(
-        rental=rental,
-        defaults={
-            'planned_km': planned_km,
-            'total_waiting_minutes': total_waiting_minutes,
-            'daily_price': daily_price,
-            'extra_km_cost': breakdown_data['extra_km_cost'],
-            'waiting_cost': breakdown_data['waiting_time_cost'],
-            'total_cost': breakdown_data['total_costs'],
-            'buffer_amount': breakdown_data['insurance_buffer'],
-            'deposit': breakdown_data['deposit'],
-            'platform_fee': breakdown_data['platform_commission'],
-            'driver_earnings': breakdown_data['driver_earnings'],
-            'allowed_km': breakdown_data['allowed_km'],
-            'extra_km': breakdown_data['extra_km'],
-            'base_cost': breakdown_data['base_cost'],
-            'final_cost': breakdown_data['final_cost'],
-            'commission_rate': commission_rate,
-        }
-    )
\ No newline at end of file
+        if rental.paid_out_at is not None:
+            return Response({'error': 'Payout was already processed for this rental.'}, status=400)
+        result = run_payouts(rental_ids=[rental.pk])
+        if not result['processed']:
+            return Response({'error': 'Payout is being processed by another request.'}, status=status.HTTP_409_CONFLICT)
+        entry = PayoutEntry.objects.get(rental=rental)
+        return Response({
+            'status': 'Payout processed.',
+            'platform_commission': entry.platform_commission,
+            'owner_earnings': entry.owner_earnings,
+        })
+
+    @action(detail=False, methods=['post'], url_path='payouts/run', permission_classes=[IsAdminUser])
+    def run_payout_batch(self, request):
+        """
+        صرف أرباح كل الحجوزات المنتهية اللي لسه ماتصرفتش (للأدمن فقط)
+        """
+        try:
+            chunk_size = int(request.data.get('chunk_size', DEFAULT_CHUNK_SIZE))
+            limit = request.data.get('limit')
+            limit = int(limit) if limit is not None else None
+        except (TypeError, ValueError):
+            return Response({'error': 'chunk_size and limit must be integers.'}, status=400)
+        return Response(run_payouts(chunk_size=chunk_size, limit=limit))
+
+
+class RentalZoneViewSet(viewsets.ModelViewSet):
+    """
+    زونات التشغيل: القراءة لأي مستخدم مسجل (عشان الخريطة في التطبيق) والتعديل للأدمن بس.
+    """
+    queryset = RentalZone.objects.all()
+    serializer_class = RentalZoneSerializer
+
+    def get_permissions(self):
+        if self.action in ('list', 'retrieve', 'locate'):
+            return [IsAuthenticated()]
+        return [IsAdminUser()]
+
+    def get_queryset(self):
+        if self.action == 'list' and not self.request.user.is_staff:
+            return RentalZone.objects.filter(is_active=True)
+        return RentalZone.objects.all()
+
+    # GET /api/rental-zones/locate/?lat=30.04&lng=31.23&rental_type=WithoutDriver
+    @action(detail=False, methods=['get'])
+    def locate(self, request):
+        try:
+            lat = float(request.query_params['lat'])
+            lng = float(request.query_params['lng'])
+        except (KeyError, ValueError):
+            return Response({'error': 'lat and lng are required numbers.'}, status=status.HTTP_400_BAD_REQUEST)
+        rental_type = request.query_params.get('rental_type')
+        if rental_type is not None and rental_type not in zones.ZONE_TYPE_FIELDS:
+            return Response({'error': 'rental_type must be WithDriver or WithoutDriver.'}, status=status.HTTP_400_BAD_REQUEST)
+        index = zones.get_index()
+        zone = index.locate(lat, lng, rental_type)
+        return Response({
+            'zone': {'id': zone.id, 'name': zone.name, 'price_multiplier': zone.multiplier} if zone else None,
+            'allowed': zone is not None or (rental_type is not None and not index.restricts(rental_type)),
+        })
@@ -0,0 +1,150 @@
+"""
+Index للزونات (RentalZone) في ذاكرة الـ process عشان التحقق من الـ pickup/dropoff مايعملش query:
+- كل زون بتتسجل في خلايا grid (ZONE_GRID_DEGREES) اللي الـ bounding box بتاعها بيغطيها
+- البحث عن نقطة: الخلية بتاعتها -> الزونات المرشحة -> bounding box -> point in polygon
+
+الـ index بيتبني أول ما يتطلب وبيفضل لحد ما الزونات تتغير. كل ZONE_REFRESH_SECONDS
+بنقارن (MAX(updated_at), COUNT) من القاعدة بالنسخة المتخزنة فالتعديل بيوصل لكل الـ workers،
+وفي نفس الـ process الـ signals بتخلي التحقق يحصل في الطلب اللي بعده على طول.
+"""
+import math
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.db.models import Count, Max
+
+from .models import RentalZone
+
+GRID_DEGREES = getattr(settings, 'ZONE_GRID_DEGREES', 0.05)
+REFRESH_SECONDS = getattr(settings, 'ZONE_REFRESH_SECONDS', 30)
+
+ZONE_TYPE_FIELDS = {
+    'WithDriver': 'allow_with_driver',
+    'WithoutDriver': 'allow_without_driver',
+}
+
+
+class Zone:
+    __slots__ = ('id', 'name', 'rental_types', 'multiplier', 'priority', 'bbox', 'ring')
+
+    def __init__(self, zone):
+        self.id = zone.pk
+        self.name = zone.name
+        self.rental_types = frozenset(t for t, field in ZONE_TYPE_FIELDS.items() if getattr(zone, field))
+        self.multiplier = float(zone.price_multiplier)
+        self.priority = zone.priority
+        self.ring = [(float(lat), float(lng)) for lat, lng in zone.polygon]
+        lats = [lat for lat, _ in self.ring]
+        lngs = [lng for _, lng in self.ring]
+        self.bbox = (min(lats), min(lngs), max(lats), max(lngs))
+
+    def contains(self, lat, lng):
+        min_lat, min_lng, max_lat, max_lng = self.bbox
+        if not (min_lat <= lat <= max_lat and min_lng <= lng <= max_lng):
+            return False
+        # ray casting: عدد مرات قطع الخط الأفقي من النقطة لأضلاع الـ polygon
+        inside = False
+        ring = self.ring
+        j = len(ring) - 1
+        for i in range(len(ring)):
+            lat_i, lng_i = ring[i]
+            lat_j, lng_j = ring[j]
+            if (lat_i > lat) != (lat_j > lat) and lng < (lng_j - lng_i) * (lat - lat_i) / (lat_j - lat_i) + lng_i:
+                inside = not inside
+            j = i
+        return inside
+
+
+def _cell(lat, lng):
+    return math.floor(lat / GRID_DEGREES), math.floor(lng / GRID_DEGREES)
+
+
+class ZoneIndex:
+    def __init__(self, zones):
+        # الأعلى priority الأول عشان أول زون مطابقة تبقى هي المختارة
+        self.zones = sorted(zones, key=lambda zone: (-zone.priority, zone.id))
+        self.by_id = {zone.id: zone for zone in self.zones}
+        self.rental_types = frozenset(t for zone in self.zones for t in zone.rental_types)
+        self.cells = defaultdict(list)
+        for zone in self.zones:
+            min_lat, min_lng, max_lat, max_lng = zone.bbox
+            (lat_lo, lng_lo), (lat_hi, lng_hi) = _cell(min_lat, min_lng), _cell(max_lat, max_lng)
+            for x in range(lat_lo, lat_hi + 1):
+                for y in range(lng_lo, lng_hi + 1):
+                    self.cells[(x, y)].append(zone)
+
+    def locate(self, lat, lng, rental_type=None):
+        """
+        return: أول زون (بالـ priority) فيها النقطة وبتسمح بنوع الإيجار ده، أو None
+        """
+        lat, lng = float(lat), float(lng)
+        for zone in self.cells.get(_cell(lat, lng), ()):
+            if (rental_type is None or rental_type in zone.rental_types) and zone.contains(lat, lng):
+                return zone
+        return None
+
+    def restricts(self, rental_type):
+        # لو مفيش ولا زون للنوع ده، الحجز مسموح في أي مكان
+        return rental_type in self.rental_types
+
+
+_state = {'index': None, 'version': None, 'checked_at': 0.0}
+_lock = threading.Lock()
+
+
+def _current_version():
+    result = RentalZone.objects.aggregate(updated=Max('updated_at'), count=Count('id'))
+    return result['updated'], result['count']
+
+
+def build_index():
+    return ZoneIndex([Zone(zone) for zone in RentalZone.objects.filter(is_active=True)])
+
+
+def get_index():
+    now = time.monotonic()
+    if _state['index'] is not None and now - _state['checked_at'] < REFRESH_SECONDS:
+        return _state['index']
+    with _lock:
+        if _state['index'] is not None and now - _state['checked_at'] < REFRESH_SECONDS:
+            return _state['index']
+        version = _current_version()
+        if _state['index'] is None or version != _state['version']:
+            _state['index'] = build_index()
+            _state['version'] = version
+        _state['checked_at'] = now
+        return _state['index']
+
+
+def invalidate():
+    # التحقق من النسخة يحصل في أول طلب جاي
+    _state['checked_at'] = -math.inf
+
+
+def locate(lat, lng, rental_type=None):
+    return get_index().locate(lat, lng, rental_type)
+
+
+def price_multiplier(zone_id):
+    zone = get_index().by_id.get(zone_id) if zone_id else None
+    return zone.multiplier if zone is not None else 1.0
+
+
+def validate_polygon(polygon):
+    """
+    return: رسالة الخطأ أو None
+    """
+    if not isinstance(polygon, list) or len(polygon) < 3:
+        return 'Polygon must be a list of at least 3 [lat, lng] points.'
+    for point in polygon:
+        if (
+            not isinstance(point, (list, tuple)) or len(point) != 2
+            or not all(isinstance(value, (int, float)) and not isinstance(value, bool) for value in point)
+        ):
+            return 'Each polygon point must be [lat, lng].'
+        lat, lng = point
+        if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+            return 'Polygon point is out of range.'
+    return None
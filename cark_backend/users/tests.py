@@ -1,3 +1,61 @@
-from django.test import TestCase
+import itertools
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.test import TestCase, RequestFactory
+from rest_framework_simplejwt.tokens import AccessToken
+
+from core.auth import jwt_user_id
+from core.idempotency import request_scope
+
+User = get_user_model()
+
+_sequence = itertools.count(1)
+
+
+def create_user(is_staff=False):
+    """
+    مستخدم للتستات ببيانات فريدة (الإيميل والموبايل والرقم القومي unique).
+    """
+    n = next(_sequence)
+    user = User.objects.create_user(
+        f'user{n}@example.com', f'010{n:08d}', 'Test', 'User', f'{n:014d}', 'pass1234',
+    )
+    if is_staff:
+        user.is_staff = True
+        user.is_superuser = True
+        user.save(update_fields=['is_staff', 'is_superuser'])
+    return user
+
+
+def bearer(user):
+    return f'Bearer {AccessToken.for_user(user)}'
+
+
+class JWTIdentityTests(TestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.user = create_user()
+
+    def test_jwt_user_id_reads_the_validated_token(self):
+        request = self.factory.post('/api/wallet/top-up/', HTTP_AUTHORIZATION=bearer(self.user))
+        with self.assertNumQueries(0):
+            self.assertEqual(str(jwt_user_id(request)), str(self.user.pk))
+
+    def test_jwt_user_id_rejects_missing_or_invalid_tokens(self):
+        self.assertIsNone(jwt_user_id(self.factory.post('/api/wallet/top-up/')))
+        request = self.factory.post('/api/wallet/top-up/', HTTP_AUTHORIZATION='Bearer not-a-token')
+        self.assertIsNone(jwt_user_id(request))
+
+    def test_idempotency_scope_follows_the_user_not_the_token(self):
+        first = self.factory.post('/api/wallet/top-up/', HTTP_AUTHORIZATION=bearer(self.user))
+        refreshed = self.factory.post('/api/wallet/top-up/', HTTP_AUTHORIZATION=bearer(self.user))
+        self.assertNotEqual(first.META['HTTP_AUTHORIZATION'], refreshed.META['HTTP_AUTHORIZATION'])
+        self.assertEqual(request_scope(first), request_scope(refreshed))
+
+        other = self.factory.post('/api/wallet/top-up/', HTTP_AUTHORIZATION=bearer(create_user()))
+        self.assertNotEqual(request_scope(first), request_scope(other))
+
+    def test_anonymous_scope_is_per_client_address(self):
+        first = self.factory.post('/api/wallet/top-up/', REMOTE_ADDR='10.0.0.1')
+        second = self.factory.post('/api/wallet/top-up/', REMOTE_ADDR='10.0.0.2')
+        self.assertNotEqual(request_scope(first), request_scope(second))
@@ -0,0 +1,6 @@
+from django.contrib import admin
+from .models import WalletAccount, WalletEntry
+
+# Register your models here.
+admin.site.register(WalletAccount)
+admin.site.register(WalletEntry)
@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Sum
+
+from wallets.models import WalletEntry
+from wallets.services import reconcile
+
+
+class Command(BaseCommand):
+    help = 'Verify wallet balance snapshots against the ledger entries in streaming batches.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        checked, mismatches = reconcile(batch_size=options['batch_size'])
+        for mismatch in mismatches:
+            self.stdout.write(self.style.ERROR(
+                f"Account #{mismatch['account_id']}: balance {mismatch['balance']} != entries {mismatch['entries_total']} "
+                f"(up to entry #{mismatch['last_entry_id']})"
+            ))
+
+        # كل transaction لازم مجموع قيودها يبقى صفر (double-entry)
+        unbalanced = (
+            WalletEntry.objects.values('transaction_id').annotate(total=Sum('amount'))
+            .exclude(total=0).values_list('transaction_id', 'total')
+        )
+        unbalanced_count = 0
+        for transaction_id, total in unbalanced.iterator(chunk_size=options['batch_size']):
+            unbalanced_count += 1
+            self.stdout.write(self.style.ERROR(f'Transaction {transaction_id} is unbalanced by {total}'))
+
+        if mismatches or unbalanced_count:
+            self.stdout.write(self.style.ERROR(
+                f'{checked} accounts checked: {len(mismatches)} balance mismatches, {unbalanced_count} unbalanced transactions.'
+            ))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'{checked} accounts checked: ledger is consistent.'))
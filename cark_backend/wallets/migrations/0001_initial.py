@@ -0,0 +1,49 @@
+# Generated by Django 5.2.18 on 2026-10-19 05:33
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('rentals', '0011_rental_payouts'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WalletAccount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('code', models.CharField(blank=True, max_length=30, null=True, unique=True)),
+                ('account_type', models.CharField(choices=[('User', 'User'), ('Platform', 'Platform'), ('External', 'External')], default='User', max_length=10)),
+                ('balance', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('allow_negative', models.BooleanField(default=False)),
+                ('last_entry_id', models.BigIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='wallet', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='WalletEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('transaction_id', models.UUIDField(db_index=True)),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('balance_after', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('kind', models.CharField(choices=[('TopUp', 'Top Up'), ('RentalPayment', 'Rental Payment'), ('Payout', 'Payout'), ('Refund', 'Refund'), ('Adjustment', 'Adjustment')], max_length=20)),
+                ('description', models.CharField(blank=True, max_length=255, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('account', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='entries', to='wallets.walletaccount')),
+                ('rental', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='wallet_entries', to='rentals.rental')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['account', 'id'], name='walletentry_account_idx')],
+            },
+        ),
+    ]
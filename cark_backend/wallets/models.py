@@ -0,0 +1,76 @@
+from django.db import models
+from django.contrib.auth import get_user_model
+
+User = get_user_model()
+
+
+class WalletAccount(models.Model):
+    """
+    حساب في دفتر المحفظة. الرصيد (balance) snapshot بيتحدث مع كل قيد،
+    فقراءة الرصيد مش محتاجة تجمع كل القيود.
+    """
+    USER = 'User'
+    PLATFORM = 'Platform'
+    EXTERNAL = 'External'
+
+    ACCOUNT_TYPE_CHOICES = [
+        (USER, 'User'),
+        (PLATFORM, 'Platform'),
+        (EXTERNAL, 'External'),
+    ]
+
+    # حسابات النظام (المنصة، ومصدر الشحن الخارجي) ليها code ومالهاش user
+    user = models.OneToOneField(User, on_delete=models.PROTECT, null=True, blank=True, related_name='wallet')
+    code = models.CharField(max_length=30, unique=True, null=True, blank=True)
+    account_type = models.CharField(max_length=10, choices=ACCOUNT_TYPE_CHOICES, default=USER)
+    balance = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    # الحساب الخارجي بس اللي ممكن رصيده يبقى بالسالب
+    allow_negative = models.BooleanField(default=False)
+    # آخر قيد داخل في الـ snapshot
+    last_entry_id = models.BigIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        owner = self.user.email if self.user_id else self.code
+        return f"Wallet {owner} - {self.balance}"
+
+
+class WalletEntry(models.Model):
+    """
+    قيد واحد في الدفتر (append-only). كل عملية بتكتب قيدين أو أكتر بنفس الـ transaction_id
+    ومجموع المبالغ فيهم صفر (double-entry).
+    """
+    KIND_CHOICES = [
+        ('TopUp', 'Top Up'),
+        ('RentalPayment', 'Rental Payment'),
+        ('Payout', 'Payout'),
+        ('Refund', 'Refund'),
+        ('Adjustment', 'Adjustment'),
+    ]
+
+    transaction_id = models.UUIDField(db_index=True)
+    account = models.ForeignKey(WalletAccount, on_delete=models.PROTECT, related_name='entries')
+    # موجب = إضافة للحساب، سالب = خصم منه
+    amount = models.DecimalField(max_digits=12, decimal_places=2)
+    balance_after = models.DecimalField(max_digits=12, decimal_places=2)
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    rental = models.ForeignKey('rentals.Rental', on_delete=models.SET_NULL, null=True, blank=True, related_name='wallet_entries')
+    description = models.CharField(max_length=255, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['account', 'id'], name='walletentry_account_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        if self.pk:
+            raise ValueError('Wallet entries are append-only.')
+        super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        raise ValueError('Wallet entries are append-only.')
+
+    def __str__(self):
+        return f"{self.kind} {self.amount} on account #{self.account_id}"
@@ -0,0 +1,14 @@
+from rest_framework import serializers
+from .models import WalletAccount, WalletEntry
+
+
+class WalletAccountSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = WalletAccount
+        fields = ['id', 'balance', 'updated_at']
+
+
+class WalletEntrySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = WalletEntry
+        fields = ['id', 'transaction_id', 'amount', 'balance_after', 'kind', 'rental', 'description', 'created_at']
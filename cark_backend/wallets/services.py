@@ -0,0 +1,186 @@
+import uuid
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import F, Q, Sum
+from django.utils import timezone
+
+from .models import WalletAccount, WalletEntry
+
+# أكواد حسابات النظام
+PLATFORM_ACCOUNT = 'platform'
+EXTERNAL_ACCOUNT = 'external'
+
+
+class WalletError(Exception):
+    pass
+
+
+class InsufficientFunds(WalletError):
+    pass
+
+
+def _amount(value):
+    try:
+        amount = Decimal(str(value)).quantize(Decimal('0.01'))
+    except Exception:
+        raise WalletError('Invalid amount.')
+    if amount <= 0:
+        raise WalletError('Amount must be greater than 0.')
+    return amount
+
+
+def user_account(user):
+    account, _ = WalletAccount.objects.get_or_create(user=user, defaults={'account_type': WalletAccount.USER})
+    return account
+
+
+def system_account(code):
+    account_type = WalletAccount.EXTERNAL if code == EXTERNAL_ACCOUNT else WalletAccount.PLATFORM
+    account, _ = WalletAccount.objects.get_or_create(
+        code=code,
+        defaults={'account_type': account_type, 'allow_negative': code == EXTERNAL_ACCOUNT},
+    )
+    return account
+
+
+def transfer(from_account, to_account, amount, kind, rental=None, description=None, allow_overdraft=False):
+    """
+    تحويل مبلغ من حساب لحساب: قيد خصم وقيد إضافة بنفس الـ transaction_id وتحديث الـ snapshot للحسابين.
+    الحسابين بيتقفلوا (select_for_update) بترتيب الـ id عشان مفيش deadlock ومفيش سحب على المكشوف
+    لو في عمليتين خصم على نفس الحساب في نفس الوقت.
+    allow_overdraft: الخصم بيتم حتى لو الرصيد مش كفاية (مبلغ مستحق زي فرق التسوية بعد الرحلة)
+    return: transaction_id
+    """
+    amount = _amount(amount)
+    if from_account.pk == to_account.pk:
+        raise WalletError('Cannot transfer to the same account.')
+
+    with transaction.atomic():
+        locked = {
+            account.pk: account
+            for account in WalletAccount.objects.select_for_update()
+            .filter(pk__in=[from_account.pk, to_account.pk]).order_by('pk')
+        }
+        source = locked[from_account.pk]
+        target = locked[to_account.pk]
+        if not (source.allow_negative or allow_overdraft) and source.balance < amount:
+            raise InsufficientFunds('Insufficient wallet balance.')
+
+        transaction_id = uuid.uuid4()
+        now = timezone.now()
+        for account, delta in ((source, -amount), (target, amount)):
+            account.balance += delta
+            entry = WalletEntry.objects.create(
+                transaction_id=transaction_id, account=account, amount=delta, balance_after=account.balance,
+                kind=kind, rental=rental, description=description,
+            )
+            WalletAccount.objects.filter(pk=account.pk).update(
+                balance=account.balance, last_entry_id=entry.pk, updated_at=now,
+            )
+
+    from_account.balance = source.balance
+    to_account.balance = target.balance
+    return transaction_id
+
+
+def top_up(user, amount, description=None):
+    # شحن المحفظة من مصدر خارجي (بوابة الدفع)
+    return transfer(system_account(EXTERNAL_ACCOUNT), user_account(user), amount, 'TopUp', description=description)
+
+
+def pay_rental(rental):
+    """
+    دفع قيمة الحجز من محفظة المستأجر لحساب المنصة وتحديث RentalPayment.
+    الحجز بيتقفل والدفع مسموح بس في PAYABLE_STATUSES، ولو الحجز مستني الدفع
+    (PAYMENT_TRANSITIONS) بيتنقل للحالة اللي بعدها في نفس الـ transaction.
+    المبلغ هو final_cost وقت الدفع، والفرق بعد التسوية بيتسجل في settle_rental_payment.
+    """
+    from rentals.models import Rental, RentalBreakdown, RentalPayment
+    from rentals.transitions import PAYABLE_STATUSES, PAYMENT_TRANSITIONS, transition_rental
+
+    if rental.payment_method != 'wallet':
+        raise WalletError('Rental payment method is not wallet.')
+
+    with transaction.atomic():
+        rental = Rental.objects.select_for_update().get(pk=rental.pk)
+        if rental.status not in PAYABLE_STATUSES:
+            raise WalletError(f'Rental cannot be paid while it is {rental.status}.')
+        breakdown = RentalBreakdown.objects.filter(rental=rental).first()
+        if breakdown is None:
+            raise WalletError('Rental costs have not been calculated yet.')
+        payment, _ = RentalPayment.objects.select_for_update().get_or_create(
+            rental=rental, defaults={'payment_method': 'Wallet'},
+        )
+        if payment.rental_paid_status == 'Paid':
+            raise WalletError('Rental is already paid.')
+        transaction_id = transfer(
+            user_account(rental.renter), system_account(PLATFORM_ACCOUNT), breakdown.final_cost,
+            'RentalPayment', rental=rental, description=f'Rental #{rental.pk}',
+        )
+        payment.rental_paid_status = 'Paid'
+        payment.rental_paid_at = timezone.now()
+        payment.rental_transaction_id = str(transaction_id)
+        payment.payment_method = 'Wallet'
+        payment.save(update_fields=['rental_paid_status', 'rental_paid_at', 'rental_transaction_id', 'payment_method'])
+        if rental.status in PAYMENT_TRANSITIONS:
+            transition_rental(rental, PAYMENT_TRANSITIONS[rental.status], details=f'wallet transaction {transaction_id}')
+    return transaction_id
+
+
+def settle_rental_payment(rental, final_cost):
+    """
+    تسوية دفع المحفظة بعد الحساب النهائي للرحلة (rentals.billing.settle_rental): الفرق بين final_cost
+    وصافي اللي اتخصم من محفظة المستأجر للحجز ده بيتسجل كقيد Refund (رجوع للمستأجر) أو Adjustment
+    (خصم زيادة، حتى لو الرصيد هيبقى بالسالب لأن المبلغ مستحق). لازم تتنادى جوه transaction التسوية.
+    return: transaction_id، أو None لو الحجز ماتدفعش من المحفظة أو مفيش فرق
+    """
+    account = WalletAccount.objects.filter(user_id=rental.renter_id).first()
+    if account is None:
+        return None
+    entries = WalletEntry.objects.filter(account=account, rental=rental)
+    if not entries.exists():
+        return None
+    paid = -(entries.aggregate(total=Sum('amount'))['total'] or Decimal('0'))
+    difference = Decimal(str(final_cost)).quantize(Decimal('0.01')) - paid
+    if difference > 0:
+        return transfer(
+            account, system_account(PLATFORM_ACCOUNT), difference, 'Adjustment',
+            rental=rental, description=f'Rental #{rental.pk} settlement', allow_overdraft=True,
+        )
+    if difference < 0:
+        return transfer(
+            system_account(PLATFORM_ACCOUNT), account, -difference, 'Refund',
+            rental=rental, description=f'Rental #{rental.pk} settlement',
+        )
+    return None
+
+
+def reconcile(batch_size=1000):
+    """
+    مراجعة الـ snapshots مقابل القيود على دفعات من الحسابات (keyset على الـ id)
+    عشان الذاكرة تفضل ثابتة مهما كان عدد الحسابات.
+    الرصيد و last_entry_id ومجموع القيود لحد last_entry_id بيتقروا في query واحدة،
+    فأي تحويل بيحصل أثناء المراجعة (قيوده id أكبر من الـ watermark) مابيطلعش فرق غلط.
+    return: (عدد الحسابات اللي اتراجعت، قائمة الحسابات اللي فيها فرق)
+    """
+    checked = 0
+    mismatches = []
+    last_id = 0
+    while True:
+        accounts = list(
+            WalletAccount.objects.filter(pk__gt=last_id).order_by('pk')
+            .annotate(entries_total=Sum('entries__amount', filter=Q(entries__id__lte=F('last_entry_id'))))
+            .values_list('pk', 'balance', 'last_entry_id', 'entries_total')[:batch_size]
+        )
+        if not accounts:
+            break
+        last_id = accounts[-1][0]
+        for pk, balance, last_entry_id, entries_total in accounts:
+            expected = entries_total or Decimal('0')
+            if expected != balance:
+                mismatches.append({
+                    'account_id': pk, 'balance': balance, 'entries_total': expected, 'last_entry_id': last_entry_id,
+                })
+        checked += len(accounts)
+    return checked, mismatches
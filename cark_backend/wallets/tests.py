@@ -0,0 +1,211 @@
+import uuid
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from cars.tests import create_car
+from core import idempotency
+from core.models import IdempotencyKey
+from rentals.billing import create_rental_breakdown, settle_rental
+from rentals.models import Rental, RentalBreakdown, RentalPayment, RentalUsage
+from rentals.tests import create_rental, utc
+from users.tests import create_user, bearer
+from .models import WalletAccount, WalletEntry
+from .services import (
+    top_up, transfer, pay_rental, reconcile, user_account, system_account, InsufficientFunds, WalletError,
+    PLATFORM_ACCOUNT,
+)
+
+
+class LedgerTests(TestCase):
+    def setUp(self):
+        self.user = create_user()
+
+    def test_transfers_keep_snapshot_and_entries_in_step(self):
+        top_up(self.user, '500')
+        account = user_account(self.user)
+        platform = system_account(PLATFORM_ACCOUNT)
+        transfer(account, platform, '120.50', 'Adjustment')
+
+        account.refresh_from_db()
+        self.assertEqual(account.balance, Decimal('379.50'))
+        entries = WalletEntry.objects.filter(account=account).order_by('id')
+        self.assertEqual([e.balance_after for e in entries], [Decimal('500.00'), Decimal('379.50')])
+        self.assertEqual(account.last_entry_id, entries.last().pk)
+        # double-entry: كل transaction مجموع قيودها صفر
+        for transaction_id in WalletEntry.objects.values_list('transaction_id', flat=True).distinct():
+            amounts = WalletEntry.objects.filter(transaction_id=transaction_id).values_list('amount', flat=True)
+            self.assertEqual(sum(amounts), 0)
+
+    def test_overdraft_and_invalid_amounts_are_rejected(self):
+        top_up(self.user, '10')
+        account = user_account(self.user)
+        with self.assertRaises(InsufficientFunds):
+            transfer(account, system_account(PLATFORM_ACCOUNT), '10.01', 'Adjustment')
+        for amount in ('0', '-5', 'abc'):
+            with self.assertRaises(WalletError):
+                top_up(self.user, amount)
+        self.assertEqual(WalletAccount.objects.get(pk=account.pk).balance, Decimal('10.00'))
+
+    def test_entries_are_immutable(self):
+        top_up(self.user, '10')
+        with self.assertRaises(ValueError):
+            WalletEntry.objects.first().save()
+
+    def test_pay_rental_once(self):
+        car = create_car(create_user())
+        rental = create_rental(self.user, car, status='Confirmed')
+        rental.payment_method = 'wallet'
+        rental.save()
+        breakdown, _ = create_rental_breakdown(rental, 100, 0)
+        top_up(self.user, '5000')
+
+        pay_rental(rental)
+        self.assertEqual(RentalPayment.objects.get(rental=rental).rental_paid_status, 'Paid')
+        self.assertEqual(
+            user_account(self.user).balance, Decimal('5000') - Decimal(str(breakdown.final_cost)).quantize(Decimal('0.01')),
+        )
+        with self.assertRaises(WalletError):
+            pay_rental(rental)
+
+    def _wallet_rental(self, status):
+        rental = create_rental(self.user, create_car(create_user()), status=status)
+        rental.payment_method = 'wallet'
+        rental.save()
+        create_rental_breakdown(rental, 100, 0)
+        return rental
+
+    def test_pay_rental_only_in_payable_statuses(self):
+        top_up(self.user, '5000')
+        for status in ('Pending', 'Canceled', 'Ongoing', 'Finished'):
+            with self.assertRaises(WalletError):
+                pay_rental(self._wallet_rental(status))
+        self.assertEqual(user_account(self.user).balance, Decimal('5000'))
+        self.assertFalse(RentalPayment.objects.filter(rental_paid_status='Paid').exists())
+
+        # الحجز اللي مستني الدفع بيتنقل للحالة اللي بعدها
+        rental = self._wallet_rental('Awaiting Final Payment')
+        pay_rental(rental)
+        self.assertEqual(Rental.objects.get(pk=rental.pk).status, 'Final Payment Paid')
+
+    def test_settlement_posts_the_difference(self):
+        rental = self._wallet_rental('Confirmed')
+        top_up(self.user, '5000')
+        pay_rental(rental)
+        paid = Decimal('5000') - user_account(self.user).balance
+
+        Rental.objects.filter(pk=rental.pk).update(status='Ongoing')
+        # 450 كم على 3 أيام: 150 كم زيادة بتتخصم مع التسوية
+        RentalUsage.objects.create(
+            rental=rental, start_time=utc(2026, 1, 1, 8), end_time=utc(2026, 1, 1, 12), total_distance_used=450,
+        )
+        settle_rental(rental)
+        final_cost = Decimal(str(RentalBreakdown.objects.get(rental=rental).final_cost)).quantize(Decimal('0.01'))
+        self.assertGreater(final_cost, paid)
+        self.assertEqual(user_account(self.user).balance, Decimal('5000') - final_cost)
+        adjustment = WalletEntry.objects.get(account=user_account(self.user), kind='Adjustment')
+        self.assertEqual(adjustment.rental_id, rental.pk)
+        self.assertEqual(adjustment.amount, paid - final_cost)
+        self.assertEqual(reconcile()[1], [])
+
+
+class ReconcileTests(TestCase):
+    def setUp(self):
+        for amount in ('100', '250'):
+            top_up(create_user(), amount)
+
+    def test_consistent_ledger(self):
+        checked, mismatches = reconcile(batch_size=1)
+        # حساب المصدر الخارجي + حسابين مستخدمين
+        self.assertEqual(checked, 3)
+        self.assertEqual(mismatches, [])
+
+    def test_entries_after_the_watermark_are_ignored(self):
+        # قيد تحويل لسه شغال (بعد last_entry_id) مش فرق
+        account = WalletAccount.objects.filter(account_type=WalletAccount.USER).first()
+        WalletEntry.objects.create(
+            transaction_id=uuid.uuid4(), account=account, amount=Decimal('7'),
+            balance_after=account.balance + 7, kind='Adjustment',
+        )
+        self.assertEqual(reconcile()[1], [])
+
+    def test_snapshot_mismatch_is_reported(self):
+        account = WalletAccount.objects.filter(account_type=WalletAccount.USER).first()
+        WalletAccount.objects.filter(pk=account.pk).update(balance=1)
+        checked, mismatches = reconcile(batch_size=2)
+        self.assertEqual(checked, 3)
+        self.assertEqual(len(mismatches), 1)
+        self.assertEqual(mismatches[0]['account_id'], account.pk)
+        self.assertEqual(mismatches[0]['entries_total'], Decimal('100.00'))
+        self.assertEqual(mismatches[0]['last_entry_id'], account.last_entry_id)
+
+        out = StringIO()
+        call_command('reconcile_wallets', batch_size=1, stdout=out)
+        self.assertIn(f'Account #{account.pk}', out.getvalue())
+        self.assertIn('1 balance mismatches', out.getvalue())
+
+
+class IdempotentTopUpTests(TestCase):
+    url = '/api/wallet/top-up/'
+
+    def setUp(self):
+        self.admin = create_user(is_staff=True)
+        self.user = create_user()
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=bearer(self.admin))
+
+    def _top_up(self, amount, key, client=None):
+        return (client or self.client).post(
+            self.url, {'user_id': self.user.pk, 'amount': amount}, format='json', HTTP_IDEMPOTENCY_KEY=key,
+        )
+
+    def test_retry_replays_the_stored_response(self):
+        first = self._top_up('100', 'top-up-1')
+        retry = self._top_up('100', 'top-up-1')
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(retry.status_code, 200)
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+        self.assertEqual(retry.content, first.content)
+        self.assertEqual(user_account(self.user).balance, Decimal('100'))
+
+        self.assertEqual(self._top_up('50', 'top-up-1').status_code, 422)
+        self._top_up('50', 'top-up-2')
+        self.assertEqual(user_account(self.user).balance, Decimal('150'))
+
+    def test_retry_with_a_refreshed_token_replays(self):
+        self._top_up('30', 'refresh')
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=bearer(self.admin))
+        retry = self._top_up('30', 'refresh', client=client)
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+        self.assertEqual(user_account(self.user).balance, Decimal('30'))
+
+    def test_in_progress_and_stale_requests(self):
+        body = {'user_id': self.user.pk, 'amount': '7'}
+        request = self.client.post(self.url, body, format='json').wsgi_request
+        now = timezone.now()
+        record = IdempotencyKey.objects.create(
+            scope=idempotency.request_scope(request), key='busy',
+            fingerprint=idempotency.request_fingerprint(request),
+            locked_at=now, expires_at=now + timedelta(hours=1),
+        )
+        with mock.patch.object(idempotency, 'WAIT_SECONDS', 0.2):
+            self.assertEqual(self._top_up('7', 'busy').status_code, 409)
+
+        # الطلب الأصلي مات، فالـ retry بينفذ مكانه
+        IdempotencyKey.objects.filter(pk=record.pk).update(locked_at=now - timedelta(minutes=5))
+        self.assertEqual(self._top_up('7', 'busy').status_code, 200)
+        # 7 من الطلب اللي من غير مفتاح و 7 من الـ retry
+        self.assertEqual(user_account(self.user).balance, Decimal('14'))
+
+    def test_expired_keys_are_purged(self):
+        self._top_up('5', 'old')
+        IdempotencyKey.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+        call_command('purge_idempotency_keys', stdout=StringIO())
+        self.assertFalse(IdempotencyKey.objects.exists())
@@ -0,0 +1,79 @@
+from django.contrib.auth import get_user_model
+from django.shortcuts import get_object_or_404
+from rest_framework import viewsets, status
+from rest_framework.decorators import action
+from rest_framework.permissions import IsAuthenticated, IsAdminUser
+from rest_framework.response import Response
+
+from rentals.models import Rental
+from .models import WalletEntry
+from .serializers import WalletAccountSerializer, WalletEntrySerializer
+from .services import user_account, top_up, pay_rental, WalletError
+
+User = get_user_model()
+
+
+class WalletViewSet(viewsets.ViewSet):
+    """
+    محفظة المستخدم:
+    - عرض الرصيد
+    - كشف الحساب (القيود)
+    - شحن المحفظة (للأدمن)
+    - دفع حجز من المحفظة
+    """
+    permission_classes = [IsAuthenticated]
+
+    def list(self, request):
+        account = user_account(request.user)
+        return Response(WalletAccountSerializer(account).data)
+
+    @action(detail=False, methods=['get'])
+    def entries(self, request):
+        """
+        القيود من الأحدث للأقدم: ?limit=50&before=<id آخر قيد في الصفحة اللي فاتت>
+        """
+        account = user_account(request.user)
+        try:
+            limit = max(1, min(int(request.query_params.get('limit', 50)), 200))
+            before = request.query_params.get('before')
+            before = int(before) if before else None
+        except ValueError:
+            return Response({'error': 'Invalid limit or before.'}, status=400)
+        entries = WalletEntry.objects.filter(account=account)
+        if before:
+            entries = entries.filter(id__lt=before)
+        entries = list(entries.order_by('-id')[:limit])
+        return Response({
+            'results': WalletEntrySerializer(entries, many=True).data,
+            'next_before': entries[-1].id if len(entries) == limit else None,
+        })
+
+    @action(detail=False, methods=['post'], url_path='top-up', permission_classes=[IsAdminUser])
+    def top_up(self, request):
+        """
+        شحن محفظة مستخدم: {"user_id": 1, "amount": "100.00"}
+        """
+        user = get_object_or_404(User, id=request.data.get('user_id'))
+        try:
+            top_up(user, request.data.get('amount'), description=request.data.get('description'))
+        except WalletError as e:
+            return Response({'error': str(e)}, status=400)
+        return Response(WalletAccountSerializer(user_account(user)).data)
+
+    @action(detail=False, methods=['post'], url_path='pay-rental')
+    def pay_rental(self, request):
+        """
+        دفع قيمة حجز من محفظة المستأجر: {"rental_id": 1}
+        """
+        rental = get_object_or_404(Rental.objects.select_related('renter'), id=request.data.get('rental_id'))
+        if rental.renter_id != request.user.id:
+            return Response({'error': 'You are not the renter of this rental.'}, status=status.HTTP_403_FORBIDDEN)
+        try:
+            transaction_id = pay_rental(rental)
+        except WalletError as e:
+            return Response({'error': str(e)}, status=400)
+        return Response({
+            'status': 'Rental paid from wallet.',
+            'transaction_id': transaction_id,
+            'balance': user_account(request.user).balance,
+        })